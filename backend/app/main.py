@@ -1,11 +1,17 @@
 from fastapi import FastAPI
 from app.database import Base, engine
-from app.routes import logs, websocket, anomalies, timeline, reports, upload, xai_routes
+from app.routes import logs, websocket, anomalies, timeline, reports, upload, xai_routes, metrics
 from app.models.logs import LogEvent
 from app.models.anomalies import Anomaly
 from app.models.anomaly_logs import AnomalyLog
 from app.models.uploaded_logs import UploadedLog
 from app.models.uploaded_log_entries import UploadedLogEntry
+from app.models.xai_cache import XAICacheEntry
+from app.models.xai_reports import XAIReport
+from app.models.log_rollups import LogRollup
+from app.models.job_checkpoints import JobCheckpoint
+from app.models.system_metrics import SystemMetric
+from app.models.report_jobs import ReportJob
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -14,8 +20,16 @@ import time
 from app.database import SessionLocal
 from utils.log_cleanup import archive_and_delete_logs
 from utils.archive_cleanup import cleanup_old_archives
+from utils.schema_migrations import run_migrations
+from app.services.detection_pipeline import pipeline
+from app.services.xai_queue import xai_queue
+from app.services.report_jobs import report_jobs
+from app.services.log_rollups import start_compactor
+from app.services.system_metrics import start_metrics_compactor
+from app.websocket_manager import manager
 
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 app = FastAPI(title="Cyber Sentinel AI - Logs Backend")
 
@@ -30,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -40,6 +55,7 @@ app.include_router(timeline.router)
 app.include_router(reports.router)
 app.include_router(upload.router)
 app.include_router(xai_routes.router)
+app.include_router(metrics.router)
 
 
 CLEANUP_INTERVAL = 60 * 60  # 1 hour
@@ -52,6 +68,7 @@ def cleanup_worker():
             if deleted:
                 print(f"🧹 Archived & deleted {deleted} logs")
             cleanup_old_archives()
+            report_jobs.cleanup(db)
         except Exception as e:
             print("❌ Cleanup error:", e)
         finally:
@@ -66,3 +83,42 @@ def start_cleanup_worker():
         target=cleanup_worker,
         daemon=True
     ).start()
+
+
+@app.on_event("startup")
+def start_rollup_compactor():
+    start_compactor()
+    start_metrics_compactor()
+
+
+@app.on_event("startup")
+async def start_detection_pipeline():
+    await pipeline.start()
+
+
+@app.on_event("startup")
+async def start_live_feed():
+    await manager.start()
+
+
+@app.on_event("startup")
+def start_xai_pregeneration():
+    db = SessionLocal()
+    try:
+        queued = xai_queue.enqueue_missing(db)
+        if queued:
+            print(f"🧠 Queued {queued} anomalies for XAI pre-generation")
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def start_report_workers():
+    report_jobs.start()
+
+
+@app.on_event("shutdown")
+async def stop_detection_pipeline():
+    await pipeline.stop()
+    await manager.stop()
+    report_jobs.shutdown()
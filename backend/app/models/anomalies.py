@@ -11,15 +11,23 @@ class Anomaly(Base):
     status = Column(String, index=True, default="active")  # active/investigating/resolved
     risk_score = Column(Integer)                         # 0–100
     source = Column(String)                              # network/file/auth/system
+    endpoint_id = Column(String, index=True)             # endpoint of the triggering log
+    upload_id = Column(Integer, index=True)              # uploaded_logs.id for batch-detected anomalies
+
+    # 🔁 Deduplication: rule that fired + unique key (rule|log or rule|entity|window)
+    rule_id = Column(String, index=True)
+    dedup_key = Column(String, index=True, unique=True)
 
     created_at = Column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(timezone.utc)
+        default=lambda: datetime.now(timezone.utc),
+        index=True
     )
     resolved_at = Column(DateTime(timezone=True), nullable=True)
 
     # 🔑 Explainable AI output (LLM or rules)
     explanation_json = Column(Text)  # JSON string
+    summary = Column(Text)           # explanation summary, read by the timeline
 
     # relationship
     logs = relationship("AnomalyLog", back_populates="anomaly", cascade="all, delete")
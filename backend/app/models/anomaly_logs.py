@@ -6,7 +6,7 @@ class AnomalyLog(Base):
     __tablename__ = "anomaly_logs"
 
     id = Column(Integer, primary_key=True)
-    anomaly_id = Column(String, ForeignKey("anomalies.id", ondelete="CASCADE"))
-    log_id = Column(Integer, ForeignKey("log_events.id", ondelete="CASCADE"))
+    anomaly_id = Column(String, ForeignKey("anomalies.id", ondelete="CASCADE"), index=True)
+    log_id = Column(Integer, ForeignKey("log_events.id", ondelete="CASCADE"), index=True)
 
     anomaly = relationship("Anomaly", back_populates="logs")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class JobCheckpoint(Base):
+    __tablename__ = "job_checkpoints"
+
+    # background job name, e.g. "log_rollups"
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
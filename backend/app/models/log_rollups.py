@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
+from app.database import Base
+
+
+class LogRollup(Base):
+    __tablename__ = "log_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "resolution", "bucket", "endpoint_id", "log_type", "source", "severity",
+            name="uq_log_rollups_key"
+        ),
+        Index("ix_log_rollups_resolution_bucket", "resolution", "bucket"),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    # "1m" or "1h"; bucket is the UTC start of the minute/hour
+    resolution = Column(String(2), nullable=False)
+    bucket = Column(DateTime(timezone=True), nullable=False)
+
+    # group-by dimensions ("" instead of NULL so the unique key holds)
+    endpoint_id = Column(String, nullable=False, default="")
+    log_type = Column(String, nullable=False, default="")
+    source = Column(String, nullable=False, default="")
+    severity = Column(String, nullable=False, default="")
+
+    count = Column(Integer, nullable=False, default=0)
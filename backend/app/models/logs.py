@@ -1,9 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime, timezone
 from app.database import Base
 
 class LogEvent(Base):
     __tablename__ = "log_events"
+    __table_args__ = (
+        # sliding-window warm-up: type + time range
+        Index("ix_log_events_type_timestamp", "log_type", "timestamp"),
+        # explorer filters, newest first
+        Index("ix_log_events_severity_timestamp", "severity", "timestamp"),
+        Index("ix_log_events_endpoint_timestamp", "endpoint_id", "timestamp"),
+        # explorer default sort, keyset paging and retention (timestamp < cutoff)
+        Index("ix_log_events_timestamp_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
 
@@ -19,3 +29,12 @@ class LogEvent(Base):
     severity = Column(String)
     message = Column(Text)
     raw_data = Column(Text)
+
+    # 🔎 Promoted from raw_data at ingest (rules never re-parse JSON)
+    src_ip = Column(String, index=True)
+    dst_ip = Column(String, index=True)
+    username = Column(String, index=True)
+    event_id = Column(Integer)
+    raw_json = Column(
+        JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+    )
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, DateTime, Text, Index
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class ReportJob(Base):
+    __tablename__ = "report_jobs"
+    __table_args__ = (
+        # reuse lookup: newest job for the same range + filters + data
+        Index("ix_report_jobs_cache_key_created", "cache_key", "created_at"),
+    )
+
+    id = Column(String, primary_key=True)        # rpt_<hex>
+    status = Column(String, nullable=False)      # running | done | failed
+    range = Column(String, nullable=False)
+    filters_json = Column(Text, nullable=False, default="{}")
+    cache_key = Column(String(64), nullable=False)
+
+    file_path = Column(String)
+    sha256 = Column(String(64))
+    error = Column(Text)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+    finished_at = Column(DateTime(timezone=True))
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, UniqueConstraint
+from app.database import Base
+
+
+class SystemMetric(Base):
+    __tablename__ = "system_metrics"
+    __table_args__ = (
+        # also serves per-endpoint range scans at one resolution
+        UniqueConstraint(
+            "resolution", "endpoint_id", "bucket",
+            name="uq_system_metrics_key"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    # "5s" raw agent snapshots, "1m" / "1h" downsampled rollups;
+    # bucket is the snapshot time or the UTC start of the minute/hour
+    resolution = Column(String(2), nullable=False)
+    endpoint_id = Column(String, nullable=False)
+    bucket = Column(DateTime(timezone=True), nullable=False)
+
+    samples = Column(Integer, nullable=False, default=1)
+
+    # percentages: mean over the bucket + peak
+    cpu = Column(Float, nullable=False, default=0)
+    cpu_max = Column(Float, nullable=False, default=0)
+    memory = Column(Float, nullable=False, default=0)
+    memory_max = Column(Float, nullable=False, default=0)
+    disk = Column(Float, nullable=False, default=0)          # mean used % across disks
+    disk_max = Column(Float, nullable=False, default=0)      # fullest disk
+
+    uptime_seconds = Column(BigInteger)
@@ -1,15 +1,26 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from datetime import datetime, timezone
 from app.database import Base
 
 
 class UploadedLogEntry(Base):
     __tablename__ = "uploaded_log_entries"
+    __table_args__ = (
+        # per-file paging
+        Index("ix_uploaded_log_entries_filename_timestamp", "filename", "timestamp", "id"),
+        # unfiltered newest-first paging
+        Index("ix_uploaded_log_entries_timestamp_id", "timestamp", "id"),
+        # time-ordered replay of one upload for batch detection
+        Index("ix_uploaded_log_entries_upload_timestamp", "upload_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
 
     filename = Column(String, nullable=False)
 
+    # set for entries parsed server-side from a stored upload
+    upload_id = Column(Integer, ForeignKey("uploaded_logs.id"), index=True)
+
     timestamp = Column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text
 from datetime import datetime, timezone
 from app.database import Base
 
@@ -14,11 +14,33 @@ class UploadedLog(Base):
         nullable=False
     )
 
-    filename = Column(String, nullable=False)
+    filename = Column(String, nullable=False, index=True)
+    file_type = Column(String)
+    log_source = Column(String)
+    uploaded_by = Column(String)
 
-    timestamp = Column(DateTime(timezone=True), nullable=False)
-    source = Column(String)
-    event_type = Column(String)
-    status = Column(String)
-    severity = Column(String)
-    message = Column(Text)
+    # 🔐 evidence: the file on disk, addressed by its sha256
+    storage_path = Column(String)
+    sha256 = Column(String(64), index=True)
+    size_bytes = Column(BigInteger)
+
+    # server-side parsing progress: received → parsing → parsed / failed
+    status = Column(String, default="received")
+    entry_count = Column(Integer, default=0)
+    error = Column(Text)
+
+    # entry time span, kept as entries are stored (GET /api/upload/files)
+    first_timestamp = Column(DateTime(timezone=True))
+    last_timestamp = Column(DateTime(timezone=True))
+
+    # server-side anomaly detection: idle → running → done / failed
+    detection_status = Column(String, default="idle")
+    detection_processed = Column(Integer, default=0)
+    anomaly_count = Column(Integer, default=0)
+
+    # legacy NOT NULL column on databases created by older versions
+    timestamp = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
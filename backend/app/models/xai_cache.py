@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, Text
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class XAICacheEntry(Base):
+    __tablename__ = "xai_cache"
+
+    # sha256 of the sanitized payload sent to the provider
+    key = Column(String(64), primary_key=True)
+    provider = Column(String)
+    result_json = Column(Text, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, UniqueConstraint
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class XAIReport(Base):
+    __tablename__ = "xai_reports"
+    __table_args__ = (
+        UniqueConstraint("anomaly_id", "version", name="uq_xai_reports_anomaly_version"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    anomaly_id = Column(
+        String,
+        ForeignKey("anomalies.id", ondelete="CASCADE"),
+        index=True,
+        nullable=False
+    )
+    version = Column(Integer, nullable=False)
+
+    # hash of the evidence the report was generated from
+    evidence_hash = Column(String(64), nullable=False)
+    report_json = Column(Text, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
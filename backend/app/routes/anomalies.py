@@ -1,11 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, defer
+from datetime import datetime
 import json
 
 from app.database import SessionLocal
 from app.models.anomalies import Anomaly
 from app.models.anomaly_logs import AnomalyLog
-from app.models.logs import LogEvent
+from app.services.anomaly_stats import anomaly_stats
+from app.services.pagination import (
+    MAX_PAGE_SIZE,
+    encode_cursor,
+    decode_cursor,
+    before_cursor
+)
 
 router = APIRouter(prefix="/api/anomalies", tags=["Anomalies"])
 
@@ -19,59 +26,93 @@ def get_db():
 
 
 @router.get("")
-def list_anomalies(db: Session = Depends(get_db)):
+def list_anomalies(
+    response: Response,
+    status: str | None = None,
+    type: str | None = None,
+    min_risk: int | None = None,
+    max_risk: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    include_explanation: bool = True,
+    cursor: str | None = None,
+    limit: int = Query(200, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    query = db.query(Anomaly)
+
+    if status:
+        query = query.filter(Anomaly.status == status)
+    if type:
+        query = query.filter(Anomaly.type == type)
+    if min_risk is not None:
+        query = query.filter(Anomaly.risk_score >= min_risk)
+    if max_risk is not None:
+        query = query.filter(Anomaly.risk_score <= max_risk)
+    if since:
+        query = query.filter(Anomaly.created_at >= since)
+    if until:
+        query = query.filter(Anomaly.created_at < until)
+
+    position = decode_cursor(cursor)
+    if position:
+        query = query.filter(
+            before_cursor(Anomaly.created_at, Anomaly.id, position)
+        )
+
+    if not include_explanation:
+        query = query.options(defer(Anomaly.explanation_json))
+
     anomalies = (
-        db.query(Anomaly)
-        .order_by(Anomaly.created_at.desc())
+        query
+        .order_by(Anomaly.created_at.desc(), Anomaly.id.desc())
+        .limit(limit)
         .all()
     )
 
-    response = []
-
-    for anomaly in anomalies:
-        related_logs = (
-            db.query(AnomalyLog.log_id)
-            .filter(AnomalyLog.anomaly_id == anomaly.id)
+    # 🔗 one grouped lookup for every anomaly on the page (no N+1)
+    related = {}
+    if anomalies:
+        links = (
+            db.query(AnomalyLog.anomaly_id, AnomalyLog.log_id)
+            .filter(AnomalyLog.anomaly_id.in_([a.id for a in anomalies]))
+            .order_by(AnomalyLog.id)
             .all()
         )
+        for anomaly_id, log_id in links:
+            related.setdefault(anomaly_id, []).append(str(log_id))
+
+    if len(anomalies) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            anomalies[-1].created_at, anomalies[-1].id
+        )
 
-        explanation = {}
-        if anomaly.explanation_json:
-            explanation = json.loads(anomaly.explanation_json)
+    result = []
 
-        response.append({
+    for anomaly in anomalies:
+        item = {
             "id": anomaly.id,
             "type": anomaly.type,
             "status": anomaly.status,
             "riskScore": anomaly.risk_score,
             "source": anomaly.source,
             "timestamp": anomaly.created_at.isoformat(),
-            "relatedLogs": [str(l.log_id) for l in related_logs],
-            "explanation": explanation
-        })
+            "relatedLogs": related.get(anomaly.id, []),
+        }
 
-    return response
+        if include_explanation:
+            item["explanation"] = (
+                json.loads(anomaly.explanation_json)
+                if anomaly.explanation_json else {}
+            )
 
-@router.get("/stats")
-def anomaly_stats(db: Session = Depends(get_db)):
-    anomalies = db.query(Anomaly).all()
-
-    if not anomalies:
-        return {
-            "active": 0,
-            "investigating": 0,
-            "resolved": 0,
-            "avgRisk": 0
-        }
+        result.append(item)
 
-    return {
-        "active": sum(1 for a in anomalies if a.status == "active"),
-        "investigating": sum(1 for a in anomalies if a.status == "investigating"),
-        "resolved": sum(1 for a in anomalies if a.status == "resolved"),
-        "avgRisk": round(
-            sum(a.risk_score for a in anomalies) / len(anomalies)
-        )
-    }
+    return result
+
+@router.get("/stats")
+def get_anomaly_stats(db: Session = Depends(get_db)):
+    return anomaly_stats.snapshot(db)
 
 
 @router.patch("/{anomaly_id}/status")
@@ -88,7 +129,9 @@ def update_anomaly_status(
     if status not in {"active", "investigating", "resolved"}:
         raise HTTPException(status_code=400, detail="Invalid status")
 
+    previous = anomaly.status
     anomaly.status = status
     db.commit()
+    anomaly_stats.on_status_changed(previous, status)
 
     return {"success": True, "status": status}
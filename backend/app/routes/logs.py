@@ -1,15 +1,35 @@
-from fastapi import APIRouter, Depends, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.models.logs import LogEvent
 from app.schemas.logs import LogCreate, LogResponse
-from typing import List, Optional
-from app.services.network_detection import detect_attacks
 import json
 from app.websocket_manager import manager
-import asyncio
 from datetime import datetime, timezone
-from app.services.anomaly_detector import detect_anomalies
+from app.services.detection_pipeline import pipeline
+from app.services.log_ingest import (
+    build_log_row,
+    parse_ndjson,
+    validate_batch,
+    insert_logs,
+    broadcast_payload
+)
+from app.services.system_metrics import (
+    LOG_TYPE as METRICS_LOG_TYPE,
+    sample_time,
+    metric_row,
+    store_samples,
+    metrics_payload
+)
+from app.services.pagination import (
+    MAX_PAGE_SIZE,
+    encode_cursor,
+    decode_cursor,
+    before_cursor
+)
+from app.services.report_export import batched
+from config import INGEST_BATCH_MAX
 
 router = APIRouter(prefix="/api/logs", tags=["Logs"])
 
@@ -21,52 +41,246 @@ def get_db():
         db.close()
 
 # 1️⃣ INGEST LOGS (agents will call this)
+# system_metrics snapshots go to the metrics time series (/api/metrics),
+# log_events only keeps security events
 @router.post("/ingest", response_model=LogResponse)
 async def ingest_log(log: LogCreate, db: Session = Depends(get_db)):
-    db_log = LogEvent(
-        endpoint_id=log.endpoint_id,
-        log_type=log.log_type,
-        severity=log.severity,
-        message=log.message,
-        source=log.source,
-        raw_data=log.raw_data,
-        timestamp=datetime.now(timezone.utc)
-    )
+    if log.log_type == METRICS_LOG_TYPE:
+        ts = sample_time(log.timestamp, datetime.now(timezone.utc))
+        row = metric_row(log.endpoint_id, log.raw_data, ts)
+        metric_id, = store_samples(db, [row])
+        db.commit()
+        if metric_id is None:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Duplicate system_metrics snapshot at {ts.isoformat()}"
+            )
+        await manager.broadcast(log.endpoint_id, metrics_payload(row, log.source))
+        return {**log.model_dump(), "id": metric_id, "timestamp": ts}
+
+    db_log = LogEvent(**build_log_row(log))
 
     db.add(db_log)
     db.commit()
     db.refresh(db_log)
-    detect_anomalies(db, db_log)
+    pipeline.enqueue([db_log])
     # ✅ SAFE async broadcast
-    await manager.broadcast(
-        log.endpoint_id,
-        {
-            "id": db_log.id,
-            "type": log.log_type,
-            "severity": log.severity,
-            "message": log.message,
-            "source": log.source,
-            "timestamp": db_log.timestamp.isoformat()
-        }
-    )
+    await manager.broadcast(log.endpoint_id, broadcast_payload(db_log))
 
     return db_log
 
 
+# 1️⃣b BATCHED INGEST (JSON array or NDJSON)
+@router.post("/ingest/batch")
+async def ingest_log_batch(request: Request, db: Session = Depends(get_db)):
+    body = await request.body()
+
+    if "ndjson" in request.headers.get("content-type", ""):
+        # a bad line is reported at its index, like an invalid event
+        items = parse_ndjson(body)
+    else:
+        try:
+            items = json.loads(body or b"[]")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Malformed batch: {e}")
+
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Batch must be a JSON array")
+    if len(items) > INGEST_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {INGEST_BATCH_MAX} events"
+        )
+
+    valid, errors = validate_batch(items)
+
+    now = datetime.now(timezone.utc)
+    samples = [(i, log) for i, log in valid if log.log_type == METRICS_LOG_TYPE]
+    valid = [(i, log) for i, log in valid if log.log_type != METRICS_LOG_TYPE]
+
+    metric_rows = [
+        metric_row(log.endpoint_id, log.raw_data, sample_time(log.timestamp, now))
+        for _, log in samples
+    ]
+    metric_ids = store_samples(db, metric_rows)
+    db_logs = insert_logs(db, [build_log_row(log, now) for _, log in valid])
+    db.commit()
+
+    # a snapshot already stored for its (endpoint, sample time) is a resend
+    stored = []
+    for (index, log), row, metric_id in zip(samples, metric_rows, metric_ids):
+        if metric_id is None:
+            errors.append({
+                "index": index,
+                "error": f"duplicate system_metrics snapshot at {row['bucket'].isoformat()}"
+            })
+        else:
+            stored.append((index, log, row, metric_id))
+
+    pipeline.enqueue(db_logs)
+
+    # one broadcast per endpoint for the whole batch
+    by_endpoint = {}
+    for db_log in db_logs:
+        by_endpoint.setdefault(db_log.endpoint_id, []).append(
+            broadcast_payload(db_log)
+        )
+    for _, log, row, _ in stored:
+        by_endpoint.setdefault(log.endpoint_id, []).append(
+            metrics_payload(row, log.source)
+        )
+    for endpoint_id, payloads in by_endpoint.items():
+        await manager.broadcast_many(endpoint_id, payloads)
+
+    results = errors + [
+        {"index": index, "id": db_log.id}
+        for (index, _), db_log in zip(valid, db_logs)
+    ] + [
+        {"index": index, "metric_id": metric_id}
+        for index, _, _, metric_id in stored
+    ]
+    results.sort(key=lambda r: r["index"])
+
+    return {
+        "accepted": len(db_logs) + len(stored),
+        "rejected": len(errors),
+        "results": results
+    }
+
+
 
 # 2️⃣ LOGS EXPLORER (frontend uses this)
+EXPLORER_FIELDS = {
+    "id", "timestamp", "endpoint_id", "log_type", "source", "severity",
+    "message", "raw_data", "src_ip", "dst_ip", "username", "event_id",
+}
+DEFAULT_EXPLORER_FIELDS = EXPLORER_FIELDS - {"raw_data"}
+
+
+def explorer_columns(fields: str | None):
+    if not fields:
+        wanted = DEFAULT_EXPLORER_FIELDS
+    else:
+        wanted = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = wanted - EXPLORER_FIELDS
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+
+    # id + timestamp are always returned, they make up the cursor
+    wanted = wanted | {"id", "timestamp"}
+    return [getattr(LogEvent, name) for name in sorted(wanted)]
+
+
+def explorer_query(
+    db: Session,
+    fields: str | None,
+    log_type: str | None,
+    severity: str | None,
+    src_ip: str | None,
+    dst_ip: str | None,
+    endpoint_id: str | None,
+    since: datetime | None,
+    until: datetime | None,
+):
+    query = db.query(*explorer_columns(fields))
+
+    if log_type:
+        query = query.filter(LogEvent.log_type == log_type)
+    if severity:
+        query = query.filter(LogEvent.severity == severity)
+    if src_ip:
+        query = query.filter(LogEvent.src_ip == src_ip)
+    if dst_ip:
+        query = query.filter(LogEvent.dst_ip == dst_ip)
+    if endpoint_id:
+        query = query.filter(LogEvent.endpoint_id == endpoint_id)
+    if since:
+        query = query.filter(LogEvent.timestamp >= since)
+    if until:
+        query = query.filter(LogEvent.timestamp < until)
+
+    return query.order_by(LogEvent.timestamp.desc(), LogEvent.id.desc())
+
+
+def serialize_log_row(row) -> dict:
+    data = row._asdict()
+    data["timestamp"] = data["timestamp"].isoformat()
+    return data
+
+
 @router.get("/explorer")
 def get_logs(
+    response: Response,
     log_type: str | None = None,
     severity: str | None = None,
+    src_ip: str | None = None,
+    dst_ip: str | None = None,
+    endpoint_id: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    fields: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db)
 ):
-    query = db.query(LogEvent)
+    query = explorer_query(
+        db, fields, log_type, severity, src_ip, dst_ip,
+        endpoint_id, since, until
+    )
 
-    if log_type:
-        query = query.filter(LogEvent.log_type == log_type)
-    if severity:
-        query = query.filter(LogEvent.severity == severity)
+    position = decode_cursor(cursor)
+    if position:
+        query = query.filter(
+            before_cursor(LogEvent.timestamp, LogEvent.id, position)
+        )
+
+    rows = query.limit(limit).all()
+
+    # next page token travels in a header so the body stays a plain list
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            rows[-1].timestamp, rows[-1].id
+        )
+
+    return [serialize_log_row(row) for row in rows]
+
+
+# 2️⃣b BULK PULL (NDJSON stream, constant memory)
+@router.get("/explorer/stream")
+def stream_logs(
+    log_type: str | None = None,
+    severity: str | None = None,
+    src_ip: str | None = None,
+    dst_ip: str | None = None,
+    endpoint_id: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    fields: str | None = None,
+):
+    explorer_columns(fields)  # reject bad fields before streaming starts
+
+    def generate():
+        # own session: the request-scoped one is closed before streaming
+        db = SessionLocal()
+        try:
+            query = explorer_query(
+                db, fields, log_type, severity, src_ip, dst_ip,
+                endpoint_id, since, until
+            ).yield_per(1000)
+
+            for row in query:
+                yield json.dumps(serialize_log_row(row), default=str) + "\n"
+        finally:
+            db.close()
+
+    # 1000 rows per chunk, not one threadpool hop per row
+    return StreamingResponse(batched(generate(), 1000), media_type="application/x-ndjson")
 
-    return query.order_by(LogEvent.timestamp.desc()).all()
 
+# 3️⃣ DETECTION PIPELINE HEALTH
+@router.get("/pipeline/stats")
+def detection_pipeline_stats():
+    return pipeline.stats()
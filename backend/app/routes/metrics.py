@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services import system_metrics
+
+router = APIRouter(prefix="/api/metrics", tags=["System Metrics"])
+
+
+# 1️⃣ TIME SERIES FOR SystemChart (mean + peak per bucket)
+@router.get("")
+def get_metrics(
+    endpoint_id: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    minutes: int = Query(60, ge=1, le=60 * 24 * 365),
+    resolution: str | None = Query(None, pattern="^(5s|1m|1h)$"),
+    db: Session = Depends(get_db)
+):
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(minutes=minutes)
+    since, until = (
+        ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc) for ts in (since, until)
+    )
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+
+    return system_metrics.series(db, since, until, endpoint_id, resolution)
+
+
+# 2️⃣ NEWEST SNAPSHOT PER ENDPOINT (metric cards)
+@router.get("/latest")
+def get_latest_metrics(db: Session = Depends(get_db)):
+    return system_metrics.latest(db)
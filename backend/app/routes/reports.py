@@ -1,145 +1,181 @@
 
-from fastapi import APIRouter, Depends, Query
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import FileResponse, StreamingResponse
-from starlette.responses import JSONResponse
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-import csv
-import io
-import os
 
 from app.database import get_db
-from app.models.logs import LogEvent as Log
-from app.models.anomalies import Anomaly
-
-# PDF
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+from app.services.report_export import (
+    range_start,
+    stream_logs_csv,
+    stream_report_json,
+    stream_report_ndjson,
+    gzip_stream
+)
+from app.services.report_jobs import report_jobs
+from app.services.report_service import build_report
+from app.services import log_rollups
 
 router = APIRouter(prefix="/api/reports", tags=["Reports"])
 
 
-def apply_time_range(query, range: str):
-    now = datetime.utcnow()
+def _streamed(chunks, filename: str, media_type: str, gzip: bool):
+    if gzip:
+        chunks = gzip_stream(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
 
-    if range == "24h":
-        return query.filter(Log.timestamp >= now - timedelta(hours=24))
-    if range == "7d":
-        return query.filter(Log.timestamp >= now - timedelta(days=7))
-    if range == "30d":
-        return query.filter(Log.timestamp >= now - timedelta(days=30))
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
-    return query
 
-@router.get("/export/json")
-def export_json(
+# =====================================================
+# SUMMARY / CHART DATA (served from log rollups)
+# =====================================================
+
+@router.get("/summary")
+def report_summary(
     range: str = Query("24h"),
+    endpoint_id: Optional[str] = None,
+    log_type: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    logs = apply_time_range(db.query(Log), range).all()
-    anomalies = db.query(Anomaly).all()
-
-    return JSONResponse({
-        "generated_at": datetime.utcnow().isoformat(),
-        "range": range,
-        "logs": [
-            {
-                "timestamp": l.timestamp.isoformat(),
-                "source": l.source,
-                "severity": l.severity,
-                "message": l.message,
-            }
-            for l in logs
-        ],
-        "anomalies": [
-            {
-                # "title": a.title,
-                "severity": a.severity,
-                "riskScore": a.riskScore,
-                "status": a.status,
-                "timestamp": a.timestamp.isoformat(),
-            }
-            for a in anomalies
-        ],
-    })
+    return build_report(
+        db, range, {"endpoint_id": endpoint_id, "log_type": log_type}
+    )
 
 
-@router.get("/export/csv")
-def export_csv(
+@router.get("/rollups")
+def report_rollups(
     range: str = Query("24h"),
+    resolution: str = Query("1h", pattern="^(1m|1h)$"),
+    group_by: Optional[str] = Query(
+        None, pattern="^(endpoint_id|log_type|source|severity)$"
+    ),
+    endpoint_id: Optional[str] = None,
+    log_type: Optional[str] = None,
+    source: Optional[str] = None,
+    severity: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    logs = apply_time_range(db.query(Log), range).all()
-
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-
-    writer.writerow([
-        "timestamp",
-        "source",
-        "severity",
-        "message"
-        
-    ])
-
-    for l in logs:
-        writer.writerow([
-            l.timestamp.isoformat(),
-            l.source,
-            l.severity,
-            l.message,
-            # l.ip
-        ])
-
-    buffer.seek(0)
-
-    return StreamingResponse(
-        buffer,
-        media_type="text/csv",
-        headers={
-            "Content-Disposition": "attachment; filename=cybersentinel_report.csv"
-        }
+    filters = {
+        k: v for k, v in {
+            "endpoint_id": endpoint_id,
+            "log_type": log_type,
+            "source": source,
+            "severity": severity,
+        }.items() if v
+    }
+    return log_rollups.series(
+        db, resolution, range_start(range), dimension=group_by, filters=filters
     )
 
 
+@router.get("/export/json")
+def export_json(
+    range: str = Query("24h"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    gzip: bool = False
+):
+    if format == "ndjson":
+        return _streamed(
+            stream_report_ndjson(range),
+            "cybersentinel_report.ndjson",
+            "application/x-ndjson",
+            gzip
+        )
 
-@router.get("/export/pdf")
-def export_pdf(
+    return _streamed(
+        stream_report_json(range),
+        "cybersentinel_report.json",
+        "application/json",
+        gzip
+    )
+
+
+@router.get("/export/csv")
+def export_csv(
     range: str = Query("24h"),
-    db: Session = Depends(get_db)
+    gzip: bool = False
 ):
-    logs = apply_time_range(db.query(Log), range).limit(50).all()
+    return _streamed(
+        stream_logs_csv(range),
+        "cybersentinel_report.csv",
+        "text/csv",
+        gzip
+    )
 
-    file_path = "cybersentinel_report.pdf"
-    c = canvas.Canvas(file_path, pagesize=A4)
 
-    width, height = A4
-    y = height - 40
 
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(40, y, "CyberSentinel Forensic Report")
+# =====================================================
+# PDF REPORT JOBS
+# =====================================================
 
-    y -= 30
-    c.setFont("Helvetica", 10)
-    c.drawString(40, y, f"Generated: {datetime.utcnow().isoformat()}")
-    y -= 20
+class ReportJobRequest(BaseModel):
+    range: str = "24h"
+    endpoint_id: Optional[str] = None
+    log_type: Optional[str] = None
 
-    for log in logs:
-        if y < 40:
-            c.showPage()
-            y = height - 40
 
-        c.drawString(
-            40,
-            y,
-            f"[{log.timestamp}] {log.source.upper()} | {log.severity.upper()} | {log.message[:90]}"
-        )
-        y -= 14
+def _job_or_404(db: Session, job_id: str) -> dict:
+    job = report_jobs.get(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+# 1️⃣ Submit a PDF job → returns job id immediately
+@router.post("/jobs", status_code=202)
+def submit_report_job(
+    payload: ReportJobRequest,
+    db: Session = Depends(get_db)
+):
+    job = report_jobs.submit(
+        db,
+        payload.range,
+        {"endpoint_id": payload.endpoint_id, "log_type": payload.log_type}
+    )
+    return report_jobs.public(job)
+
 
-    c.save()
+# 2️⃣ Poll job status
+@router.get("/jobs/{job_id}")
+def get_report_job(job_id: str, db: Session = Depends(get_db)):
+    return report_jobs.public(_job_or_404(db, job_id))
+
+
+# 3️⃣ Download finished PDF
+@router.get("/jobs/{job_id}/download")
+def download_report_job(job_id: str, db: Session = Depends(get_db)):
+    job = _job_or_404(db, job_id)
+    if job["status"] != "done":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Report job is {job['status']}"
+        )
 
     return FileResponse(
-        file_path,
+        job["file_path"],
         filename="cybersentinel_report.pdf",
-        media_type="application/pdf"
+        media_type="application/pdf",
+        headers={"X-Report-SHA256": job["sha256"]}
     )
+
+
+# Legacy one-shot export: renders in the job pool; plain def so the
+# DB work and the wait for the job run in the threadpool, off the loop
+@router.get("/export/pdf")
+def export_pdf(
+    range: str = Query("24h"),
+    db: Session = Depends(get_db)
+):
+    job = report_jobs.submit(db, range, {})
+    if job["status"] != "done":
+        report_jobs.wait(job["id"])
+
+    return download_report_job(job["id"], db)
@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import Integer, String, literal, select, union_all, and_, or_
 from sqlalchemy.orm import Session
+
 from app.database import SessionLocal
 from app.models.logs import LogEvent
 from app.models.anomalies import Anomaly
-import json
+from app.services.pagination import (
+    MAX_PAGE_SIZE,
+    encode_cursor,
+    decode_cursor
+)
 
 router = APIRouter(prefix="/api/timeline", tags=["Timeline"])
 
@@ -16,56 +24,162 @@ def get_db():
         db.close()
 
 
-@router.get("")
-def get_timeline(db: Session = Depends(get_db)):
-    events = []
-
-    # 🔹 Logs
-    logs = (
-        db.query(LogEvent)
-        .order_by(LogEvent.timestamp.desc())
-        .limit(50)
-        .all()
+# =====================================================
+# MERGED STREAM (UNION ALL, keyset paginated)
+# =====================================================
+# Order is (timestamp DESC, kind DESC, id DESC): at equal
+# timestamps logs come before anomalies. Each branch is seeked
+# and limited on its own timestamp index before the merge, so
+# a page never reads more than `limit` rows per table.
+# =====================================================
+
+def _after(ts_col, id_col, kind: str, position):
+    if not position:
+        return None
+
+    ts, (cursor_kind, cursor_id) = position
+    if cursor_kind == kind:
+        return or_(ts_col < ts, and_(ts_col == ts, id_col < cursor_id))
+    if kind == "log":
+        # logs at the cursor timestamp were all on earlier pages
+        return ts_col < ts
+    return ts_col <= ts
+
+
+def _logs_branch(position, since, until, endpoint_id, limit):
+    query = select(
+        LogEvent.timestamp.label("ts"),
+        literal("log").label("kind"),
+        LogEvent.id.label("log_id"),
+        literal(None, String).label("anomaly_id"),
+        LogEvent.log_type.label("log_type"),
+        LogEvent.severity.label("severity"),
+        literal(None, Integer).label("risk_score"),
+        LogEvent.message.label("description"),
+        LogEvent.source.label("details"),
+        LogEvent.log_type.label("source"),
     )
 
-    for log in logs:
-        events.append({
-            "id": f"log_{log.id}",
-            "timestamp": log.timestamp.isoformat(),
-            "category": "access" if log.log_type == "auth" else "change",
-            "severity": "low" if log.severity == "low" else "medium",
-            "description": log.message,
-            "details": f"Source: {log.source}",
-            "source": log.log_type
-        })
-
-    # 🔹 Anomalies
-    anomalies = (
-        db.query(Anomaly)
-        .order_by(Anomaly.created_at.desc())
-        .limit(50)
-        .all()
+    cond = _after(LogEvent.timestamp, LogEvent.id, "log", position)
+    if cond is not None:
+        query = query.where(cond)
+    if since:
+        query = query.where(LogEvent.timestamp >= since)
+    if until:
+        query = query.where(LogEvent.timestamp < until)
+    if endpoint_id:
+        query = query.where(LogEvent.endpoint_id == endpoint_id)
+
+    return (
+        query
+        .order_by(LogEvent.timestamp.desc(), LogEvent.id.desc())
+        .limit(limit)
+        .subquery()
     )
 
-    for a in anomalies:
-        events.append({
-            "id": f"timeline_{a.id}",
-            "anomalyId": a.id,   # 👈 IMPORTANT
-            "timestamp": a.created_at.isoformat(),
-            "category": "incident" if a.risk_score >= 80 else "alert",
-            "severity": (
-                "critical" if a.risk_score >= 90 else
-                "high" if a.risk_score >= 80 else
-                "medium"
-            ),
-            "description": a.type.replace("_", " "),
-            "details": json.loads(a.explanation_json).get("summary", ""),
-            "source": a.source
-        })
 
+def _anomalies_branch(position, since, until, endpoint_id, limit):
+    query = select(
+        Anomaly.created_at.label("ts"),
+        literal("anomaly").label("kind"),
+        literal(None, Integer).label("log_id"),
+        Anomaly.id.label("anomaly_id"),
+        literal(None, String).label("log_type"),
+        literal(None, String).label("severity"),
+        Anomaly.risk_score.label("risk_score"),
+        Anomaly.type.label("description"),
+        Anomaly.summary.label("details"),
+        Anomaly.source.label("source"),
+    )
+
+    cond = _after(Anomaly.created_at, Anomaly.id, "anomaly", position)
+    if cond is not None:
+        query = query.where(cond)
+    if since:
+        query = query.where(Anomaly.created_at >= since)
+    if until:
+        query = query.where(Anomaly.created_at < until)
+    if endpoint_id:
+        query = query.where(Anomaly.endpoint_id == endpoint_id)
+
+    return (
+        query
+        .order_by(Anomaly.created_at.desc(), Anomaly.id.desc())
+        .limit(limit)
+        .subquery()
+    )
+
+
+def _to_event(row) -> dict:
+    if row.kind == "log":
+        return {
+            "id": f"log_{row.log_id}",
+            "timestamp": row.ts.isoformat(),
+            "category": "access" if row.log_type == "auth" else "change",
+            "severity": "low" if row.severity == "low" else "medium",
+            "description": row.description,
+            "details": f"Source: {row.details}",
+            "source": row.source
+        }
+
+    risk = row.risk_score or 0
+    return {
+        "id": f"timeline_{row.anomaly_id}",
+        "anomalyId": row.anomaly_id,   # 👈 IMPORTANT
+        "timestamp": row.ts.isoformat(),
+        "category": "incident" if risk >= 80 else "alert",
+        "severity": (
+            "critical" if risk >= 90 else
+            "high" if risk >= 80 else
+            "medium"
+        ),
+        "description": (row.description or "").replace("_", " "),
+        "details": row.details or "",
+        "source": row.source
+    }
+
+
+@router.get("")
+def get_timeline(
+    response: Response,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    endpoint_id: str | None = None,
+    kind: str | None = Query(None, pattern="^(log|anomaly)$"),
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    position = decode_cursor(cursor)
+    if position and not (
+        isinstance(position[1], list) and len(position[1]) == 2
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    branches = []
+    if kind in (None, "log"):
+        branches.append(_logs_branch(position, since, until, endpoint_id, limit))
+    if kind in (None, "anomaly"):
+        branches.append(_anomalies_branch(position, since, until, endpoint_id, limit))
 
+    merged = union_all(*[select(b) for b in branches]).subquery()
+    rows = db.execute(
+        select(merged)
+        .order_by(
+            merged.c.ts.desc(),
+            merged.c.kind.desc(),
+            merged.c.log_id.desc(),
+            merged.c.anomaly_id.desc()
+        )
+        .limit(limit)
+    ).all()
 
-    # 🔹 Sort everything by time
-    events.sort(key=lambda e: e["timestamp"], reverse=True)
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            last.ts,
+            ["log", last.log_id] if last.kind == "log"
+            else ["anomaly", last.anomaly_id]
+        )
 
-    return events[:100]
+    return [_to_event(row) for row in rows]
@@ -35,15 +35,37 @@
 
 
 
-from fastapi import APIRouter, UploadFile, File, Form, Depends
+import json
+from datetime import datetime
+
+from fastapi import (
+    APIRouter, BackgroundTasks, UploadFile, File, Form, Depends,
+    HTTPException, Query, Request, Response
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, or_, update
 from sqlalchemy.orm import Session
-from typing import List
-from pydantic import BaseModel
-from datetime import datetime, timezone
 
 from app.database import get_db
+from app.models.anomalies import Anomaly
 from app.models.uploaded_logs import UploadedLog
 from app.models.uploaded_log_entries import UploadedLogEntry
+from app.services.upload_ingest import store_file, parse_upload
+from app.services.upload_detection import register_entries_upload, run_upload_detection
+from app.services.upload_parsers import detect_format
+from app.services.pagination import (
+    MAX_PAGE_SIZE,
+    encode_cursor,
+    decode_cursor,
+    before_cursor
+)
+from app.services.upload_entries import (
+    BulkEntryWriter,
+    entry_row,
+    bulk_insert_entries,
+    rows_from_records,
+    rows_from_columns
+)
 
 router = APIRouter(prefix="/api/upload", tags=["Upload Logs"])
 
@@ -51,90 +73,130 @@ router = APIRouter(prefix="/api/upload", tags=["Upload Logs"])
 # =====================================================
 # 1️⃣ RAW FILE UPLOAD (EVIDENCE STORAGE)
 # =====================================================
-# Stores the FULL uploaded file as-is
-# Used for forensic evidence, NOT for UI tables
+# Streams the uploaded file to content-addressed storage
+# in chunks, then parses it server-side in the background
+# into uploaded_log_entries and runs the anomaly rules over
+# them (poll GET /api/upload/{id})
 # =====================================================
 
 @router.post("/")
-async def upload_logs(
+def upload_logs(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     log_source: str = Form(None),
     uploaded_by: str = Form(None),
     db: Session = Depends(get_db)
 ):
-    content = await file.read()
+    storage_path, file_hash, size = store_file(file.file, file.filename)
 
     uploaded_log = UploadedLog(
         filename=file.filename,
-        file_type=file.filename.split(".")[-1],
+        file_type=detect_format(file.filename),
         log_source=log_source,
         uploaded_by=uploaded_by,
-        content=content.decode("utf-8", errors="ignore")
+        storage_path=storage_path,
+        sha256=file_hash,
+        size_bytes=size,
+        status="received"
     )
 
     db.add(uploaded_log)
     db.commit()
     db.refresh(uploaded_log)
 
+    # detection is chained from parse_upload once parsing succeeds
+    background_tasks.add_task(parse_upload, uploaded_log.id)
+
     return {
         "status": "success",
         "uploaded_log_id": uploaded_log.id,
-        "filename": uploaded_log.filename
+        "filename": uploaded_log.filename,
+        "sha256": file_hash,
+        "size_bytes": size
     }
 
 
-# =====================================================
-# 2️⃣ PARSED LOG ENTRY SCHEMA (FROM FRONTEND)
-# =====================================================
-
-class UploadedLogEntryIn(BaseModel):
-    timestamp: str
-    source: str
-    eventType: str
-    status: str
-    severity: str
-    message: str
-    fileName: str
-
-
 # =====================================================
 # 3️⃣ STORE PARSED LOG ENTRIES (FOR UI + ANALYSIS)
 # =====================================================
 # This is what powers:
 # - Logs table
 # - File dropdown
-# - Frontend anomaly detection
+# - Server-side anomaly detection (POST /api/upload/detect)
+#
+# { timestamp, source, eventType, status, severity,
+#   message, fileName } per entry, sent as:
+# - a JSON array of entries (application/json)
+# - one entry per line (application/x-ndjson), streamed
+# - columnar JSON: { "timestamp": [...], "fileName": [...] }
 # =====================================================
 
+async def _ndjson_lines(request: Request):
+    """Complete lines of each received chunk, as one list per chunk."""
+    tail = b""
+    async for chunk in request.stream():
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        if lines:
+            yield lines
+    if tail.strip():
+        yield [tail]
+
+
+def _store_lines(writer: BulkEntryWriter, index: int, lines) -> int:
+    # decode + validate + insert off the event loop
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if writer.add(index, entry_row(record)):
+            writer.flush()
+        index += 1
+    return index
+
+
+def _store_body(db: Session, body: bytes):
+    try:
+        payload = json.loads(body or b"[]")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Malformed entries: {e}")
+
+    if isinstance(payload, list):
+        rows = rows_from_records(payload)
+    elif isinstance(payload, dict):
+        rows = rows_from_columns(payload)
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Entries must be a JSON array or columnar object"
+        )
+
+    return bulk_insert_entries(db, rows)
+
+
 @router.post("/entries")
-def store_uploaded_log_entries(
-    logs: List[UploadedLogEntryIn],
+async def store_uploaded_log_entries(
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    rows = []
-
-    for log in logs:
-        rows.append(
-            UploadedLogEntry(
-                filename=log.fileName,
-                timestamp=datetime.fromisoformat(
-                    log.timestamp.replace("Z", "+00:00")
-                ),
-                source=log.source,
-                event_type=log.eventType,
-                status=log.status,
-                severity=log.severity,
-                message=log.message
-            )
-        )
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            # constant memory: each received chunk is parsed and flushed
+            # in the threadpool while the rest of the body streams in
+            writer = BulkEntryWriter(db)
+            index = 0
+            async for lines in _ndjson_lines(request):
+                index = await run_in_threadpool(_store_lines, writer, index, lines)
+            return await run_in_threadpool(writer.finish)
 
-    db.bulk_save_objects(rows)
-    db.commit()
-
-    return {
-        "status": "success",
-        "stored_logs": len(rows)
-    }
+        body = await request.body()
+        return await run_in_threadpool(_store_body, db, body)
+    except Exception:
+        db.rollback()
+        raise
 
 
 # =====================================================
@@ -142,13 +204,48 @@ def store_uploaded_log_entries(
 # =====================================================
 
 @router.get("/entries")
-def get_uploaded_log_entries(db: Session = Depends(get_db)):
+def get_uploaded_log_entries(
+    response: Response,
+    filename: str | None = None,
+    severity: str | None = None,
+    upload_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = Query(1000, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    query = db.query(UploadedLogEntry)
+
+    if filename:
+        query = query.filter(UploadedLogEntry.filename == filename)
+    if severity:
+        query = query.filter(UploadedLogEntry.severity == severity)
+    if upload_id is not None:
+        query = query.filter(UploadedLogEntry.upload_id == upload_id)
+    if since:
+        query = query.filter(UploadedLogEntry.timestamp >= since)
+    if until:
+        query = query.filter(UploadedLogEntry.timestamp < until)
+
+    position = decode_cursor(cursor)
+    if position:
+        query = query.filter(
+            before_cursor(UploadedLogEntry.timestamp, UploadedLogEntry.id, position)
+        )
+
     logs = (
-        db.query(UploadedLogEntry)
-        .order_by(UploadedLogEntry.timestamp.desc())
+        query
+        .order_by(UploadedLogEntry.timestamp.desc(), UploadedLogEntry.id.desc())
+        .limit(limit)
         .all()
     )
 
+    if len(logs) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            logs[-1].timestamp, logs[-1].id
+        )
+
     return [
         {
             "id": log.id,
@@ -162,3 +259,155 @@ def get_uploaded_log_entries(db: Session = Depends(get_db)):
         }
         for log in logs
     ]
+
+
+# 4️⃣b FILE DROPDOWN (from uploaded_logs: one row per upload, kept
+#     up to date as entries are stored, never a scan over entries)
+@router.get("/files")
+def get_uploaded_files(db: Session = Depends(get_db)):
+    rows = (
+        db.query(
+            UploadedLog.filename,
+            func.sum(UploadedLog.entry_count),
+            func.min(UploadedLog.first_timestamp),
+            func.max(UploadedLog.last_timestamp)
+        )
+        .filter(UploadedLog.entry_count > 0)
+        .group_by(UploadedLog.filename)
+        .order_by(UploadedLog.filename)
+        .all()
+    )
+
+    return [
+        {
+            "name": name,
+            "logCount": int(count),
+            "firstTimestamp": first.isoformat() if first else None,
+            "lastTimestamp": last.isoformat() if last else None
+        }
+        for name, count, first, last in rows
+    ]
+
+
+# =====================================================
+# 4️⃣c BATCH ANOMALY DETECTION OVER AN UPLOADED FILE
+# =====================================================
+# Replays the backend rule engine over the file's entries in
+# the background. Files stored through /entries get an upload
+# record first so their anomalies can be linked to it.
+# =====================================================
+
+def _resolve_upload(db: Session, upload_id: int | None, filename: str | None) -> UploadedLog:
+    if upload_id is not None:
+        upload = db.get(UploadedLog, upload_id)
+    elif filename:
+        upload = (
+            db.query(UploadedLog)
+            .filter(UploadedLog.filename == filename, UploadedLog.status == "parsed")
+            .order_by(UploadedLog.id.desc())
+            .first()
+        ) or register_entries_upload(db, filename)
+    else:
+        raise HTTPException(status_code=400, detail="upload_id or filename is required")
+
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+
+@router.post("/detect", status_code=202)
+def detect_upload_anomalies(
+    background_tasks: BackgroundTasks,
+    upload_id: int | None = None,
+    filename: str | None = None,
+    db: Session = Depends(get_db)
+):
+    upload = _resolve_upload(db, upload_id, filename)
+    if upload.status != "parsed":
+        raise HTTPException(status_code=409, detail=f"Upload is {upload.status}")
+
+    # claim the run in one conditional UPDATE: of two quick POSTs
+    # only the first flips the status and queues a replay
+    claimed = db.execute(
+        update(UploadedLog)
+        .where(
+            UploadedLog.id == upload.id,
+            or_(
+                UploadedLog.detection_status.is_(None),
+                UploadedLog.detection_status.notin_(("queued", "running"))
+            )
+        )
+        .values(detection_status="queued")
+    ).rowcount
+    db.commit()
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Detection already queued or running")
+
+    background_tasks.add_task(run_upload_detection, upload.id)
+    return {"status": "queued", "uploaded_log_id": upload.id}
+
+
+# 4️⃣d ANOMALIES DETECTED IN AN UPLOADED FILE
+@router.get("/anomalies")
+def get_upload_anomalies(
+    upload_id: int | None = None,
+    filename: str | None = None,
+    limit: int = Query(1000, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    query = db.query(Anomaly)
+    if upload_id is not None:
+        query = query.filter(Anomaly.upload_id == upload_id)
+    elif filename:
+        query = query.filter(Anomaly.upload_id.in_(
+            db.query(UploadedLog.id).filter(UploadedLog.filename == filename)
+        ))
+    else:
+        raise HTTPException(status_code=400, detail="upload_id or filename is required")
+
+    anomalies = query.order_by(Anomaly.risk_score.desc(), Anomaly.id).limit(limit).all()
+
+    results = []
+    for a in anomalies:
+        explanation = json.loads(a.explanation_json or "{}")
+        signals = {
+            s.get("signal"): s.get("explanation")
+            for s in explanation.get("why_flagged", [])
+        }
+        entry_id = signals.get("upload_entry_id")
+        results.append({
+            "id": a.id,
+            "logId": int(entry_id) if entry_id and entry_id.isdigit() else None,
+            "type": a.type,
+            "description": a.summary or explanation.get("summary"),
+            "riskScore": a.risk_score,
+            "xaiReason": explanation.get("summary"),
+            "timestamp": signals.get("timestamp") or a.created_at.isoformat(),
+        })
+    return results
+
+
+# =====================================================
+# 5️⃣ UPLOAD STATUS (server-side parsing + detection progress)
+# =====================================================
+
+@router.get("/{upload_id}")
+def get_upload_status(upload_id: int, db: Session = Depends(get_db)):
+    upload = db.get(UploadedLog, upload_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    return {
+        "id": upload.id,
+        "filename": upload.filename,
+        "file_type": upload.file_type,
+        "sha256": upload.sha256,
+        "size_bytes": upload.size_bytes,
+        "status": upload.status,
+        "entry_count": upload.entry_count,
+        "detection_status": upload.detection_status,
+        "detection_processed": upload.detection_processed,
+        "anomaly_count": upload.anomaly_count,
+        "error": upload.error,
+        "uploaded_at": upload.uploaded_at.isoformat()
+    }
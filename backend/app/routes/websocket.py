@@ -1,16 +1,44 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
-from app.websocket_manager import manager
+from app.websocket_manager import manager, Subscription
+from config import WS_BATCH_INTERVAL_MS, WS_BATCH_MAX_EVENTS, WS_SEND_QUEUE_MAX
 
 router = APIRouter()
 
+# endpoint_id="*" subscribes to every endpoint. Filters:
+#   log_types=auth,network   min_severity=high   anomalies_only=true
+# Batching: batch_ms (0 = one frame per event), batch_max
 @router.websocket("/ws/alerts")
 async def websocket_endpoint(
     websocket: WebSocket,
-    endpoint_id: str = Query(...)
+    endpoint_id: str = Query(...),
+    log_types: str | None = None,
+    min_severity: str | None = Query(
+        None, pattern="(?i)^(low|info|medium|warning|high|error|critical)$"
+    ),
+    anomalies_only: bool = False,
+    batch_ms: int = Query(WS_BATCH_INTERVAL_MS, ge=0, le=10000),
+    batch_max: int = Query(WS_BATCH_MAX_EVENTS, ge=1, le=WS_SEND_QUEUE_MAX)
 ):
-    await manager.connect(websocket, endpoint_id)
+    subscription = Subscription(
+        log_types=frozenset(t.strip() for t in log_types.split(",") if t.strip())
+        if log_types else None,
+        min_severity=min_severity.lower() if min_severity else None,
+        anomalies_only=anomalies_only,
+        batch_ms=batch_ms,
+        batch_max=batch_max
+    )
+
+    await manager.connect(websocket, endpoint_id, subscription)
     try:
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, endpoint_id)
+
+
+# 📊 FAN-OUT HEALTH (queue depth, dropped frames)
+@router.get("/api/ws/stats")
+def websocket_stats():
+    return manager.stats()
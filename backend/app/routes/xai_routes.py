@@ -1,144 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 import json
 
 from app.database import get_db
 from app.models.anomalies import Anomaly
-from app.models.anomaly_logs import AnomalyLog
-from app.models.logs import LogEvent
-from app.services.xai_engine import generate_xai_explanation
-import app.services.xai_engine as xe
+from app.services.xai_engine import xai_service
+from app.services.xai_queue import xai_queue, PRIORITY_BOOST
+from app.services.xai_reports import (
+    linked_log_ids,
+    linked_logs,
+    evidence_hash,
+    xai_payload,
+    assemble_report,
+    anomaly_explanation,
+    latest_report,
+    store_report,
+    report_etag
+)
 
 
 router = APIRouter(prefix="/api/anomalies", tags=["XAI"])
 
 
-@router.get("/{anomaly_id}/xai")
-def get_xai_analysis(anomaly_id: str, db: Session = Depends(get_db)):
+@router.get("/xai/queue")
+def get_xai_queue():
+    return xai_queue.stats()
 
 
+# plain def: the DB work and refresh generation run in the threadpool,
+# never on the event loop that feeds websockets and ingest
+@router.get("/{anomaly_id}/xai")
+def get_xai_analysis(
+    anomaly_id: str,
+    request: Request,
+    response: Response,
+    refresh: bool = False,
+    db: Session = Depends(get_db)
+):
     anomaly = db.query(Anomaly).filter(Anomaly.id == anomaly_id).first()
     if not anomaly:
         raise HTTPException(status_code=404, detail="Anomaly not found")
 
-    log_links = (
-        db.query(AnomalyLog)
-        .filter(AnomalyLog.anomaly_id == anomaly_id)
-        .all()
-    )
-
-    logs = []
-    for link in log_links:
-        log = db.query(LogEvent).filter(LogEvent.id == link.log_id).first()
-        if log:
-            logs.append(log)
-
-    try:
-        explanation = json.loads(anomaly.explanation_json or "{}")
-    except Exception:
-        explanation = {}
-
-    raw_signals = explanation.get("factors") or explanation.get("signals") or []
-    signals = []
-
-    if isinstance(raw_signals, dict):
-        for k, v in raw_signals.items():
-            signals.append({"name": k, "value": v})
-    elif isinstance(raw_signals, list):
-        signals = raw_signals
+    log_ids = linked_log_ids(db, anomaly_id)
+    evidence = evidence_hash(anomaly, log_ids)
+
+    # 1️⃣ serve the stored artifact while its evidence is unchanged
+    stored = latest_report(db, anomaly_id)
+    if stored and stored.evidence_hash == evidence and not refresh:
+        etag = report_etag(stored)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        response.headers["ETag"] = etag
+        return {
+            "anomaly_id": anomaly.id,
+            "version": stored.version,
+            "xai": json.loads(stored.report_json)
+        }
 
-    entities = {
-        "source": anomaly.source,
-        "anomaly_type": anomaly.type
-    }
+    # 2️⃣ not generated yet (or stale): jump the pre-generation queue and
+    #    answer right away from the rule-based explanation
+    if not refresh:
+        xai_queue.enqueue(
+            anomaly.id,
+            (anomaly.risk_score or 0) + PRIORITY_BOOST,
+            (anomaly.endpoint_id, anomaly.type)
+        )
+        return {
+            "anomaly_id": anomaly.id,
+            "version": None,
+            "pending": True,
+            "xai": assemble_report(anomaly, anomaly_explanation(anomaly))
+        }
 
-    baseline = {
-        "detector_reason": explanation.get("summary")
-            or anomaly.description
-            or "Rule-based anomaly detection triggered"
-    }
+    # 3️⃣ explicit refresh: regenerate from the linked evidence, fetched in one query
+    logs = linked_logs(db, log_ids)
 
     try:
-
-        xai_result = generate_xai_explanation(
-            anomaly={
-                "id": anomaly.id,
-                "type": anomaly.type,
-                "risk_score": anomaly.risk_score,
-                "detected_at": anomaly.created_at.isoformat()
-            },
-            entities=entities,
-            signals=signals,
-            logs=[
-                {
-                    "timestamp": log.timestamp.isoformat(),
-                    "source": log.source,
-                    "message": log.message
-                }
-                for log in logs
-            ],
-            baseline=baseline
+        xai_result = xai_service.explain(
+            xai_payload(anomaly, logs),
+            use_cache=not refresh
         )
+    except Exception:
+        xai_result = None
 
-    except Exception as e:
-        xai_result={}
+    report = assemble_report(anomaly, xai_result or {})
 
-    # 🔐 ENFORCE NON-EMPTY SECTIONS (THE FIX)
-    why_flagged = xai_result.get("why_flagged") or [
-        {
-            "signal": "rule_match",
-            "explanation": baseline["detector_reason"],
-            "severity": "high"
-        }
-    ]
-
-    remediation_steps = xai_result.get("remediation_steps")
-    if not remediation_steps:
-        remediation_steps = [
-            {
-                "step": 1,
-                "action": "Review the affected endpoint and associated logs",
-                "reason": "Confirm whether the detected activity is legitimate"
-            },
-            {
-                "step": 2,
-                "action": "Inspect related system or network activity",
-                "reason": "Identify potential spread or misuse"
-            }
-        ]
-
-    preventive_measures = xai_result.get("preventive_measures")
-    if not preventive_measures:
-        preventive_measures = [
-            {
-                "control": "Behavior monitoring",
-                "purpose": "Detect similar anomalies earlier"
-            },
-            {
-                "control": "Security hardening",
-                "purpose": "Reduce impact of future incidents"
-            }
-        ]
+    # provider failures are served but not persisted, so the next view retries
+    if xai_result is None:
+        return {"anomaly_id": anomaly.id, "version": None, "xai": report}
+
+    stored = store_report(db, anomaly.id, evidence, report)
+    response.headers["ETag"] = report_etag(stored)
 
     return {
         "anomaly_id": anomaly.id,
-        "xai": {
-            "summary": xai_result.get(
-                "summary",
-                "Suspicious activity detected by rule-based engine"
-            ),
-            "risk_score": anomaly.risk_score,
-            "confidence": xai_result.get("confidence", 0.6),
-            "why_flagged": why_flagged,
-            "remediation_steps": remediation_steps,
-            "preventive_measures": preventive_measures,
-            "evidence": xai_result.get("evidence", [
-                {
-                    "type": "log",
-                    "source": anomaly.source,
-                    "description": "Rule-based anomaly triggered"
-                }
-            ])
-        }
+        "version": stored.version,
+        "xai": json.loads(stored.report_json)
     }
-
@@ -9,6 +9,7 @@ class LogCreate(BaseModel):
     severity: str = "low"
     message: str
     raw_data: Optional[str] = None
+    timestamp: Optional[datetime] = None   # agent sample time (system_metrics buckets)
     
 
 class LogResponse(LogCreate):
@@ -1,12 +1,20 @@
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from uuid import uuid4
+from collections import OrderedDict
 import json
-from datetime import datetime, timezone, timedelta
+import threading
+from datetime import datetime, timezone
 
 from app.models.anomalies import Anomaly
 from app.models.anomaly_logs import AnomalyLog
 from app.models.logs import LogEvent
-from app.services.xai_engine import generate_xai_explanation
+from app.services.sliding_window import BatchWindows, record_log, count_window
+from app.services.upsert import dialect_insert, supports_on_conflict
+from app.services.anomaly_stats import anomaly_stats
+from app.services.report_service import risk_severity
+from config import ANOMALY_DEDUP_CACHE_SIZE
 
 
 # =====================================================
@@ -51,57 +59,141 @@ GENERIC_THREAT_KEYWORDS = [
 # =====================================================
 # HELPER FUNCTIONS
 # =====================================================
-def parse_raw_data(log: LogEvent) -> dict:
-    if not log.raw_data:
-        return {}
-    if isinstance(log.raw_data, dict):
-        return log.raw_data
-    try:
-        return json.loads(log.raw_data)
-    except Exception:
-        return {}
-
 def get_src_ip(log: LogEvent):
-    data = parse_raw_data(log)
-    return data.get("src_ip") or data.get("ip")
+    return log.src_ip
 
 
 def get_dst_ip(log: LogEvent):
-    data = parse_raw_data(log)
-    return data.get("dst_ip")
-
-
-def recent_logs(db, *, log_type=None, ip=None, minutes=5):
-    since = datetime.now(timezone.utc) - timedelta(minutes=minutes)
-    q = db.query(LogEvent).filter(LogEvent.timestamp >= since)
-
-    if log_type:
-        q = q.filter(LogEvent.log_type == log_type)
-
-    logs = q.all()
+    return log.dst_ip
 
-    if ip:
-        return [l for l in logs if get_src_ip(l) == ip]
 
-    return logs
+def count_recent(db, *, log_type, at, ip=None, minutes=5):
+    # batch replays pass their own exact windows in place of db
+    if isinstance(db, BatchWindows):
+        return db.count(log_type, ip, minutes)
+    # served from in-memory sliding windows fed by detect_anomalies,
+    # counted back from `at` (the timestamp of the log being evaluated)
+    return count_window(log_type, ip, minutes, at)
 
 
+# =====================================================
+# DEDUPLICATION
+# =====================================================
 
-def count_recent(db, **kwargs):
-    return len(recent_logs(db, **kwargs))
-
+class RecentKeys:
+    """Bounded LRU of dedup keys already written to the DB."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                return True
+            return False
+
+    def add(self, key):
+        with self._lock:
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+            if len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+
+
+recent_dedup_keys = RecentKeys(ANOMALY_DEDUP_CACHE_SIZE)
+
+
+def dedup_key(rule_id: str, log: LogEvent, window: int | None = None) -> str:
+    # windowed rules fire once per entity per tumbling window,
+    # everything else once per triggering log
+    if not window:
+        return f"{rule_id}|log:{log.id}"
+
+    ts = log.timestamp
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    window_start = int(ts.timestamp()) // window * window
+    entity = log.src_ip or log.endpoint_id
+    return f"{rule_id}|{entity}|{window_start}"
+
+
+def reserve_anomaly(db: Session, values: dict) -> bool:
+    """
+    INSERT the anomaly row unless its dedup_key already exists.
+    Returns False when another row (or worker) got there first.
+    """
+    if supports_on_conflict(db.bind):
+        stmt = (
+            dialect_insert(db.bind)(Anomaly)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=["dedup_key"])
+            .returning(Anomaly.id)
+        )
+        return db.execute(stmt).first() is not None
 
-def anomaly_exists(db, rule_id, log_id):
-    return db.query(AnomalyLog).join(Anomaly).filter(
-        AnomalyLog.log_id == log_id,
-        Anomaly.explanation_json.contains(rule_id)
-    ).first() is not None
+    try:
+        with db.begin_nested():
+            db.execute(insert(Anomaly).values(**values))
+        return True
+    except IntegrityError:
+        return False
 
 
 # =====================================================
 # ANOMALY CREATION
 # =====================================================
 
+def rule_based_explanation(log: LogEvent, signals: dict) -> dict:
+    return {
+        "summary": "Suspicious activity detected by rule-based engine",
+        "confidence": 0.7,
+
+        "why_flagged": [
+            {
+                "signal": k,
+                "explanation": str(v),
+                "severity": "high"
+            }
+            for k, v in signals.items()
+        ],
+
+        "remediation_steps": [
+            {
+                "step": 1,
+                "action": "Review the affected endpoint and verify the activity",
+                "reason": "Confirm whether the detected behavior is authorized"
+            },
+            {
+                "step": 2,
+                "action": "Inspect related logs and network connections",
+                "reason": "Identify potential lateral movement or misuse"
+            }
+        ],
+
+        "preventive_measures": [
+            {
+                "control": "Network monitoring",
+                "purpose": "Detect abnormal internal traffic patterns"
+            },
+            {
+                "control": "Least privilege enforcement",
+                "purpose": "Reduce the impact of compromised accounts"
+            }
+        ],
+
+        "evidence": [
+            {
+                "type": "log",
+                "source": log.log_type,
+                "description": "Rule-based anomaly triggered"
+            }
+        ]
+    }
+
+
 def create_anomaly(
     db: Session,
     *,
@@ -110,84 +202,57 @@ def create_anomaly(
     source: str,
     risk_score: int,
     log: LogEvent,
-    signals: dict
+    signals: dict,
+    dedup_window: int | None = None
 ):
-    if anomaly_exists(db, rule_id, log.id):
-        return
+    key = dedup_key(rule_id, log, dedup_window)
+    if key in recent_dedup_keys:
+        return None
 
     anomaly_id = f"anom_{uuid4().hex[:12]}"
     signals["rule_id"] = rule_id
+    explanation = rule_based_explanation(log, signals)
+
+    # 1️⃣ commit the anomaly with the rule-based explanation
+    reserved = reserve_anomaly(db, {
+        "id": anomaly_id,
+        "type": anomaly_type,
+        "status": "active",
+        "risk_score": risk_score,
+        "source": source,
+        "endpoint_id": log.endpoint_id,
+        "rule_id": rule_id,
+        "dedup_key": key,
+        "created_at": datetime.now(timezone.utc),
+        "explanation_json": json.dumps(explanation),
+        "summary": explanation["summary"],
+    })
+    if not reserved:
+        db.rollback()
+        return None
 
-    try:
-        xai = generate_xai_explanation(
-            anomaly_type=anomaly_type,
-            risk_score=risk_score,
-            signals=signals
-        )
-    except Exception:
-        xai = {
-            "summary": "Suspicious activity detected by rule-based engine",
-            "confidence": 0.7,
-
-            "why_flagged": [
-                {
-                    "signal": k,
-                    "explanation": str(v),
-                    "severity": "high"
-                }
-                for k, v in signals.items()
-            ],
-
-            "remediation_steps": [
-                {
-                    "step": 1,
-                    "action": "Review the affected endpoint and verify the activity",
-                    "reason": "Confirm whether the detected behavior is authorized"
-                },
-                {
-                    "step": 2,
-                    "action": "Inspect related logs and network connections",
-                    "reason": "Identify potential lateral movement or misuse"
-                }
-            ],
-
-            "preventive_measures": [
-                {
-                    "control": "Network monitoring",
-                    "purpose": "Detect abnormal internal traffic patterns"
-                },
-                {
-                    "control": "Least privilege enforcement",
-                    "purpose": "Reduce the impact of compromised accounts"
-                }
-            ],
-
-            "evidence": [
-                {
-                    "type": "log",
-                    "source": log.log_type,
-                    "description": "Rule-based anomaly triggered"
-                }
-            ]
-        }
-
-
-    anomaly = Anomaly(
-        id=anomaly_id,
-        type=anomaly_type,
-        status="active",
-        risk_score=risk_score,
-        source=source,
-        created_at=datetime.now(timezone.utc),
-        explanation_json=json.dumps(xai)
-    )
-
-    db.add(anomaly)
     db.add(AnomalyLog(anomaly_id=anomaly_id, log_id=log.id))
     db.commit()
+    # only remember keys that are durably stored
+    recent_dedup_keys.add(key)
+    anomaly_stats.on_created("active", risk_score)
 
     print(f"🚨 [{rule_id}] {anomaly_type} | Risk={risk_score}")
 
+    # 2️⃣ live-feed event: the detection pipeline broadcasts it and
+    # queues the XAI report in the API process, riskiest first
+    return {
+        "kind": "anomaly",
+        "id": anomaly_id,
+        "type": anomaly_type,
+        "source": source,
+        "severity": risk_severity(risk_score),
+        "risk_score": risk_score,
+        "endpoint_id": log.endpoint_id,
+        "log_id": log.id,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
 
 
 RULES = [
@@ -217,9 +282,10 @@ RULES = [
         "type": "brute_force_attempt",
         "log_type": "auth",
         "condition": lambda l, d: count_recent(
-            d, log_type="auth", ip=get_src_ip(l), minutes=2
+            d, log_type="auth", at=l.timestamp, ip=get_src_ip(l), minutes=2
         ) >= 5,
-        "risk": 85
+        "risk": 85,
+        "dedup_window": 120
     },
     {
         "id": "AUTH-003",
@@ -227,8 +293,11 @@ RULES = [
         "log_type": "auth",
         "condition": lambda l, d:
             "success" in l.message.lower() and
-            count_recent(d, log_type="auth", ip=get_src_ip(l), minutes=5) >= 3,
-        "risk": 95
+            count_recent(
+                d, log_type="auth", at=l.timestamp, ip=get_src_ip(l), minutes=5
+            ) >= 3,
+        "risk": 95,
+        "dedup_window": 300
     },
     {
         "id": "AUTH-004",
@@ -252,15 +321,17 @@ RULES = [
         "type": "connection_flood",
         "log_type": "network",
         "condition": lambda l, d: (
-            parse_raw_data(l).get("src_ip") and
+            l.src_ip and
             count_recent(
                 d,
                 log_type="network",
+                at=l.timestamp,
                 ip=get_src_ip(l),
                 minutes=1
             ) >= 100
         ),
-        "risk": 85
+        "risk": 85,
+        "dedup_window": 60
     },
 
     {
@@ -405,27 +476,25 @@ RULES = [
 #         except Exception as e:
 #             print(f"⚠️ Rule {rule['id']} failed → {e}")
 
-def detect_anomalies(db: Session, log: LogEvent):
+def detect_anomalies(db: Session, log: LogEvent) -> list:
     # 🚫 Metrics are not security events
     if log.log_type == "system_metrics":
-        return
+        return []
 
-    # ✅ Parse raw_data safely
-    try:
-        raw = json.loads(log.raw_data) if log.raw_data else {}
-    except Exception:
-        raw = {}
+    # ✅ Promoted at ingest, no JSON parsing here
+    src_ip = log.src_ip
+    user = log.username
 
-    src_ip = raw.get("src_ip") or raw.get("ip")
-    user = raw.get("user")
+    record_log(log.log_type, src_ip, log.timestamp)
 
+    created = []
     for rule in RULES:
         if rule["log_type"] and rule["log_type"] != log.log_type:
             continue
 
         try:
             if rule["condition"](log, db):
-                create_anomaly(
+                event = create_anomaly(
                     db=db,
                     rule_id=rule["id"],
                     anomaly_type=rule["type"],
@@ -438,7 +507,19 @@ def detect_anomalies(db: Session, log: LogEvent):
                         "user": user,
                         "log_type": log.log_type,
                         "timestamp": log.timestamp.isoformat()
-                    }
+                    },
+                    dedup_window=rule.get("dedup_window")
                 )
+                if event:
+                    created.append(event)
         except Exception as e:
             print(f"⚠️ Rule {rule['id']} failed → {e}")
+
+    return created
+
+
+def detect_anomalies_batch(db: Session, logs) -> list:
+    created = []
+    for log in logs:
+        created.extend(detect_anomalies(db, log))
+    return created
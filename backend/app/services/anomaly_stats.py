@@ -0,0 +1,119 @@
+import threading
+import time
+
+from sqlalchemy import func
+
+from app.models.anomalies import Anomaly
+from config import ANOMALY_STATS_TTL_SECONDS
+
+
+STATUSES = ("active", "investigating", "resolved")
+
+
+# =====================================================
+# ANOMALY STATUS ROLLUP
+# =====================================================
+# Counts per status plus the risk sum, loaded with a single
+# GROUP BY and then kept current in memory as anomalies are
+# created or PATCHed. The TTL forces a resync so writes made
+# by other processes (detection workers, other API workers)
+# show up within a few seconds.
+#
+# The GROUP BY runs outside the lock, so updates made while it
+# runs are logged and replayed onto the fresh counts when they
+# are swapped in; otherwise the reload would drop them.
+# =====================================================
+
+class AnomalyStatsRollup:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._risk_sum = 0
+        self._loaded_at = None
+        # (status, count delta, risk delta) logged while reloads run
+        self._deltas = []
+        self._reloading = 0
+        self._generation = 0
+
+    def _reload(self, db):
+        with self._lock:
+            self._reloading += 1
+            mark = len(self._deltas)
+            generation = self._generation
+
+        try:
+            rows = (
+                db.query(
+                    Anomaly.status,
+                    func.count(Anomaly.id),
+                    func.coalesce(func.sum(Anomaly.risk_score), 0)
+                )
+                .group_by(Anomaly.status)
+                .all()
+            )
+        except Exception:
+            with self._lock:
+                self._finish_reload()
+            raise
+
+        with self._lock:
+            self._counts = {status: count for status, count, _ in rows}
+            self._risk_sum = sum(int(risk) for _, _, risk in rows)
+            for delta in self._deltas[mark:]:
+                self._apply(*delta)
+            # an invalidate() during the query means it may have missed writes
+            if generation == self._generation:
+                self._loaded_at = time.monotonic()
+            self._finish_reload()
+
+    def _finish_reload(self):
+        self._reloading -= 1
+        if not self._reloading:
+            self._deltas = []
+
+    def _apply(self, status: str, count: int, risk: int):
+        self._counts[status] = max(0, self._counts.get(status, 0) + count)
+        self._risk_sum += risk
+
+    def _update(self, *deltas):
+        with self._lock:
+            if self._reloading:
+                self._deltas.extend(deltas)
+            if self._loaded_at is None:
+                return
+            for delta in deltas:
+                self._apply(*delta)
+
+    def _stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.ttl_seconds
+        )
+
+    def snapshot(self, db) -> dict:
+        if self._stale():
+            self._reload(db)
+
+        with self._lock:
+            total = sum(self._counts.values())
+            return {
+                **{s: self._counts.get(s, 0) for s in STATUSES},
+                "avgRisk": round(self._risk_sum / total) if total else 0
+            }
+
+    def on_created(self, status: str, risk_score: int):
+        self._update((status, 1, risk_score or 0))
+
+    def on_status_changed(self, old: str, new: str):
+        if old == new:
+            return
+        self._update((old, -1, 0), (new, 1, 0))
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+            self._generation += 1
+
+
+anomaly_stats = AnomalyStatsRollup(ANOMALY_STATS_TTL_SECONDS)
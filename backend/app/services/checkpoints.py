@@ -0,0 +1,58 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.job_checkpoints import JobCheckpoint
+from app.services.upsert import dialect_insert, supports_on_conflict
+
+
+# =====================================================
+# RESUMABLE BACKGROUND JOBS
+# =====================================================
+# A checkpoint is the last log id a job has fully handled.
+# Callers save it in the same transaction as their own
+# writes, so a crash never skips or double-counts a chunk.
+# Jobs that run in every API process read it through
+# lock_checkpoint, so two workers never fold the same chunk.
+# =====================================================
+
+def load_checkpoint(db: Session, name: str) -> int:
+    row = db.get(JobCheckpoint, name)
+    return row.last_id if row else 0
+
+
+def save_checkpoint(db: Session, name: str, last_id: int):
+    row = db.get(JobCheckpoint, name)
+    if row is None:
+        db.add(JobCheckpoint(name=name, last_id=last_id))
+    else:
+        row.last_id = last_id
+
+
+def lock_checkpoint(db: Session, name: str) -> int:
+    """
+    load_checkpoint, with the row locked until the caller commits
+    or rolls back: SELECT ... FOR UPDATE on Postgres, the write lock
+    taken by the insert on SQLite. A second worker blocks here and
+    then reads the checkpoint the first one saved.
+    """
+    if supports_on_conflict(db.bind):
+        db.execute(
+            dialect_insert(db.bind)(JobCheckpoint)
+            .values(name=name, last_id=0)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+    elif db.get(JobCheckpoint, name) is None:
+        try:
+            with db.begin_nested():
+                db.add(JobCheckpoint(name=name, last_id=0))
+        except IntegrityError:
+            pass
+
+    row = (
+        db.query(JobCheckpoint)
+        .filter(JobCheckpoint.name == name)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+    return row.last_id
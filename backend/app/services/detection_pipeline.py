@@ -0,0 +1,198 @@
+import asyncio
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List
+
+from app.database import SessionLocal, engine
+from app.models.logs import LogEvent
+from app.services.anomaly_detector import detect_anomalies_batch
+from app.services.sliding_window import warm_up
+from app.services.xai_queue import xai_queue
+from app.websocket_manager import manager
+from config import (
+    DETECTION_QUEUE_MAX,
+    DETECTION_WORKER_THREADS,
+    DETECTION_WORKER_PROCESSES,
+    SLIDING_WINDOW_WARMUP
+)
+
+
+# =====================================================
+# WORKER SIDE (runs in a thread or a child process)
+# =====================================================
+
+def warm_up_counters() -> int:
+    if not SLIDING_WINDOW_WARMUP:
+        return 0
+
+    db = SessionLocal()
+    try:
+        return warm_up(db)
+    except Exception as e:
+        print(f"⚠️ Sliding window warm-up failed → {e}")
+        return 0
+    finally:
+        db.close()
+
+
+def _init_worker_process():
+    # connections inherited through fork must not be shared with the parent
+    engine.dispose(close=False)
+
+
+def run_detection(log_ids: List[int]) -> List[dict]:
+    """Returns the live-feed events of the anomalies created."""
+    # create_anomaly commits per anomaly; keep the batch's LogEvents
+    # loaded across those commits instead of re-SELECTing each one
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        logs = (
+            db.query(LogEvent)
+            .filter(LogEvent.id.in_(log_ids))
+            .order_by(LogEvent.id)
+            .all()
+        )
+        return detect_anomalies_batch(db, logs)
+    finally:
+        db.close()
+
+
+# =====================================================
+# PIPELINE (owned by the API event loop)
+# =====================================================
+
+class DetectionPipeline:
+    def __init__(self, maxsize: int, threads: int, processes: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.threads = threads
+        self.processes = processes
+        self.executors = []
+        self.tasks: List[asyncio.Task] = []
+
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    async def start(self):
+        if self.tasks:
+            return
+
+        if self.processes > 0:
+            # one single-process executor per shard: every log of a given
+            # log_type lands in the same process, so its sliding-window
+            # counters see the full stream for that type
+            self.executors = [
+                ProcessPoolExecutor(
+                    max_workers=1,
+                    initializer=_init_worker_process
+                )
+                for _ in range(self.processes)
+            ]
+            workers = self.processes
+        else:
+            self.executors = [
+                ThreadPoolExecutor(
+                    max_workers=self.threads,
+                    thread_name_prefix="detection"
+                )
+            ]
+            workers = self.threads
+
+        # every executor's counters are warm before the first batch is
+        # consumed, so no queued log is counted by both warm-up and detection
+        loop = asyncio.get_running_loop()
+        loaded = await asyncio.gather(*(
+            loop.run_in_executor(executor, warm_up_counters)
+            for executor in self.executors
+        ))
+        print(f"🪟 Sliding windows warmed with {max(loaded)} logs")
+
+        self.tasks = [
+            asyncio.create_task(self._worker()) for _ in range(workers)
+        ]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+        for executor in self.executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.executors = []
+
+    def _shard(self, log_type: str) -> int:
+        if self.processes <= 0:
+            return 0
+        return zlib.crc32((log_type or "").encode()) % self.processes
+
+    def enqueue(self, logs: List[LogEvent]) -> bool:
+        shards = {}
+        for log in logs:
+            shards.setdefault(self._shard(log.log_type), []).append(log.id)
+
+        ok = True
+        now = time.monotonic()
+        for shard, log_ids in shards.items():
+            try:
+                self.queue.put_nowait((now, shard, log_ids))
+                self.enqueued += len(log_ids)
+            except asyncio.QueueFull:
+                self.dropped += len(log_ids)
+                print(f"⚠️ Detection queue full, dropped {len(log_ids)} logs")
+                ok = False
+
+        return ok
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            enqueued_at, shard, log_ids = await self.queue.get()
+            try:
+                created = await loop.run_in_executor(
+                    self.executors[shard], run_detection, log_ids
+                )
+                self.processed += len(log_ids)
+                for event in created:
+                    # one XAI queue + token budget per API process,
+                    # never one per detection child
+                    xai_queue.enqueue(
+                        event["id"],
+                        event["risk_score"],
+                        (event["endpoint_id"], event["type"])
+                    )
+                    await manager.broadcast(event["endpoint_id"], event)
+            except Exception as e:
+                self.failed += len(log_ids)
+                print(f"❌ Detection batch failed → {e}")
+            finally:
+                lag = (time.monotonic() - enqueued_at) * 1000
+                self.last_lag_ms = lag
+                self.max_lag_ms = max(self.max_lag_ms, lag)
+                self.queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_max": self.queue.maxsize,
+            "workers": len(self.tasks),
+            "mode": "process" if self.processes > 0 else "thread",
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2),
+        }
+
+
+pipeline = DetectionPipeline(
+    maxsize=DETECTION_QUEUE_MAX,
+    threads=DETECTION_WORKER_THREADS,
+    processes=DETECTION_WORKER_PROCESSES
+)
@@ -0,0 +1,143 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.logs import LogEvent
+from app.schemas.logs import LogCreate
+
+
+# =====================================================
+# ROW BUILDING
+# =====================================================
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_str(value) -> Optional[str]:
+    return str(value) if value not in (None, "") else None
+
+
+def extract_fields(raw_data: Optional[str]) -> Dict[str, Any]:
+    """
+    Parse raw_data once and pull out the fields rules and queries
+    filter on. Unparseable payloads simply yield empty columns.
+    """
+    try:
+        data = json.loads(raw_data) if raw_data else None
+    except (TypeError, ValueError):
+        data = None
+
+    if not isinstance(data, dict):
+        return {
+            "src_ip": None,
+            "dst_ip": None,
+            "username": None,
+            "event_id": None,
+            "raw_json": None,
+        }
+
+    return {
+        "src_ip": _as_str(data.get("src_ip") or data.get("ip")),
+        "dst_ip": _as_str(data.get("dst_ip")),
+        "username": _as_str(data.get("user")),
+        "event_id": _as_int(data.get("event_id")),
+        "raw_json": data,
+    }
+
+
+def build_log_row(log: LogCreate, now: Optional[datetime] = None) -> Dict[str, Any]:
+    return {
+        "endpoint_id": log.endpoint_id,
+        "log_type": log.log_type,
+        "severity": log.severity,
+        "message": log.message,
+        "source": log.source,
+        "raw_data": log.raw_data,
+        "timestamp": now or datetime.now(timezone.utc),
+        **extract_fields(log.raw_data),
+    }
+
+
+def parse_ndjson(body: bytes) -> List[Any]:
+    """
+    One item per non-blank line. A line that is not valid JSON
+    stays in place as its ValueError, so validate_batch reports
+    it at its own index instead of rejecting the whole batch.
+    """
+    items = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError as e:
+            items.append(e)
+    return items
+
+
+def validate_batch(items: List[Any]) -> Tuple[List[Tuple[int, LogCreate]], List[Dict[str, Any]]]:
+    """
+    Validate every item on its own so one bad event does not
+    reject the whole batch. Returns (valid, errors) keyed by index.
+    """
+    valid = []
+    errors = []
+
+    for index, item in enumerate(items):
+        if isinstance(item, ValueError):
+            errors.append({"index": index, "error": f"malformed JSON: {item}"})
+            continue
+        try:
+            valid.append((index, LogCreate.model_validate(item)))
+        except ValidationError as e:
+            errors.append({
+                "index": index,
+                "error": "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}"
+                    for err in e.errors()
+                )
+            })
+
+    return valid, errors
+
+
+# =====================================================
+# BULK INSERT
+# =====================================================
+
+def insert_logs(db: Session, rows: List[Dict[str, Any]]) -> List[LogEvent]:
+    """
+    Insert all rows with one multi-row INSERT ... RETURNING and
+    return detached LogEvent objects carrying their new ids
+    (caller commits).
+    """
+    if not rows:
+        return []
+
+    result = db.execute(
+        insert(LogEvent).returning(LogEvent.id, sort_by_parameter_order=True),
+        rows
+    )
+    ids = [r.id for r in result]
+
+    return [LogEvent(id=log_id, **row) for log_id, row in zip(ids, rows)]
+
+
+def broadcast_payload(log: LogEvent) -> Dict[str, Any]:
+    return {
+        "kind": "log",
+        "id": log.id,
+        "type": log.log_type,
+        "severity": log.severity,
+        "message": log.message,
+        "source": log.source,
+        "timestamp": log.timestamp.isoformat()
+    }
@@ -0,0 +1,325 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.log_rollups import LogRollup
+from app.models.logs import LogEvent
+from app.services.checkpoints import load_checkpoint, lock_checkpoint, save_checkpoint
+from app.services.upsert import dialect_insert, supports_on_conflict
+from config import (
+    ROLLUP_INTERVAL_SECONDS,
+    ROLLUP_LAG_SECONDS,
+    ROLLUP_CHUNK_SIZE,
+    ROLLUP_MINUTE_RETENTION_HOURS
+)
+
+
+CHECKPOINT = "log_rollups"
+
+RESOLUTIONS = {"1m": 60, "1h": 3600}
+DIMENSIONS = ("endpoint_id", "log_type", "source", "severity")
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def floor_bucket(ts: datetime, seconds: int) -> datetime:
+    epoch = int(_utc(ts).timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, timezone.utc)
+
+
+def ceil_bucket(ts: datetime, seconds: int) -> datetime:
+    floored = floor_bucket(ts, seconds)
+    return floored if floored == _utc(ts) else floored + timedelta(seconds=seconds)
+
+
+# =====================================================
+# COMPACTION (raw logs → per-minute / per-hour counts)
+# =====================================================
+
+def _upsert_counts(db: Session, counts: Counter):
+    rows = [
+        {
+            "resolution": resolution,
+            "bucket": bucket,
+            "endpoint_id": endpoint_id,
+            "log_type": log_type,
+            "source": source,
+            "severity": severity,
+            "count": n,
+        }
+        for (resolution, bucket, endpoint_id, log_type, source, severity), n
+        in counts.items()
+    ]
+    if not rows:
+        return
+
+    bind = db.get_bind()
+    if supports_on_conflict(bind):
+        stmt = dialect_insert(bind)(LogRollup)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["resolution", "bucket", *DIMENSIONS],
+                set_={"count": LogRollup.count + stmt.excluded.count}
+            ),
+            rows
+        )
+        return
+
+    for row in rows:
+        existing = (
+            db.query(LogRollup)
+            .filter_by(**{k: v for k, v in row.items() if k != "count"})
+            .first()
+        )
+        if existing:
+            existing.count += row["count"]
+        else:
+            db.add(LogRollup(**row))
+
+
+def compact(db: Session, chunk_size: int = ROLLUP_CHUNK_SIZE) -> int:
+    """
+    Fold the next chunk of logs past the checkpoint into the rollup
+    table. Logs younger than ROLLUP_LAG_SECONDS are left for the next
+    pass so rows from slower concurrent inserts are not skipped.
+    Returns the number of logs folded in.
+    """
+    # every API process runs a compactor: hold the checkpoint row
+    # until commit so the same logs are never counted twice
+    last_id = lock_checkpoint(db, CHECKPOINT)
+    horizon = datetime.now(timezone.utc) - timedelta(seconds=ROLLUP_LAG_SECONDS)
+
+    rows = (
+        db.query(
+            LogEvent.id,
+            LogEvent.timestamp,
+            LogEvent.endpoint_id,
+            LogEvent.log_type,
+            LogEvent.source,
+            LogEvent.severity
+        )
+        .filter(LogEvent.id > last_id)
+        .order_by(LogEvent.id)
+        .limit(chunk_size)
+        .all()
+    )
+
+    counts = Counter()
+    folded = 0
+    for log_id, ts, endpoint_id, log_type, source, severity in rows:
+        if _utc(ts) > horizon:
+            break
+
+        dims = (endpoint_id or "", log_type or "", source or "", severity or "")
+        for resolution, seconds in RESOLUTIONS.items():
+            counts[(resolution, floor_bucket(ts, seconds), *dims)] += 1
+
+        last_id = log_id
+        folded += 1
+
+    if folded:
+        _upsert_counts(db, counts)
+        save_checkpoint(db, CHECKPOINT, last_id)
+    db.commit()
+
+    return folded
+
+
+def compact_all(db: Session) -> int:
+    total = 0
+    while True:
+        folded = compact(db)
+        total += folded
+        if folded < ROLLUP_CHUNK_SIZE:
+            return total
+
+
+def minute_cutoff(now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.now(timezone.utc)
+    return floor_bucket(now - timedelta(hours=ROLLUP_MINUTE_RETENTION_HOURS), 3600)
+
+
+def prune_minutes(db: Session) -> int:
+    # older ranges are answered from the 1h rows
+    deleted = (
+        db.query(LogRollup)
+        .filter(LogRollup.resolution == "1m", LogRollup.bucket < minute_cutoff())
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def compactor_worker():
+    while True:
+        db = SessionLocal()
+        try:
+            folded = compact_all(db)
+            if folded:
+                print(f"📊 Rolled up {folded} logs")
+            prune_minutes(db)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Rollup compaction failed → {e}")
+        finally:
+            db.close()
+
+        time.sleep(ROLLUP_INTERVAL_SECONDS)
+
+
+def start_compactor():
+    threading.Thread(
+        target=compactor_worker,
+        name="log-rollups",
+        daemon=True
+    ).start()
+
+
+# =====================================================
+# QUERIES
+# =====================================================
+
+def _range_filter(since: Optional[datetime], until: datetime):
+    """
+    Cover [since, until) with whole hours from the 1h rows and the
+    ragged edges from the 1m rows, so no bucket is counted twice.
+    """
+    until_m = floor_bucket(until, 60) + timedelta(minutes=1)
+    since_m = floor_bucket(since, 60) if since else None
+    if since_m and since_m < minute_cutoff():
+        # minute rows are pruned this far back: start on the hour
+        since_m = floor_bucket(since_m, 3600)
+    h0 = ceil_bucket(since_m, 3600) if since_m else None
+    h1 = floor_bucket(until_m, 3600)
+
+    minute = LogRollup.resolution == "1m"
+    hour = LogRollup.resolution == "1h"
+
+    if h0 is not None and h0 >= h1:
+        return and_(minute, LogRollup.bucket >= since_m, LogRollup.bucket < until_m)
+
+    parts = [
+        and_(hour, LogRollup.bucket < h1, *([LogRollup.bucket >= h0] if h0 else [])),
+        and_(minute, LogRollup.bucket >= h1, LogRollup.bucket < until_m),
+    ]
+    if h0 is not None:
+        parts.append(
+            and_(minute, LogRollup.bucket >= since_m, LogRollup.bucket < h0)
+        )
+    return or_(*parts)
+
+
+def _tail(db: Session, since: Optional[datetime], filters: Dict[str, str]):
+    # logs not folded in yet: at most a few compactor intervals' worth
+    query = db.query(LogEvent).filter(
+        LogEvent.id > load_checkpoint(db, CHECKPOINT)
+    )
+    if since:
+        query = query.filter(LogEvent.timestamp >= since)
+    for dim, value in filters.items():
+        query = query.filter(getattr(LogEvent, dim) == value)
+    return query
+
+
+def _check_dimension(dimension: Optional[str]):
+    if dimension is not None and dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown rollup dimension: {dimension}")
+
+
+def total(
+    db: Session,
+    since: Optional[datetime],
+    until: Optional[datetime] = None,
+    filters: Optional[Dict[str, str]] = None
+) -> int:
+    return breakdown(db, None, since, until, filters).get("", 0)
+
+
+def breakdown(
+    db: Session,
+    dimension: Optional[str],
+    since: Optional[datetime],
+    until: Optional[datetime] = None,
+    filters: Optional[Dict[str, str]] = None
+) -> Dict[str, int]:
+    """Log counts in [since, until) grouped by one dimension."""
+    _check_dimension(dimension)
+    filters = filters or {}
+    until = until or datetime.now(timezone.utc)
+
+    rollup_keys = [getattr(LogRollup, dimension)] if dimension else []
+    query = (
+        db.query(*rollup_keys, func.sum(LogRollup.count))
+        .filter(_range_filter(since, until))
+        .filter(*[getattr(LogRollup, k) == v for k, v in filters.items()])
+        .group_by(*rollup_keys)
+    )
+
+    log_keys = [getattr(LogEvent, dimension)] if dimension else []
+    tail = (
+        _tail(db, since, filters)
+        .filter(LogEvent.timestamp < until)
+        .with_entities(*log_keys, func.count(LogEvent.id))
+        .group_by(*log_keys)
+    )
+
+    result = Counter()
+    for row in [*query.all(), *tail.all()]:
+        if row[-1]:
+            result[(row[0] or "") if dimension else ""] += int(row[-1])
+
+    return dict(result)
+
+
+def series(
+    db: Session,
+    resolution: str,
+    since: Optional[datetime],
+    dimension: Optional[str] = None,
+    filters: Optional[Dict[str, str]] = None
+) -> List[dict]:
+    """Bucketed counts from `since` to now, optionally split by a dimension."""
+    _check_dimension(dimension)
+    seconds = RESOLUTIONS[resolution]
+    filters = filters or {}
+    if resolution == "1m" and (since is None or since < minute_cutoff()):
+        since = minute_cutoff()
+
+    columns = [LogRollup.bucket]
+    if dimension:
+        columns.append(getattr(LogRollup, dimension))
+
+    query = (
+        db.query(*columns, func.sum(LogRollup.count))
+        .filter(LogRollup.resolution == resolution)
+        .filter(*[getattr(LogRollup, k) == v for k, v in filters.items()])
+    )
+    if since:
+        query = query.filter(LogRollup.bucket >= floor_bucket(since, seconds))
+    query = query.group_by(*columns)
+
+    counts = Counter()
+    for row in query.all():
+        counts[(_utc(row[0]), *row[1:-1])] += int(row[-1])
+
+    tail_columns = [LogEvent.timestamp]
+    if dimension:
+        tail_columns.append(getattr(LogEvent, dimension))
+    for row in _tail(db, since, filters).with_entities(*tail_columns):
+        counts[(floor_bucket(row[0], seconds), *[(v or "") for v in row[1:]])] += 1
+
+    points = []
+    for key in sorted(counts):
+        point = {"bucket": key[0].isoformat(), "count": counts[key]}
+        if dimension:
+            point[dimension] = key[1]
+        points.append(point)
+    return points
@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+
+# =====================================================
+# KEYSET (SEEK) PAGINATION
+# =====================================================
+# Cursors are opaque base64 tokens of [timestamp, id] taken
+# from the last row of a page. Pages are ordered newest first,
+# so the next page is everything strictly "before" that pair.
+# =====================================================
+
+MAX_PAGE_SIZE = 5000
+
+
+def encode_cursor(ts: datetime, row_id: Any) -> str:
+    raw = json.dumps([ts.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, Any]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(ts), row_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def before_cursor(ts_column, id_column, cursor: Tuple[datetime, Any]):
+    ts, row_id = cursor
+    return or_(
+        ts_column < ts,
+        and_(ts_column == ts, id_column < row_id)
+    )
+
+
+def after_cursor(ts_column, id_column, cursor: Tuple[datetime, Any]):
+    # oldest-first walks (batch replays) resume strictly after the pair
+    ts, row_id = cursor
+    return or_(
+        ts_column > ts,
+        and_(ts_column == ts, id_column > row_id)
+    )
+
+
+def after_cursor(ts_column, id_column, cursor: Tuple[datetime, Any]):
+    # oldest-first walks (batch replays) resume strictly after the pair
+    ts, row_id = cursor
+    return or_(
+        ts_column > ts,
+        and_(ts_column == ts, id_column > row_id)
+    )
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
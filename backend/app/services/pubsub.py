@@ -0,0 +1,400 @@
+import abc
+import asyncio
+import json
+from typing import Callable, Dict, List, Optional
+
+from config import (
+    PUBSUB_BACKEND,
+    PUBSUB_SOCKET_HOST,
+    PUBSUB_SOCKET_PORT,
+    PUBSUB_SOCKET_AUTOSTART,
+    PUBSUB_REDIS_URL,
+    PUBSUB_CHANNEL,
+    PUBSUB_QUEUE_MAX,
+    PUBSUB_SEND_TIMEOUT_SECONDS
+)
+
+
+# =====================================================
+# LIVE-FEED PUB/SUB BACKENDS
+# =====================================================
+# WebSocketManager.broadcast publishes through one of these.
+# Each backend hands every message to deliver(endpoint_id, items)
+# in every API worker, so a log ingested by worker A reaches a
+# dashboard connected to worker B.
+#   memory  single process, delivered in place (default)
+#   socket  newline-delimited JSON relayed by a small TCP broker;
+#           the first worker to start hosts it, or run
+#           `python -m utils.pubsub_broker` on its own
+#   redis   Redis PUBLISH / SUBSCRIBE (needs the redis package)
+#
+# publish() never waits on the network: messages go to a bounded
+# outbox drained by a sender task, and the broker gives every
+# client its own bounded queue. A stalled peer fills only its
+# own queue; the broker then disconnects it, and a full outbox
+# delivers to local dashboards only.
+# =====================================================
+
+Deliver = Callable[[str, List[dict]], None]
+
+# stream reader line limit: batches of events can be large
+LINE_LIMIT = 1 << 24
+
+
+def encode_message(endpoint_id: str, items: List[dict]) -> bytes:
+    return json.dumps({"endpoint_id": endpoint_id, "items": items}).encode() + b"\n"
+
+
+class InProcessBackend:
+    name = "memory"
+
+    def __init__(self, deliver: Deliver):
+        self.deliver = deliver
+        self.published = 0
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, endpoint_id: str, items: List[dict]):
+        self.published += len(items)
+        self.deliver(endpoint_id, items)
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "published": self.published}
+
+
+class _RemoteBackend(InProcessBackend, abc.ABC):
+    """
+    Shared bookkeeping for brokered backends. A worker's own
+    messages come back through the broker like everyone else's,
+    so nothing is delivered locally on publish unless the broker
+    is unreachable or the outbox is full (then local dashboards
+    still get the event).
+    """
+
+    def __init__(self, deliver: Deliver, queue_max: int = PUBSUB_QUEUE_MAX):
+        super().__init__(deliver)
+        self.received = 0
+        self.publish_failures = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.connected = False
+        self._outbox: asyncio.Queue = asyncio.Queue(queue_max)
+        self._task: Optional[asyncio.Task] = None
+        self._sender: Optional[asyncio.Task] = None
+
+    def _receive(self, raw: bytes):
+        try:
+            message = json.loads(raw)
+            self.received += len(message["items"])
+            self.deliver(message["endpoint_id"], message["items"])
+        except Exception as e:
+            print(f"⚠️ Bad pub/sub message → {e!r}")
+
+    def _fallback(self, endpoint_id: str, items: List[dict], error: Exception):
+        self.publish_failures += 1
+        print(f"⚠️ {self.name} pub/sub publish failed, delivering locally → {error!r}")
+        self.deliver(endpoint_id, items)
+
+    async def publish(self, endpoint_id: str, items: List[dict]):
+        self.published += len(items)
+        if not self.connected:
+            self._fallback(endpoint_id, items, ConnectionError("not connected"))
+            return
+        try:
+            self._outbox.put_nowait((endpoint_id, items))
+        except asyncio.QueueFull:
+            self.dropped += len(items)
+            self.deliver(endpoint_id, items)
+
+    @abc.abstractmethod
+    async def _send(self, message: bytes):
+        ...
+
+    async def _send_outbox(self):
+        while True:
+            endpoint_id, items = await self._outbox.get()
+            try:
+                await self._send(encode_message(endpoint_id, items))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._fallback(endpoint_id, items, e)
+
+    def _start_sender(self):
+        self._sender = asyncio.create_task(self._send_outbox())
+
+    async def stop(self):
+        for task in (self._sender, self._task):
+            if task:
+                task.cancel()
+        await asyncio.gather(
+            *(t for t in (self._sender, self._task) if t),
+            return_exceptions=True
+        )
+        self._sender = self._task = None
+        self.connected = False
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "connected": self.connected,
+            "published": self.published,
+            "received": self.received,
+            "queued": self._outbox.qsize(),
+            "dropped": self.dropped,
+            "publish_failures": self.publish_failures,
+            "reconnects": self.reconnects,
+        }
+
+
+# ---------------- local socket broker ----------------
+
+class SocketBroker:
+    """
+    Relays every line from any client to all clients, through a
+    bounded queue and writer task per client. A client whose
+    queue overflows, or whose socket stalls past the send
+    timeout, is disconnected (its backend reconnects).
+    """
+
+    def __init__(
+        self,
+        queue_max: int = PUBSUB_QUEUE_MAX,
+        send_timeout: float = PUBSUB_SEND_TIMEOUT_SECONDS
+    ):
+        self.queue_max = queue_max
+        self.send_timeout = send_timeout
+        self.clients: Dict[asyncio.StreamWriter, asyncio.Queue] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.relayed = 0
+        self.disconnected = 0
+
+    async def start(self, host: str, port: int):
+        self.server = await asyncio.start_server(self._client, host, port, limit=LINE_LIMIT)
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            for writer in list(self.clients):
+                writer.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def _drop(self, writer: asyncio.StreamWriter, reason: str):
+        if self.clients.pop(writer, None) is not None:
+            self.disconnected += 1
+            print(f"⚠️ Pub/sub broker dropped a lagging client → {reason}")
+        writer.close()
+
+    def _relay(self, line: bytes):
+        self.relayed += 1
+        for writer, queue in list(self.clients.items()):
+            try:
+                queue.put_nowait(line)
+            except asyncio.QueueFull:
+                self._drop(writer, f"{queue.qsize()} messages queued")
+
+    async def _writer(self, writer: asyncio.StreamWriter, queue: asyncio.Queue):
+        try:
+            while True:
+                writer.write(await queue.get())
+                while not queue.empty():
+                    writer.write(queue.get_nowait())
+                await asyncio.wait_for(writer.drain(), self.send_timeout)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self._drop(writer, repr(e))
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        queue: asyncio.Queue = asyncio.Queue(self.queue_max)
+        self.clients[writer] = queue
+        sender = asyncio.create_task(self._writer(writer, queue))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._relay(line)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # the client went away, or the broker is shutting down
+            pass
+        finally:
+            self.clients.pop(writer, None)
+            sender.cancel()
+            writer.close()
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self.clients),
+            "relayed": self.relayed,
+            "disconnected": self.disconnected,
+        }
+
+
+class SocketBackend(_RemoteBackend):
+    name = "socket"
+
+    def __init__(
+        self,
+        deliver: Deliver,
+        host: str = PUBSUB_SOCKET_HOST,
+        port: int = PUBSUB_SOCKET_PORT,
+        autostart: bool = PUBSUB_SOCKET_AUTOSTART,
+        send_timeout: float = PUBSUB_SEND_TIMEOUT_SECONDS
+    ):
+        super().__init__(deliver)
+        self.host = host
+        self.port = port
+        self.autostart = autostart
+        self.send_timeout = send_timeout
+        self.broker: Optional[SocketBroker] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+
+    async def _connect(self):
+        try:
+            return await asyncio.open_connection(self.host, self.port, limit=LINE_LIMIT)
+        except OSError:
+            if not self.autostart or self.broker:
+                raise
+
+        # nobody is listening yet: host the broker in this worker;
+        # losing the bind race just means another worker won it
+        broker = SocketBroker()
+        try:
+            await broker.start(self.host, self.port)
+            self.broker = broker
+            print(f"📡 Pub/sub broker listening on {self.host}:{self.port}")
+        except OSError:
+            pass
+        return await asyncio.open_connection(self.host, self.port, limit=LINE_LIMIT)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        self._start_sender()
+        try:
+            await asyncio.wait_for(self._connected.wait(), 5)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Pub/sub broker {self.host}:{self.port} unreachable, retrying in background")
+
+    async def _run(self):
+        delay = 0.5
+        while True:
+            try:
+                reader, writer = await self._connect()
+                self._writer = writer
+                self.connected = True
+                self._connected.set()
+                delay = 0.5
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    self._receive(line)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Pub/sub connection lost → {e!r}")
+            finally:
+                self.connected = False
+                self._connected.clear()
+                if self._writer:
+                    self._writer.close()
+                    self._writer = None
+
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 10)
+
+    async def _send(self, message: bytes):
+        writer = self._writer
+        if writer is None:
+            raise ConnectionError("not connected")
+        writer.write(message)
+        try:
+            await asyncio.wait_for(writer.drain(), self.send_timeout)
+        except asyncio.TimeoutError:
+            # the broker stopped reading: reconnect rather than queue forever
+            writer.close()
+            raise
+
+    async def stop(self):
+        await super().stop()
+        if self.broker:
+            await self.broker.stop()
+            self.broker = None
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        if self.broker:
+            stats["broker"] = self.broker.stats()
+        return stats
+
+
+# ---------------- Redis ----------------
+
+class RedisBackend(_RemoteBackend):
+    name = "redis"
+
+    def __init__(self, deliver: Deliver, url: str = PUBSUB_REDIS_URL, channel: str = PUBSUB_CHANNEL):
+        super().__init__(deliver)
+        self.url = url
+        self.channel = channel
+        self._client = None
+
+    async def start(self):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(self.url)
+        self._task = asyncio.create_task(self._run())
+        self._start_sender()
+
+    async def _run(self):
+        delay = 0.5
+        while True:
+            pubsub = self._client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self.connected = True
+                delay = 0.5
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._receive(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Redis pub/sub connection lost → {e!r}")
+            finally:
+                self.connected = False
+                await pubsub.aclose()
+
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 10)
+
+    async def stop(self):
+        await super().stop()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _send(self, message: bytes):
+        await self._client.publish(self.channel, message)
+
+
+BACKENDS = {
+    "memory": InProcessBackend,
+    "socket": SocketBackend,
+    "redis": RedisBackend,
+}
+
+
+def make_backend(deliver: Deliver, name: str = PUBSUB_BACKEND) -> InProcessBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PUBSUB_BACKEND {name!r} (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[name](deliver)
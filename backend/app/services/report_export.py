@@ -0,0 +1,178 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional
+
+from app.database import SessionLocal
+from app.models.logs import LogEvent
+from app.models.anomalies import Anomaly
+
+
+# =====================================================
+# TIME RANGES
+# =====================================================
+
+RANGES = {
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+
+EXPORT_BATCH = 2000
+
+
+def range_start(range: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    delta = RANGES.get(range)
+    if delta is None:
+        return None
+    return (now or datetime.now(timezone.utc)) - delta
+
+
+# =====================================================
+# STREAMED ROWS (server-side cursor, one batch in memory)
+# =====================================================
+
+LOG_COLUMNS = ("timestamp", "source", "severity", "message")
+ANOMALY_COLUMNS = ("id", "type", "status", "risk_score", "source", "created_at")
+
+
+def _iter_logs(db, since: Optional[datetime]) -> Iterator[dict]:
+    query = db.query(
+        LogEvent.timestamp, LogEvent.source, LogEvent.severity, LogEvent.message
+    )
+    if since:
+        query = query.filter(LogEvent.timestamp >= since)
+
+    for row in query.order_by(LogEvent.timestamp).yield_per(EXPORT_BATCH):
+        yield {
+            "timestamp": row.timestamp.isoformat(),
+            "source": row.source,
+            "severity": row.severity,
+            "message": row.message,
+        }
+
+
+def _iter_anomalies(db, since: Optional[datetime]) -> Iterator[dict]:
+    query = db.query(
+        Anomaly.id, Anomaly.type, Anomaly.status,
+        Anomaly.risk_score, Anomaly.source, Anomaly.created_at
+    )
+    if since:
+        query = query.filter(Anomaly.created_at >= since)
+
+    for row in query.order_by(Anomaly.created_at).yield_per(EXPORT_BATCH):
+        yield {
+            "id": row.id,
+            "type": row.type,
+            "status": row.status,
+            "riskScore": row.risk_score,
+            "source": row.source,
+            "timestamp": row.created_at.isoformat(),
+        }
+
+
+# =====================================================
+# ENCODERS
+# =====================================================
+# Each generator opens its own session: FastAPI closes the
+# request-scoped one before a StreamingResponse body is sent.
+# =====================================================
+
+def stream_logs_csv(range: str) -> Iterator[str]:
+    since = range_start(range)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(LOG_COLUMNS)
+
+    db = SessionLocal()
+    try:
+        for count, log in enumerate(_iter_logs(db, since), start=1):
+            writer.writerow([log[c] for c in LOG_COLUMNS])
+            if count % EXPORT_BATCH == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+def _report_json_parts(range: str) -> Iterator[str]:
+    since = range_start(range)
+    header = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "range": range,
+    }
+
+    db = SessionLocal()
+    try:
+        # {"generated_at": ..., "range": ..., "logs": [...], "anomalies": [...]}
+        yield json.dumps(header)[:-1] + ', "logs": ['
+        for i, log in enumerate(_iter_logs(db, since)):
+            yield ("," if i else "") + json.dumps(log)
+        yield '], "anomalies": ['
+        for i, anomaly in enumerate(_iter_anomalies(db, since)):
+            yield ("," if i else "") + json.dumps(anomaly)
+        yield "]}"
+    finally:
+        db.close()
+
+
+def _report_ndjson_parts(range: str) -> Iterator[str]:
+    since = range_start(range)
+
+    db = SessionLocal()
+    try:
+        for log in _iter_logs(db, since):
+            yield json.dumps({"kind": "log", **log}) + "\n"
+        for anomaly in _iter_anomalies(db, since):
+            yield json.dumps({"kind": "anomaly", **anomaly}) + "\n"
+    finally:
+        db.close()
+
+
+def batched(parts: Iterable[str], size: int = EXPORT_BATCH) -> Iterator[str]:
+    """
+    Join `size` parts per chunk. StreamingResponse runs sync
+    generators in the threadpool, one hop per yielded chunk.
+    """
+    batch = []
+    try:
+        for part in parts:
+            batch.append(part)
+            if len(batch) >= size:
+                yield "".join(batch)
+                batch = []
+        if batch:
+            yield "".join(batch)
+    finally:
+        close = getattr(parts, "close", None)
+        if close:
+            close()   # release the generator's DB session early
+
+
+def stream_report_json(range: str) -> Iterator[str]:
+    return batched(_report_json_parts(range))
+
+
+def stream_report_ndjson(range: str) -> Iterator[str]:
+    return batched(_report_ndjson_parts(range))
+
+
+def gzip_stream(chunks: Iterable[str], flush_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 = gzip container
+    pending = 0
+
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        pending += len(data)
+        out = compressor.compress(data)
+        if pending >= flush_bytes:
+            out += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+
+    yield compressor.flush()
@@ -9,10 +9,37 @@ REPORTS_DIR = "generated_reports"
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
 
-def generate_pdf_report(report_id: str, name: str, logs: list, anomalies: list):
+class _HashingWriter:
+    """File wrapper that hashes bytes on their way to disk."""
+
+    def __init__(self, f):
+        self._f = f
+        self.digest = sha256()
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("latin-1")
+        self.digest.update(data)
+        return self._f.write(data)
+
+    def flush(self):
+        self._f.flush()
+
+
+def generate_pdf_report(
+    report_id: str,
+    name: str,
+    logs: list,
+    anomalies: list,
+    total_logs: int | None = None,
+    total_anomalies: int | None = None
+):
     file_path = os.path.join(REPORTS_DIR, f"{report_id}.pdf")
+    tmp_path = file_path + ".part"
 
-    c = canvas.Canvas(file_path, pagesize=A4)
+    f = open(tmp_path, "wb")
+    writer = _HashingWriter(f)
+    c = canvas.Canvas(writer, pagesize=A4)
     width, height = A4
     y = height - 2 * cm
 
@@ -34,10 +61,13 @@ def generate_pdf_report(report_id: str, name: str, logs: list, anomalies: list):
     y -= 0.8 * cm
 
     c.setFont("Helvetica", 10)
-    c.drawString(2 * cm, y, f"Total Logs: {len(logs)}")
+    c.drawString(2 * cm, y, f"Total Logs: {total_logs if total_logs is not None else len(logs)}")
     y -= 0.5 * cm
 
-    c.drawString(2 * cm, y, f"Total Anomalies: {len(anomalies)}")
+    c.drawString(
+        2 * cm, y,
+        f"Total Anomalies: {total_anomalies if total_anomalies is not None else len(anomalies)}"
+    )
     y -= 1 * cm
 
     # ---------------- ANOMALIES ----------------
@@ -81,10 +111,11 @@ def generate_pdf_report(report_id: str, name: str, logs: list, anomalies: list):
             c.setFont("Helvetica", 8)
 
     # ---------------- FINALIZE ----------------
-    c.save()
-
-    # SHA256 hash
-    with open(file_path, "rb") as f:
-        file_hash = sha256(f.read()).hexdigest()
-
-    return file_path, file_hash
+    try:
+        c.save()
+    finally:
+        f.close()
+
+    # SHA256 computed while writing, no second read of the file
+    os.replace(tmp_path, file_path)
+    return file_path, writer.digest.hexdigest()
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from uuid import uuid4
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.anomalies import Anomaly
+from app.models.logs import LogEvent
+from app.models.report_jobs import ReportJob
+from app.services import log_rollups
+from app.services.report_export import range_start
+from app.services.report_generator import REPORTS_DIR, generate_pdf_report
+from app.services.report_service import risk_severity
+from config import (
+    REPORT_WORKER_PROCESSES,
+    REPORT_JOB_TTL_HOURS,
+    REPORT_JOB_TIMEOUT_SECONDS
+)
+
+
+# =====================================================
+# RENDERING (runs in a worker process)
+# =====================================================
+
+def _filtered_logs(db, range: str, filters: dict):
+    query = db.query(LogEvent)
+    since = range_start(range)
+    if since:
+        query = query.filter(LogEvent.timestamp >= since)
+    if filters.get("endpoint_id"):
+        query = query.filter(LogEvent.endpoint_id == filters["endpoint_id"])
+    if filters.get("log_type"):
+        query = query.filter(LogEvent.log_type == filters["log_type"])
+    return query
+
+
+def _filtered_anomalies(db, range: str, filters: dict):
+    query = db.query(Anomaly)
+    since = range_start(range)
+    if since:
+        query = query.filter(Anomaly.created_at >= since)
+    if filters.get("endpoint_id"):
+        query = query.filter(Anomaly.endpoint_id == filters["endpoint_id"])
+    return query
+
+
+def render_report(job_id: str, range: str, filters: dict):
+    db = SessionLocal()
+    try:
+        logs_query = _filtered_logs(db, range, filters)
+        anomalies_query = _filtered_anomalies(db, range, filters)
+
+        logs = (
+            logs_query
+            .order_by(LogEvent.timestamp.desc())
+            .limit(20)
+            .all()
+        )
+        anomalies = (
+            anomalies_query
+            .order_by(Anomaly.risk_score.desc(), Anomaly.created_at.desc())
+            .limit(10)
+            .all()
+        )
+
+        def summary(a):
+            try:
+                return json.loads(a.explanation_json or "{}").get("summary") or ""
+            except Exception:
+                return ""
+
+        return generate_pdf_report(
+            job_id,
+            f"CyberSentinel {range} report",
+            logs=[
+                {
+                    "timestamp": l.timestamp.isoformat(),
+                    "log_type": l.log_type or "",
+                    "message": l.message or "",
+                }
+                for l in logs
+            ],
+            anomalies=[
+                {
+                    "severity": risk_severity(a.risk_score),
+                    "title": (a.type or "anomaly").replace("_", " ").title(),
+                    "type": a.type or "",
+                    "description": summary(a),
+                }
+                for a in anomalies
+            ],
+            total_logs=log_rollups.total(db, range_start(range), filters=filters),
+            total_anomalies=anomalies_query.order_by(None).count()
+        )
+    finally:
+        db.close()
+
+
+# =====================================================
+# JOB TRACKING (report_jobs table, shared by API workers)
+# =====================================================
+# Job state lives in the DB so any worker can answer a poll or
+# a download. Only the worker that rendered a job holds its
+# Future. Jobs and their PDFs are removed REPORT_JOB_TTL_HOURS
+# after creation by cleanup().
+# =====================================================
+
+def _iso(ts: Optional[datetime]) -> Optional[str]:
+    if ts is None:
+        return None
+    return (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).isoformat()
+
+
+def job_dict(job: ReportJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "range": job.range,
+        "filters": json.loads(job.filters_json or "{}"),
+        "cache_key": job.cache_key,
+        "file_path": job.file_path,
+        "sha256": job.sha256,
+        "error": job.error,
+        "created_at": _iso(job.created_at),
+        "finished_at": _iso(job.finished_at),
+    }
+
+
+class ReportJobManager:
+    def __init__(self, processes: int, ttl_hours: float, timeout: float):
+        self.processes = processes
+        self.ttl = timedelta(hours=ttl_hours)
+        self.timeout = timedelta(seconds=timeout)
+        self.executor = None
+        self.futures: Dict[str, Future] = {}
+        self._lock = threading.RLock()
+
+    def start(self) -> ProcessPoolExecutor:
+        # spawned, not forked: renderers must not inherit the API's
+        # background threads, their locks or open DB connections
+        with self._lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self.executor
+
+    def data_watermark(self, db) -> list:
+        # any new log or anomaly moves the watermark and invalidates cached PDFs
+        max_log_id = db.query(func.max(LogEvent.id)).scalar()
+        max_anomaly = db.query(func.max(Anomaly.created_at)).scalar()
+        return [max_log_id, max_anomaly.isoformat() if max_anomaly else None]
+
+    def cache_key(self, range: str, filters: dict, watermark: list) -> str:
+        raw = json.dumps(
+            {"range": range, "filters": filters, "watermark": watermark},
+            sort_keys=True
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def submit(self, db: Session, range: str, filters: dict) -> dict:
+        filters = {k: v for k, v in filters.items() if v}
+        key = self.cache_key(range, filters, self.data_watermark(db))
+        now = datetime.now(timezone.utc)
+
+        cached = (
+            db.query(ReportJob)
+            .filter(
+                ReportJob.cache_key == key,
+                ReportJob.created_at >= now - self.ttl,
+                or_(
+                    ReportJob.status == "done",
+                    # a running job whose worker died is not waited on
+                    (ReportJob.status == "running")
+                    & (ReportJob.created_at >= now - self.timeout)
+                )
+            )
+            .order_by(ReportJob.created_at.desc())
+            .first()
+        )
+        if cached and (cached.status != "done" or os.path.exists(cached.file_path)):
+            return {**job_dict(cached), "cached": True}
+
+        job = ReportJob(
+            id=f"rpt_{uuid4().hex[:16]}",
+            status="running",
+            range=range,
+            filters_json=json.dumps(filters),
+            cache_key=key,
+            created_at=now
+        )
+        db.add(job)
+        db.commit()
+
+        job_id = job.id
+        try:
+            future = self.start().submit(render_report, job_id, range, filters)
+        except BrokenProcessPool:
+            # a renderer died (OOM, kill): replace the pool once
+            self.shutdown()
+            future = self.start().submit(render_report, job_id, range, filters)
+        self.futures[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+
+        return {**job_dict(job), "cached": False}
+
+    def _finish(self, job_id: str, future: Future):
+        self.futures.pop(job_id, None)
+
+        db = SessionLocal()
+        try:
+            job = db.get(ReportJob, job_id)
+            if job is None:
+                return
+            job.finished_at = datetime.now(timezone.utc)
+            try:
+                job.file_path, job.sha256 = future.result()
+                job.status = "done"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e) or type(e).__name__
+                print(f"❌ Report job {job_id} failed → {e!r}")
+            db.commit()
+        finally:
+            db.close()
+
+    def get(self, db: Session, job_id: str) -> Optional[dict]:
+        job = db.get(ReportJob, job_id)
+        return job_dict(job) if job else None
+
+    def wait(self, job_id: str, poll_seconds: float = 0.5):
+        """
+        Block until the job is no longer running, whichever worker
+        renders it. Blocking: call it from a threadpool route.
+        """
+        future = self.futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout=self.timeout.total_seconds())
+            except Exception:
+                pass
+            # _finish may still be committing the row: confirm below
+
+        deadline = time.monotonic() + self.timeout.total_seconds()
+        while time.monotonic() < deadline:
+            db = SessionLocal()
+            try:
+                job = db.get(ReportJob, job_id)
+                if job is None or job.status != "running":
+                    return
+            finally:
+                db.close()
+            time.sleep(poll_seconds)
+
+    def cleanup(self, db: Session) -> int:
+        """Drop jobs and PDFs older than the TTL; fail runs past the timeout."""
+        now = datetime.now(timezone.utc)
+        cutoff = now - self.ttl
+
+        db.query(ReportJob).filter(
+            ReportJob.status == "running",
+            ReportJob.created_at < now - self.timeout
+        ).update(
+            {"status": "failed", "error": "timed out", "finished_at": now},
+            synchronize_session=False
+        )
+        expired = (
+            db.query(ReportJob)
+            .filter(ReportJob.created_at < cutoff)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+
+        # a PDF is written after its job is created, so every file past
+        # the TTL belongs to an expired job (or was orphaned by a crash)
+        for name in os.listdir(REPORTS_DIR):
+            path = os.path.join(REPORTS_DIR, name)
+            try:
+                if os.path.getmtime(path) < cutoff.timestamp():
+                    os.remove(path)
+            except OSError:
+                pass
+
+        return expired
+
+    def shutdown(self):
+        with self._lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+    def public(self, job: dict) -> dict:
+        return {k: v for k, v in job.items() if k != "file_path"}
+
+
+report_jobs = ReportJobManager(
+    REPORT_WORKER_PROCESSES,
+    REPORT_JOB_TTL_HOURS,
+    REPORT_JOB_TIMEOUT_SECONDS
+)
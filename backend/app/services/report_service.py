@@ -1,23 +1,62 @@
-from collections import Counter
+from typing import Optional
 
-def build_report(logs, anomalies, range):
-    severity_counts = Counter(l.severity for l in logs)
-    source_counts = Counter(l.source for l in logs)
+from sqlalchemy.orm import Session
+
+from app.models.anomalies import Anomaly
+from app.services import log_rollups
+from app.services.report_export import range_start
+
+
+def risk_severity(risk: Optional[int]) -> str:
+    risk = risk or 0
+    if risk >= 90:
+        return "critical"
+    if risk >= 80:
+        return "high"
+    if risk >= 50:
+        return "medium"
+    return "low"
+
+
+def build_report(db: Session, range: str, filters: Optional[dict] = None):
+    """
+    Report summary answered from the log rollups: counts and
+    breakdowns never touch the raw log table beyond the few rows
+    the compactor has not folded in yet.
+    """
+    since = range_start(range)
+    filters = {k: v for k, v in (filters or {}).items() if v}
+
+    severity_counts = log_rollups.breakdown(db, "severity", since, filters=filters)
+    source_counts = log_rollups.breakdown(db, "source", since, filters=filters)
+
+    anomalies = db.query(Anomaly)
+    if since:
+        anomalies = anomalies.filter(Anomaly.created_at >= since)
+    if filters.get("endpoint_id"):
+        anomalies = anomalies.filter(Anomaly.endpoint_id == filters["endpoint_id"])
+
+    top = (
+        anomalies
+        .order_by(Anomaly.risk_score.desc(), Anomaly.created_at.desc())
+        .limit(5)
+        .all()
+    )
 
     return {
         "range": range,
-        "total_logs": len(logs),
-        "total_anomalies": len(anomalies),
+        "total_logs": sum(severity_counts.values()),
+        "total_anomalies": anomalies.count(),
         "severity_breakdown": severity_counts,
         "source_breakdown": source_counts,
         "top_anomalies": [
             {
                 "id": a.id,
-                "title": a.title,
-                "severity": a.severity,
+                "title": (a.type or "anomaly").replace("_", " ").title(),
+                "severity": risk_severity(a.risk_score),
                 "riskScore": a.risk_score,
                 "status": a.status,
             }
-            for a in anomalies[:5]
+            for a in top
         ],
     }
@@ -0,0 +1,444 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.system_metrics import SystemMetric
+from app.services.checkpoints import load_checkpoint, lock_checkpoint, save_checkpoint
+from app.services.log_rollups import floor_bucket
+from app.services.upsert import dialect_insert, supports_on_conflict
+from config import (
+    ROLLUP_LAG_SECONDS,
+    METRICS_COMPACT_INTERVAL_SECONDS,
+    METRICS_CHUNK_SIZE,
+    METRICS_RAW_RETENTION_HOURS,
+    METRICS_MINUTE_RETENTION_DAYS,
+    METRICS_HOUR_RETENTION_DAYS,
+    METRICS_MAX_POINTS
+)
+
+
+# =====================================================
+# SYSTEM METRICS TIME SERIES
+# =====================================================
+# `system_metrics` events skip log_events: each agent snapshot
+# becomes one compact "5s" row, and the compactor folds them
+# into "1m" and "1h" rows (mean + peak per bucket). Old raw and
+# minute rows are pruned once the coarser rows cover them.
+# =====================================================
+
+LOG_TYPE = "system_metrics"
+CHECKPOINT = "system_metrics"
+
+RAW = "5s"
+RESOLUTIONS = {"5s": 5, "1m": 60, "1h": 3600}
+VALUES = ("cpu", "memory", "disk")
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def _float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def retention(resolution: str) -> Optional[timedelta]:
+    return {
+        "5s": timedelta(hours=METRICS_RAW_RETENTION_HOURS),
+        "1m": timedelta(days=METRICS_MINUTE_RETENTION_DAYS),
+        "1h": timedelta(days=METRICS_HOUR_RETENTION_DAYS),
+    }[resolution]
+
+
+# =====================================================
+# INGEST (agent snapshot → "5s" row)
+# =====================================================
+
+def sample_time(ts: Optional[datetime], now: datetime) -> datetime:
+    """Bucket of a snapshot: the agent's own sample time, never ahead of the server."""
+    if ts is None:
+        return now
+    return min(_utc(ts), now)
+
+
+def metric_row(endpoint_id: str, raw_data: Any, ts: datetime) -> Dict[str, Any]:
+    if isinstance(raw_data, str):
+        try:
+            raw_data = json.loads(raw_data)
+        except ValueError:
+            raw_data = None
+    data = raw_data if isinstance(raw_data, dict) else {}
+
+    disks = data.get("disks") if isinstance(data.get("disks"), dict) else {}
+    used = [
+        _float(d.get("used_percent"))
+        for d in disks.values()
+        if isinstance(d, dict) and d.get("used_percent") is not None
+    ]
+    cpu = _float(data.get("cpu_percent"))
+    memory = _float(data.get("memory_percent"))
+    disk = sum(used) / len(used) if used else 0.0
+
+    return {
+        "resolution": RAW,
+        "endpoint_id": endpoint_id,
+        "bucket": ts,
+        "samples": 1,
+        "cpu": cpu,
+        "cpu_max": cpu,
+        "memory": memory,
+        "memory_max": memory,
+        "disk": disk,
+        "disk_max": max(used, default=0.0),
+        "uptime_seconds": _int(data.get("uptime_seconds")),
+    }
+
+
+def store_samples(db: Session, rows: List[Dict[str, Any]]) -> List[Optional[int]]:
+    """
+    Insert raw snapshots; caller commits. A snapshot whose
+    (endpoint_id, bucket) is already stored, i.e. resent by the
+    agent, is skipped and gets None as its id.
+    """
+    if not rows:
+        return []
+
+    bind = db.get_bind()
+    if supports_on_conflict(bind):
+        stmt = (
+            dialect_insert(bind)(SystemMetric)
+            .on_conflict_do_nothing(index_elements=["resolution", "endpoint_id", "bucket"])
+            .returning(SystemMetric.id, SystemMetric.endpoint_id, SystemMetric.bucket)
+        )
+        inserted = {(r.endpoint_id, _utc(r.bucket)): r.id for r in db.execute(stmt, rows)}
+        ids = []
+        for row in rows:
+            # pop: a duplicate within the same batch is skipped too
+            ids.append(inserted.pop((row["endpoint_id"], _utc(row["bucket"])), None))
+    else:
+        ids = []
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    obj = SystemMetric(**row)
+                    db.add(obj)
+                    db.flush()
+                ids.append(obj.id)
+            except IntegrityError:
+                ids.append(None)
+
+    return ids
+
+
+def metrics_payload(row: Dict[str, Any], source: Optional[str] = None) -> Dict[str, Any]:
+    # live-feed event; type stays "system_metrics" for subscription filters
+    return {
+        "kind": "metrics",
+        "type": LOG_TYPE,
+        "severity": "info",
+        "endpoint_id": row["endpoint_id"],
+        "source": source,
+        "timestamp": row["bucket"].isoformat(),
+        "cpu": row["cpu"],
+        "memory": row["memory"],
+        "disk": row["disk"],
+        "disk_max": row["disk_max"],
+        "uptime_seconds": row["uptime_seconds"],
+    }
+
+
+# =====================================================
+# AGGREGATION (shared by compaction and queries)
+# =====================================================
+
+class _Bucket:
+    __slots__ = ("samples", "sums", "peaks", "uptime")
+
+    def __init__(self):
+        self.samples = 0
+        self.sums = dict.fromkeys(VALUES, 0.0)
+        self.peaks = dict.fromkeys(VALUES, 0.0)
+        self.uptime = None
+
+    def add(self, row):
+        # works for raw snapshots and rollup rows alike (mean * samples)
+        n = row.samples
+        self.samples += n
+        for name in VALUES:
+            self.sums[name] += getattr(row, name) * n
+            self.peaks[name] = max(self.peaks[name], getattr(row, f"{name}_max"))
+        if row.uptime_seconds is not None:
+            self.uptime = max(self.uptime or 0, row.uptime_seconds)
+
+    def values(self) -> Dict[str, Any]:
+        out = {"samples": self.samples, "uptime_seconds": self.uptime}
+        for name in VALUES:
+            out[name] = self.sums[name] / self.samples if self.samples else 0.0
+            out[f"{name}_max"] = self.peaks[name]
+        return out
+
+
+def _fold(buckets: Dict[Tuple, _Bucket], rows, seconds: int, by_endpoint: bool = True):
+    for row in rows:
+        key = (row.endpoint_id if by_endpoint else None, floor_bucket(row.bucket, seconds))
+        buckets.setdefault(key, _Bucket()).add(row)
+
+
+# =====================================================
+# DOWNSAMPLING ("5s" → "1m" → "1h")
+# =====================================================
+
+def _upsert_rollups(db: Session, rows: List[Dict[str, Any]]):
+    if not rows:
+        return
+
+    bind = db.get_bind()
+    if supports_on_conflict(bind):
+        stmt = dialect_insert(bind)(SystemMetric)
+        new = stmt.excluded
+        total = SystemMetric.samples + new.samples
+
+        set_ = {"samples": total}
+        for name in VALUES:
+            old_mean, new_mean = getattr(SystemMetric, name), getattr(new, name)
+            old_max, new_max = getattr(SystemMetric, f"{name}_max"), getattr(new, f"{name}_max")
+            set_[name] = (old_mean * SystemMetric.samples + new_mean * new.samples) / total
+            set_[f"{name}_max"] = case((new_max > old_max, new_max), else_=old_max)
+        set_["uptime_seconds"] = func.coalesce(new.uptime_seconds, SystemMetric.uptime_seconds)
+
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["resolution", "endpoint_id", "bucket"],
+                set_=set_
+            ),
+            rows
+        )
+        return
+
+    for row in rows:
+        existing = (
+            db.query(SystemMetric)
+            .filter_by(
+                resolution=row["resolution"],
+                endpoint_id=row["endpoint_id"],
+                bucket=row["bucket"]
+            )
+            .first()
+        )
+        if existing is None:
+            db.add(SystemMetric(**row))
+            continue
+
+        merged = _Bucket()
+        merged.add(existing)
+        merged.add(SystemMetric(**row))
+        for name, value in merged.values().items():
+            setattr(existing, name, value)
+
+
+def compact(db: Session, chunk_size: int = METRICS_CHUNK_SIZE) -> int:
+    """
+    Fold the next chunk of raw snapshots past the checkpoint into
+    both rollup resolutions in one pass. Snapshots younger than
+    ROLLUP_LAG_SECONDS wait for the next pass, as in log_rollups.
+    """
+    # held until commit: another API process's compactor waits here
+    # instead of merging the same samples into the rollups again
+    last_id = lock_checkpoint(db, CHECKPOINT)
+    horizon = datetime.now(timezone.utc) - timedelta(seconds=ROLLUP_LAG_SECONDS)
+
+    rows = (
+        db.query(SystemMetric)
+        .filter(SystemMetric.resolution == RAW, SystemMetric.id > last_id)
+        .order_by(SystemMetric.id)
+        .limit(chunk_size)
+        .all()
+    )
+
+    ready = []
+    for row in rows:
+        if _utc(row.bucket) > horizon:
+            break
+        ready.append(row)
+    if not ready:
+        db.commit()
+        return 0
+
+    for resolution in ("1m", "1h"):
+        buckets = {}
+        _fold(buckets, ready, RESOLUTIONS[resolution])
+        _upsert_rollups(db, [
+            {"resolution": resolution, "endpoint_id": endpoint_id, "bucket": bucket, **b.values()}
+            for (endpoint_id, bucket), b in buckets.items()
+        ])
+
+    save_checkpoint(db, CHECKPOINT, ready[-1].id)
+    db.commit()
+    return len(ready)
+
+
+def compact_all(db: Session) -> int:
+    total = 0
+    while True:
+        folded = compact(db)
+        total += folded
+        if folded < METRICS_CHUNK_SIZE:
+            return total
+
+
+def prune(db: Session) -> int:
+    now = datetime.now(timezone.utc)
+    folded_up_to = load_checkpoint(db, CHECKPOINT)
+
+    deleted = 0
+    for resolution in RESOLUTIONS:
+        query = db.query(SystemMetric).filter(
+            SystemMetric.resolution == resolution,
+            SystemMetric.bucket < now - retention(resolution)
+        )
+        if resolution == RAW:
+            # never drop snapshots the rollups have not absorbed yet
+            query = query.filter(SystemMetric.id <= folded_up_to)
+        deleted += query.delete(synchronize_session=False)
+
+    db.commit()
+    return deleted
+
+
+def compactor_worker():
+    while True:
+        db = SessionLocal()
+        try:
+            folded = compact_all(db)
+            if folded:
+                print(f"📈 Downsampled {folded} metric snapshots")
+            prune(db)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Metrics compaction failed → {e}")
+        finally:
+            db.close()
+
+        time.sleep(METRICS_COMPACT_INTERVAL_SECONDS)
+
+
+def start_metrics_compactor():
+    threading.Thread(
+        target=compactor_worker,
+        name="system-metrics",
+        daemon=True
+    ).start()
+
+
+# =====================================================
+# QUERIES
+# =====================================================
+
+def pick_resolution(since: datetime, until: datetime, max_points: int = METRICS_MAX_POINTS) -> str:
+    """Finest resolution that fits max_points and still holds `since`."""
+    span = (until - since).total_seconds()
+    oldest_ok = datetime.now(timezone.utc) - since
+    for resolution, seconds in RESOLUTIONS.items():
+        if span / seconds <= max_points and oldest_ok <= retention(resolution):
+            return resolution
+    return "1h"
+
+
+def series(
+    db: Session,
+    since: datetime,
+    until: datetime,
+    endpoint_id: Optional[str] = None,
+    resolution: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Mean/peak per bucket. Without endpoint_id every endpoint is
+    folded together (fleet view). Rollup resolutions also fold in
+    raw snapshots the compactor has not reached yet.
+    """
+    resolution = resolution or pick_resolution(since, until)
+    seconds = RESOLUTIONS[resolution]
+
+    def in_range(query, res):
+        query = query.filter(
+            SystemMetric.resolution == res,
+            SystemMetric.bucket >= floor_bucket(since, seconds),
+            SystemMetric.bucket < until
+        )
+        if endpoint_id:
+            query = query.filter(SystemMetric.endpoint_id == endpoint_id)
+        return query
+
+    buckets: Dict[Tuple, _Bucket] = {}
+    _fold(buckets, in_range(db.query(SystemMetric), resolution).yield_per(5000),
+          seconds, by_endpoint=bool(endpoint_id))
+
+    if resolution != RAW:
+        tail = in_range(db.query(SystemMetric), RAW).filter(
+            SystemMetric.id > load_checkpoint(db, CHECKPOINT)
+        )
+        _fold(buckets, tail.yield_per(5000), seconds, by_endpoint=bool(endpoint_id))
+
+    points = [
+        {"timestamp": bucket.isoformat(), **b.values()}
+        for (_, bucket), b in sorted(buckets.items(), key=lambda kv: kv[0][1])
+    ]
+    for p in points:
+        for name in VALUES:
+            p[name] = round(p[name], 2)
+
+    return {
+        "endpoint_id": endpoint_id,
+        "resolution": resolution,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "points": points,
+    }
+
+
+def latest(db: Session) -> List[Dict[str, Any]]:
+    newest = (
+        db.query(SystemMetric.endpoint_id, func.max(SystemMetric.bucket).label("bucket"))
+        .filter(SystemMetric.resolution == RAW)
+        .group_by(SystemMetric.endpoint_id)
+        .subquery()
+    )
+    rows = (
+        db.query(SystemMetric)
+        .join(newest, and_(
+            SystemMetric.endpoint_id == newest.c.endpoint_id,
+            SystemMetric.bucket == newest.c.bucket
+        ))
+        .filter(SystemMetric.resolution == RAW)
+        .order_by(SystemMetric.bucket.desc())
+        .all()
+    )
+    return [
+        {
+            "endpoint_id": r.endpoint_id,
+            "timestamp": _utc(r.bucket).isoformat(),
+            "cpu": r.cpu,
+            "memory": r.memory,
+            "disk": r.disk,
+            "disk_max": r.disk_max,
+            "uptime_seconds": r.uptime_seconds,
+        }
+        for r in rows
+    ]
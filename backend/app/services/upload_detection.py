@@ -0,0 +1,291 @@
+import json
+import re
+from datetime import datetime, timezone
+from typing import List, Optional
+from uuid import uuid4
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.anomalies import Anomaly
+from app.models.uploaded_logs import UploadedLog
+from app.models.uploaded_log_entries import UploadedLogEntry
+from app.services.anomaly_detector import (
+    RULES,
+    dedup_key,
+    reserve_anomaly,
+    rule_based_explanation
+)
+from app.services.anomaly_stats import anomaly_stats
+from app.services.pagination import after_cursor
+from app.services.upload_entries import find_entries_upload, new_entries_upload
+from app.services.sliding_window import BatchWindows
+from app.services.upsert import dialect_insert, supports_on_conflict
+from app.services.xai_queue import xai_queue
+from config import DETECTION_UPLOAD_CHUNK
+
+
+# =====================================================
+# UPLOADED ENTRY → RULE ENGINE ROW
+# =====================================================
+# Uploaded entries carry no log_type / IPs / raw_data, so
+# they are classified from source + event_type tokens and
+# IPs are pulled from the message. The message stands in for
+# raw_data in rules that inspect the payload.
+# =====================================================
+
+LOG_TYPE_TOKENS = {
+    "auth": {"auth", "login", "logon", "logoff", "sshd", "sudo", "pam", "kerberos",
+             "4624", "4625", "4634", "4648", "4771", "4776"},
+    "network": {"network", "firewall", "fw", "iptables", "ufw", "netflow", "dns",
+                "connection", "5156", "5157"},
+    "usb": {"usb"},
+    "registry": {"registry", "4657"},
+    "service": {"service", "7045", "7040"},
+    "task": {"task", "schtasks", "4698"},
+    "defender": {"defender", "1116", "5001"},
+    "file": {"file", "4663"},
+}
+
+TOKEN = re.compile(r"[a-z0-9]+")
+IPV4 = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
+
+
+def classify_log_type(source: Optional[str], event_type: Optional[str]) -> str:
+    tokens = set(TOKEN.findall(f"{source or ''} {event_type or ''}".lower()))
+    for log_type, keywords in LOG_TYPE_TOKENS.items():
+        if tokens & keywords:
+            return log_type
+    return "uploaded"
+
+
+class UploadedRow:
+    """Duck-typed LogEvent for the rule lambdas."""
+
+    __slots__ = (
+        "id", "entry_id", "timestamp", "log_type", "message", "raw_data",
+        "raw_json", "src_ip", "dst_ip", "username", "endpoint_id", "source"
+    )
+
+    def __init__(self, upload_id: int, entry: UploadedLogEntry):
+        ts = entry.timestamp
+        message = entry.message or ""
+        ips = IPV4.findall(message)
+
+        self.id = f"u{upload_id}:{entry.id}"
+        self.entry_id = entry.id
+        self.timestamp = ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+        self.log_type = classify_log_type(entry.source, entry.event_type)
+        self.message = message
+        self.raw_data = message
+        self.raw_json = None
+        self.src_ip = ips[0] if ips else None
+        self.dst_ip = ips[1] if len(ips) > 1 else None
+        self.username = None
+        self.endpoint_id = f"upload:{upload_id}"
+        self.source = entry.source
+
+
+# =====================================================
+# ONE-PASS BATCH EVALUATION
+# =====================================================
+
+def _rules_by_type():
+    # same order as detect_anomalies: typed rules, then the generic ones
+    generic = [r for r in RULES if r["log_type"] is None]
+    by_type = {}
+    for rule in RULES:
+        if rule["log_type"] and rule["risk"] > 0:
+            by_type.setdefault(rule["log_type"], []).append(rule)
+    return {
+        log_type: rules + generic
+        for log_type, rules in {**by_type, "uploaded": []}.items()
+    }
+
+
+def _insert_anomalies(db: Session, rows: List[dict]) -> List[dict]:
+    """Insert, skipping dedup_keys already stored (re-runs are idempotent)."""
+    if not rows:
+        return []
+
+    if supports_on_conflict(db.bind):
+        result = db.execute(
+            dialect_insert(db.bind)(Anomaly)
+            .on_conflict_do_nothing(index_elements=["dedup_key"])
+            .returning(Anomaly.id),
+            rows
+        )
+        inserted = {r.id for r in result}
+        return [r for r in rows if r["id"] in inserted]
+
+    return [r for r in rows if reserve_anomaly(db, r)]
+
+
+def _entry_chunks(db: Session, upload_id: int):
+    """
+    Entries in (timestamp, id) order, one keyset query per chunk.
+    Every chunk is fetched in full before the caller commits, so
+    no cursor (server-side on Postgres) stays open across a commit.
+    """
+    position = None
+    while True:
+        query = db.query(UploadedLogEntry).filter(UploadedLogEntry.upload_id == upload_id)
+        if position:
+            query = query.filter(
+                after_cursor(UploadedLogEntry.timestamp, UploadedLogEntry.id, position)
+            )
+
+        chunk = (
+            query
+            .order_by(UploadedLogEntry.timestamp, UploadedLogEntry.id)
+            .limit(DETECTION_UPLOAD_CHUNK)
+            .all()
+        )
+        if not chunk:
+            return
+
+        position = (chunk[-1].timestamp, chunk[-1].id)
+        yield chunk
+
+
+def detect_upload(db: Session, upload_id: int) -> int:
+    """
+    Replay the rule engine over every entry of an upload in time
+    order. Windowed rules read exact counts from BatchWindows, which
+    is fed row by row, so all aggregates come from a single pass.
+    Progress is committed after every DETECTION_UPLOAD_CHUNK entries.
+    """
+    upload = db.get(UploadedLog, upload_id)
+    upload.detection_status = "running"
+    upload.detection_processed = 0
+    upload.anomaly_count = 0
+    db.commit()
+
+    rules_by_type = _rules_by_type()
+    windows = BatchWindows()
+    pending = []
+    created = []
+    processed = 0
+
+    def flush():
+        nonlocal pending
+        created.extend(_insert_anomalies(db, pending))
+        pending = []
+        upload.detection_processed = processed
+        upload.anomaly_count = len(created)
+        db.commit()
+
+    # commit per chunk, between keyset queries
+    for chunk in _entry_chunks(db, upload_id):
+        for entry in chunk:
+            row = UploadedRow(upload_id, entry)
+            windows.record(row.log_type, row.src_ip, row.timestamp)
+            processed += 1
+
+            for rule in rules_by_type[row.log_type]:
+                try:
+                    if not rule["condition"](row, windows):
+                        continue
+                except Exception as e:
+                    print(f"⚠️ Rule {rule['id']} failed → {e}")
+                    continue
+
+                signals = {
+                    "message": row.message,
+                    "ip": row.src_ip,
+                    "log_type": row.log_type,
+                    "timestamp": row.timestamp.isoformat(),
+                    "upload_entry_id": row.entry_id,
+                    "rule_id": rule["id"],
+                }
+                explanation = rule_based_explanation(row, signals)
+                pending.append({
+                    "id": f"anom_{uuid4().hex[:12]}",
+                    "type": rule["type"],
+                    "status": "active",
+                    "risk_score": rule["risk"],
+                    "source": row.log_type,
+                    "endpoint_id": row.endpoint_id,
+                    "upload_id": upload_id,
+                    "rule_id": rule["id"],
+                    "dedup_key": f"upload:{upload_id}|" + dedup_key(
+                        rule["id"], row, rule.get("dedup_window")
+                    ),
+                    "created_at": datetime.now(timezone.utc),
+                    "explanation_json": json.dumps(explanation),
+                    "summary": explanation["summary"],
+                })
+
+        flush()
+
+    # re-runs only insert what is new: report the upload's total
+    upload.anomaly_count = (
+        db.query(func.count(Anomaly.id))
+        .filter(Anomaly.upload_id == upload_id)
+        .scalar()
+    )
+    upload.detection_status = "done"
+    db.commit()
+
+    anomaly_stats.invalidate()
+    for a in created:
+        xai_queue.enqueue(a["id"], a["risk_score"], (a["endpoint_id"], a["type"]))
+
+    print(f"🔎 Upload {upload_id}: {processed} entries → {len(created)} anomalies")
+    return len(created)
+
+
+def run_upload_detection(upload_id: int) -> int:
+    db = SessionLocal()
+    try:
+        upload = db.get(UploadedLog, upload_id)
+        if upload is None or upload.status != "parsed":
+            return 0
+        return detect_upload(db, upload_id)
+    except Exception as e:
+        db.rollback()
+        db.execute(
+            update(UploadedLog)
+            .where(UploadedLog.id == upload_id)
+            .values(detection_status="failed", error=str(e))
+        )
+        db.commit()
+        print(f"❌ Detection for upload {upload_id} failed → {e}")
+        return 0
+    finally:
+        db.close()
+
+
+# =====================================================
+# FILES STORED THROUGH /api/upload/entries
+# =====================================================
+
+def register_entries_upload(db: Session, filename: str) -> Optional[UploadedLog]:
+    """
+    Entries posted as parsed JSON have no UploadedLog. Give the
+    file one and adopt its unowned entries so detection results
+    link to an upload like server-side parsed files do.
+    """
+    upload = find_entries_upload(db, filename)
+    if upload is None:
+        if not db.query(UploadedLogEntry.id).filter(UploadedLogEntry.filename == filename).first():
+            return None
+        upload = new_entries_upload(db, filename)
+
+    db.execute(
+        update(UploadedLogEntry)
+        .where(UploadedLogEntry.filename == filename, UploadedLogEntry.upload_id.is_(None))
+        .values(upload_id=upload.id)
+    )
+    upload.entry_count, upload.first_timestamp, upload.last_timestamp = (
+        db.query(
+            func.count(UploadedLogEntry.id),
+            func.min(UploadedLogEntry.timestamp),
+            func.max(UploadedLogEntry.timestamp)
+        )
+        .filter(UploadedLogEntry.upload_id == upload.id)
+        .one()
+    )
+    db.commit()
+    return upload
@@ -0,0 +1,240 @@
+import csv
+import io
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.uploaded_logs import UploadedLog
+from app.models.uploaded_log_entries import UploadedLogEntry
+from config import UPLOAD_ENTRIES_CHUNK
+
+
+# =====================================================
+# FAST PATH FOR PARSED ENTRIES (POST /api/upload/entries)
+# =====================================================
+# Rows go straight from decoded JSON to Core executemany (or
+# COPY on psycopg2) in chunks, all inside one transaction. No
+# per-row Pydantic model or ORM object is built.
+# =====================================================
+
+TABLE = UploadedLogEntry.__table__
+
+# payload key → column (camelCase from the UI, snake_case accepted too)
+FIELDS = {
+    "fileName": "filename",
+    "filename": "filename",
+    "timestamp": "timestamp",
+    "source": "source",
+    "eventType": "event_type",
+    "event_type": "event_type",
+    "status": "status",
+    "severity": "severity",
+    "message": "message",
+}
+COLUMNS = ("filename", "timestamp", "source", "event_type", "status", "severity", "message")
+
+
+@lru_cache(maxsize=65536)
+def parse_timestamp(value: str) -> Optional[datetime]:
+    # uploads repeat the same second many times: parse each string once
+    try:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def entry_row(record: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(record, dict):
+        return None
+
+    row = dict.fromkeys(COLUMNS)
+    for key, value in record.items():
+        column = FIELDS.get(key)
+        if column:
+            row[column] = value
+
+    if not isinstance(row["filename"], str) or not row["filename"]:
+        return None
+    for column in ("source", "event_type", "status", "severity", "message"):
+        value = row[column]
+        if value is not None and not isinstance(value, str):
+            row[column] = str(value)
+    row["timestamp"] = (
+        parse_timestamp(row["timestamp"]) if isinstance(row["timestamp"], str) else None
+    )
+    if row["timestamp"] is None:
+        return None
+    return row
+
+
+def rows_from_records(records: Iterable[Any]) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    for index, record in enumerate(records):
+        yield index, entry_row(record)
+
+
+def rows_from_columns(columns: Dict[str, List[Any]]) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """{"timestamp": [...], "message": [...], ...} → one row per index."""
+    keys = [k for k in columns if k in FIELDS and isinstance(columns[k], list)]
+    length = max((len(columns[k]) for k in keys), default=0)
+    for index in range(length):
+        yield index, entry_row({
+            k: columns[k][index] if index < len(columns[k]) else None
+            for k in keys
+        })
+
+
+# ---------------- per-file stats ----------------
+
+def _utc(ts: Optional[datetime]) -> Optional[datetime]:
+    if ts is None or ts.tzinfo:
+        return ts
+    return ts.replace(tzinfo=timezone.utc)
+
+
+def widen_span(upload: UploadedLog, first: datetime, last: datetime):
+    """Stretch an upload's first/last entry timestamps to cover a batch."""
+    current_first = _utc(upload.first_timestamp)
+    current_last = _utc(upload.last_timestamp)
+    upload.first_timestamp = min(first, current_first) if current_first else first
+    upload.last_timestamp = max(last, current_last) if current_last else last
+
+
+def find_entries_upload(db: Session, filename: str) -> Optional[UploadedLog]:
+    """The UploadedLog standing for a file posted as parsed entries."""
+    return (
+        db.query(UploadedLog)
+        .filter(UploadedLog.filename == filename, UploadedLog.storage_path.is_(None))
+        .order_by(UploadedLog.id.desc())
+        .first()
+    )
+
+
+def new_entries_upload(db: Session, filename: str) -> UploadedLog:
+    upload = UploadedLog(
+        filename=filename,
+        file_type=filename.rsplit(".", 1)[-1].lower() if "." in filename else None,
+        status="parsed",
+        entry_count=0
+    )
+    db.add(upload)
+    db.flush()
+    return upload
+
+
+def record_entry_files(db: Session, files: Dict[str, List[Any]]):
+    """Fold {filename: [count, first, last]} into each file's UploadedLog."""
+    for filename, (count, first, last) in files.items():
+        upload = find_entries_upload(db, filename) or new_entries_upload(db, filename)
+        upload.entry_count = (upload.entry_count or 0) + count
+        widen_span(upload, first, last)
+
+
+# ---------------- writers ----------------
+
+def _copy_chunk(db: Session, rows: List[Dict[str, Any]]):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([
+            r"\N" if row[c] is None else
+            row[c].isoformat() if c == "timestamp" else row[c]
+            for c in COLUMNS
+        ])
+    buf.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {TABLE.name} ({', '.join(COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buf
+        )
+    finally:
+        cursor.close()
+
+
+def insert_chunk(db: Session, rows: List[Dict[str, Any]]):
+    if not rows:
+        return
+    if db.get_bind().dialect.driver == "psycopg2":
+        _copy_chunk(db, rows)
+    else:
+        db.execute(TABLE.insert(), rows)
+
+
+class BulkEntryWriter:
+    """
+    Buffers rows and flushes every `chunk_size`; the caller commits
+    once at the end so an upload is all-or-nothing.
+    """
+
+    def __init__(self, db: Session, chunk_size: int = UPLOAD_ENTRIES_CHUNK):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.buffer: List[Dict[str, Any]] = []
+        self.stored = 0
+        self.rejected = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.files: Dict[str, List[Any]] = {}   # filename → [count, first, last]
+        self.started = time.perf_counter()
+
+    def add(self, index: int, row: Optional[Dict[str, Any]]) -> bool:
+        if row is None:
+            self.rejected += 1
+            if len(self.errors) < 100:
+                self.errors.append({
+                    "index": index,
+                    "error": "fileName and an ISO-8601 timestamp are required"
+                })
+        else:
+            self.buffer.append(row)
+            ts = row["timestamp"]
+            stats = self.files.get(row["filename"])
+            if stats is None:
+                self.files[row["filename"]] = [1, ts, ts]
+            else:
+                stats[0] += 1
+                stats[1] = min(stats[1], ts)
+                stats[2] = max(stats[2], ts)
+        return len(self.buffer) >= self.chunk_size
+
+    def flush(self):
+        insert_chunk(self.db, self.buffer)
+        self.stored += len(self.buffer)
+        self.buffer = []
+
+    def finish(self) -> Dict[str, Any]:
+        self.flush()
+        # same transaction: /files never counts entries that rolled back
+        record_entry_files(self.db, self.files)
+        self.db.commit()
+
+        seconds = time.perf_counter() - self.started
+        return {
+            "status": "success",
+            "stored_logs": self.stored,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(self.stored / seconds) if seconds else None,
+        }
+
+
+def bulk_insert_entries(
+    db: Session,
+    rows: Iterable[Tuple[int, Optional[Dict[str, Any]]]],
+    chunk_size: int = UPLOAD_ENTRIES_CHUNK
+) -> Dict[str, Any]:
+    writer = BulkEntryWriter(db, chunk_size)
+    try:
+        for index, row in rows:
+            if writer.add(index, row):
+                writer.flush()
+        return writer.finish()
+    except Exception:
+        db.rollback()
+        raise
@@ -0,0 +1,142 @@
+import os
+from hashlib import sha256
+from typing import BinaryIO, Tuple
+from uuid import uuid4
+
+from sqlalchemy import delete, insert
+
+from app.database import SessionLocal
+from app.models.uploaded_logs import UploadedLog
+from app.models.uploaded_log_entries import UploadedLogEntry
+from app.services.upload_detection import run_upload_detection
+from app.services.upload_entries import widen_span
+from app.services.upload_parsers import PARSERS, BINARY_FORMATS, detect_format
+from config import UPLOAD_DIR, UPLOAD_CHUNK_BYTES, UPLOAD_PARSE_BATCH
+
+
+# =====================================================
+# EVIDENCE STORAGE (content-addressed, chunked)
+# =====================================================
+# Files land in UPLOAD_DIR/<sha[:2]>/<sha>.<ext>. The body is
+# copied and hashed one chunk at a time, so an upload never
+# needs more than UPLOAD_CHUNK_BYTES of memory, and identical
+# files are stored once.
+# =====================================================
+
+def store_file(src: BinaryIO, filename: str) -> Tuple[str, str, int]:
+    tmp_dir = os.path.join(UPLOAD_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, f"{uuid4().hex}.part")
+
+    digest = sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as out:
+            while True:
+                chunk = src.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    file_hash = digest.hexdigest()
+    ext = detect_format(filename)
+    final_dir = os.path.join(UPLOAD_DIR, file_hash[:2])
+    final_path = os.path.join(final_dir, f"{file_hash}.{ext}")
+    os.makedirs(final_dir, exist_ok=True)
+
+    if os.path.exists(final_path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, final_path)
+
+    return final_path, file_hash, size
+
+
+# =====================================================
+# SERVER-SIDE PARSING → uploaded_log_entries
+# =====================================================
+
+def _open_for(fmt: str, path: str):
+    if fmt in BINARY_FORMATS:
+        return open(path, "rb")
+    # newline="" keeps quoted CSV fields with embedded newlines intact
+    return open(path, "r", encoding="utf-8", errors="replace", newline="")
+
+
+def parse_upload(upload_id: int) -> int:
+    """
+    Parse a stored upload into UploadedLogEntry rows, committing
+    every UPLOAD_PARSE_BATCH entries so progress is visible while
+    large files are still being read. A parsed upload goes straight
+    on to anomaly detection.
+    """
+    parsed = False
+    db = SessionLocal()
+    try:
+        upload = db.get(UploadedLog, upload_id)
+        if upload is None:
+            return 0
+
+        upload.status = "parsing"
+        upload.entry_count = 0
+        upload.first_timestamp = upload.last_timestamp = None
+        db.commit()
+
+        fmt = detect_format(upload.filename)
+        parser = PARSERS[fmt]
+        stored = 0
+        batch = []
+
+        def flush():
+            nonlocal stored, batch
+            if not batch:
+                return
+            db.execute(insert(UploadedLogEntry), batch)
+            stored += len(batch)
+            upload.entry_count = stored
+            timestamps = [entry["timestamp"] for entry in batch]
+            widen_span(upload, min(timestamps), max(timestamps))
+            db.commit()
+            batch = []
+
+        try:
+            with _open_for(fmt, upload.storage_path) as f:
+                for entry in parser(f):
+                    batch.append({
+                        **entry,
+                        "filename": upload.filename,
+                        "upload_id": upload.id,
+                    })
+                    if len(batch) >= UPLOAD_PARSE_BATCH:
+                        flush()
+            flush()
+            upload.status = "parsed"
+            upload.detection_status = "queued"
+            parsed = True
+        except Exception as e:
+            db.rollback()
+            # earlier batches are already committed: a failed upload
+            # keeps no partial set of entries
+            db.execute(
+                delete(UploadedLogEntry)
+                .where(UploadedLogEntry.upload_id == upload_id)
+            )
+            upload.status = "failed"
+            upload.error = str(e)
+            upload.entry_count = stored = 0
+            upload.first_timestamp = upload.last_timestamp = None
+            print(f"❌ Parsing upload {upload_id} failed → {e}")
+
+        db.commit()
+        print(f"📥 Parsed {stored} entries from {upload.filename}")
+    finally:
+        db.close()
+
+    if parsed:
+        run_upload_detection(upload_id)
+    return stored
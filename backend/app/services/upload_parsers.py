@@ -0,0 +1,369 @@
+import csv
+import json
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+from config import UPLOAD_JSON_MAX_ELEMENT_CHARS
+
+
+# =====================================================
+# STREAMING PARSERS FOR UPLOADED LOG FILES
+# =====================================================
+# Every parser reads its file handle incrementally and yields
+# one entry dict at a time:
+#   timestamp, source, event_type, status, severity, message
+# Field defaults mirror what the browser-side parser used to
+# produce, so entries look the same whichever path stored them.
+# =====================================================
+
+Entry = Dict[str, Any]
+
+
+def parse_timestamp(value: Any) -> datetime:
+    if isinstance(value, (int, float)):
+        # epoch seconds, or milliseconds from JS clients
+        seconds = value / 1000 if value > 1e11 else value
+        return datetime.fromtimestamp(seconds, timezone.utc)
+
+    if isinstance(value, str) and value:
+        try:
+            ts = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+            return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+
+    return datetime.now(timezone.utc)
+
+
+def keyword_severity(text: str) -> str:
+    lowered = text.lower()
+    if "error" in lowered:
+        return "high"
+    if "warn" in lowered:
+        return "medium"
+    return "low"
+
+
+def keyword_status(text: str) -> str:
+    lowered = text.lower()
+    if "error" in lowered:
+        return "error"
+    if "warn" in lowered:
+        return "warning"
+    return "info"
+
+
+def _from_mapping(obj: Dict[str, Any], fallback_message: str) -> Entry:
+    return {
+        "timestamp": parse_timestamp(obj.get("timestamp")),
+        "source": str(obj.get("source") or "uploaded"),
+        "event_type": str(
+            obj.get("eventType") or obj.get("eventtype") or obj.get("event_type")
+            or obj.get("type") or "unknown"
+        ),
+        "status": str(obj.get("status") or "info"),
+        "severity": str(obj.get("severity") or "low"),
+        "message": str(obj.get("message") or fallback_message),
+    }
+
+
+# ---------------- JSON lines / JSON array ----------------
+
+def parse_json_lines(f: TextIO) -> Iterator[Entry]:
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(obj, dict):
+            yield _from_mapping(obj, line)
+
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def parse_json_array(
+    f: TextIO,
+    read_size: int = 1 << 20,
+    max_element: int = UPLOAD_JSON_MAX_ELEMENT_CHARS
+) -> Iterator[Entry]:
+    """
+    Decode a top-level JSON array one element at a time with
+    raw_decode at a moving index; the buffer is only compacted
+    when more input is read. An element that cannot be decoded
+    once the file ends, or that grows past max_element, fails
+    the parse instead of buffering the rest of the file.
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(read_size)
+    idx = _SEPARATORS.match(buf).end()
+    if buf[idx:idx + 1] != "[":
+        raise ValueError("Expected a JSON array")
+
+    idx += 1
+    consumed = 0   # characters dropped from the front of buf
+    eof = False
+    while True:
+        idx = _SEPARATORS.match(buf, idx).end()
+        if idx < len(buf) and buf[idx] == "]":
+            return
+
+        end = None
+        if idx < len(buf):
+            try:
+                item, end = decoder.raw_decode(buf, idx)
+            except ValueError:
+                pass
+
+        # a value touching the end of the buffer may continue in the next read
+        if end is None or (end == len(buf) and not eof):
+            if eof:
+                if idx >= len(buf):
+                    return   # unterminated array: keep what was decoded
+                raise ValueError(f"Malformed JSON array element at character {consumed + idx}")
+            if len(buf) - idx > max_element:
+                raise ValueError(
+                    f"JSON array element at character {consumed + idx} "
+                    f"exceeds {max_element} characters"
+                )
+            chunk = f.read(read_size)
+            eof = not chunk
+            consumed += idx
+            buf = buf[idx:] + chunk
+            idx = 0
+            continue
+
+        if isinstance(item, dict):
+            yield _from_mapping(item, buf[idx:end])
+        idx = end
+
+
+def parse_json(f: TextIO) -> Iterator[Entry]:
+    head = f.read(1)
+    while head and head.isspace():
+        head = f.read(1)
+    if not head:
+        return
+
+    rest = _Prefixed(head, f)
+    if head == "[":
+        yield from parse_json_array(rest)
+    else:
+        yield from parse_json_lines(rest)
+
+
+class _Prefixed:
+    """Text handle that replays already-consumed characters first."""
+
+    def __init__(self, prefix: str, f: TextIO):
+        self.prefix = prefix
+        self.f = f
+
+    def read(self, size: int = -1) -> str:
+        prefix, self.prefix = self.prefix, ""
+        if size is None or size < 0:
+            return prefix + self.f.read()
+        return prefix + self.f.read(max(0, size - len(prefix)))
+
+    def __iter__(self):
+        prefix, self.prefix = self.prefix, ""
+        first = prefix + self.f.readline()
+        if first:
+            yield first
+        yield from self.f
+
+
+# ---------------- CSV ----------------
+
+def parse_csv(f: TextIO) -> Iterator[Entry]:
+    reader = csv.reader(f)
+    headers = None
+
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        if headers is None:
+            headers = [h.strip().lower() for h in values]
+            continue
+
+        obj = {
+            h: (values[i].strip() if i < len(values) else "")
+            for i, h in enumerate(headers)
+        }
+        yield _from_mapping(obj, ",".join(values))
+
+
+# ---------------- syslog ----------------
+
+SYSLOG_5424 = re.compile(
+    r"^<(?P<pri>\d{1,3})>\d\s+(?P<ts>\S+)\s+(?P<host>\S+)\s+(?P<app>\S+)"
+    r"\s+\S+\s+\S+\s+(?:-|\[.*?\])\s*(?P<msg>.*)$"
+)
+SYSLOG_3164 = re.compile(
+    r"^(?:<(?P<pri>\d{1,3})>)?(?P<ts>[A-Z][a-z]{2}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})"
+    r"\s+(?P<host>\S+)\s+(?P<app>[^:\[\s]+)(?:\[\d+\])?:\s*(?P<msg>.*)$"
+)
+
+# syslog severity (PRI & 7) → dashboard severity
+SYSLOG_SEVERITY = {
+    0: "critical", 1: "critical", 2: "critical",
+    3: "high", 4: "medium", 5: "low", 6: "low", 7: "low",
+}
+
+
+def _bsd_timestamp(value: str) -> Optional[datetime]:
+    # RFC 3164 stamps carry no year: assume the current one
+    try:
+        now = datetime.now(timezone.utc)
+        ts = datetime.strptime(f"{now.year} {value}", "%Y %b %d %H:%M:%S")
+        return ts.replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def parse_syslog(f: TextIO) -> Iterator[Entry]:
+    for line in f:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+
+        entry = {
+            "timestamp": datetime.now(timezone.utc),
+            "source": "uploaded",
+            "event_type": "log_entry",
+            "status": keyword_status(line),
+            "severity": keyword_severity(line),
+            "message": line,
+        }
+
+        match = SYSLOG_5424.match(line)
+        ts = match and parse_timestamp(match["ts"])
+        if not match:
+            match = SYSLOG_3164.match(line)
+            ts = match and _bsd_timestamp(match["ts"])
+
+        if match:
+            entry["timestamp"] = ts or entry["timestamp"]
+            entry["source"] = match["host"]
+            entry["event_type"] = match["app"]
+            entry["message"] = match["msg"] or line
+            if match["pri"]:
+                entry["severity"] = SYSLOG_SEVERITY[int(match["pri"]) & 7]
+
+        yield entry
+
+
+# ---------------- Windows EVTX exported as XML ----------------
+
+# <Level> in the System block
+EVTX_LEVELS = {
+    "1": ("critical", "error"),
+    "2": ("high", "error"),
+    "3": ("medium", "warning"),
+    "4": ("low", "info"),
+    "0": ("low", "info"),
+}
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _evtx_entry(elem) -> Entry:
+    system = {}
+    data = []
+    for child in elem.iter():
+        name = _local(child.tag)
+        if name == "TimeCreated":
+            system["time"] = child.get("SystemTime")
+        elif name == "Provider":
+            system["provider"] = child.get("Name")
+        elif name in ("EventID", "Level", "Computer", "Channel"):
+            system[name] = (child.text or "").strip()
+        elif name == "Data":
+            label = child.get("Name")
+            value = (child.text or "").strip()
+            data.append(f"{label}={value}" if label else value)
+        elif name == "Message":
+            system["message"] = (child.text or "").strip()
+
+    severity, status = EVTX_LEVELS.get(system.get("Level", ""), ("low", "info"))
+    event_id = system.get("EventID", "")
+    message = system.get("message") or "; ".join(d for d in data if d)
+
+    return {
+        "timestamp": parse_timestamp(system.get("time")),
+        "source": system.get("Computer") or system.get("provider") or "uploaded",
+        "event_type": f"{system.get('provider') or system.get('Channel') or 'evtx'}:{event_id}",
+        "status": status,
+        "severity": severity,
+        "message": message or f"Event {event_id}",
+    }
+
+
+# optional UTF-8 BOM (Notepad / PowerShell exports), then the declaration
+XML_DECL = re.compile(rb"^(?:\xef\xbb\xbf)?\s*(<\?xml[^>]*\?>)?\s*")
+
+
+def parse_evtx_xml(f, read_size: int = 1 << 20) -> Iterator[Entry]:
+    """
+    Stream <Event> elements out of an Event Viewer XML export.
+    `wevtutil qe /f:xml` emits bare <Event> siblings with no root,
+    so those get a synthetic <Events> wrapper. Parsed events are
+    dropped from the tree as soon as they are read.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+
+    chunk = f.read(read_size)
+    body = chunk[XML_DECL.match(chunk).end():]
+    wrapped = body.startswith(b"<Event ") or body.startswith(b"<Event>")
+    parser.feed(b"<Events>" + body if wrapped else chunk)
+
+    while True:
+        for event, elem in parser.read_events():
+            if root is None:
+                root = elem
+            if event == "end" and _local(elem.tag) == "Event":
+                yield _evtx_entry(elem)
+                if root is not elem:
+                    root.clear()
+
+        if not chunk:
+            return
+        chunk = f.read(read_size)
+        if chunk:
+            parser.feed(chunk)
+        else:
+            if wrapped:
+                parser.feed(b"</Events>")
+            parser.close()
+
+
+# =====================================================
+# FORMAT DETECTION
+# =====================================================
+
+PARSERS = {
+    "json": parse_json,
+    "jsonl": parse_json_lines,
+    "ndjson": parse_json_lines,
+    "csv": parse_csv,
+    "log": parse_syslog,
+    "syslog": parse_syslog,
+    "txt": parse_syslog,
+    "xml": parse_evtx_xml,
+}
+
+# parsers that want the raw binary handle (the XML parser reads the encoding itself)
+BINARY_FORMATS = {"xml"}
+
+
+def detect_format(filename: str) -> str:
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return ext if ext in PARSERS else "log"
@@ -0,0 +1,24 @@
+from sqlalchemy import insert as generic_insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+# =====================================================
+# DIALECT-AWARE INSERT
+# =====================================================
+# Postgres and SQLite both support ON CONFLICT; the returned
+# insert() construct exposes on_conflict_do_nothing/_do_update.
+# Other backends get the plain insert and callers fall back to
+# catching IntegrityError.
+# =====================================================
+
+def dialect_insert(bind):
+    name = bind.dialect.name
+    if name == "postgresql":
+        return postgresql.insert
+    if name == "sqlite":
+        return sqlite.insert
+    return generic_insert
+
+
+def supports_on_conflict(bind) -> bool:
+    return bind.dialect.name in ("postgresql", "sqlite")
@@ -1,9 +1,21 @@
-import os
+import abc
+import asyncio
+import hashlib
 import json
 import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 
-import google.generativeai as genai
+from app.database import SessionLocal
+from app.models.xai_cache import XAICacheEntry
+from config import (
+    XAI_PROVIDER,
+    XAI_MAX_CONCURRENCY,
+    XAI_REQUESTS_PER_MINUTE,
+    XAI_TIMEOUT_SECONDS
+)
 
 
 # ============================================================
@@ -109,24 +121,14 @@ def _safe_json_load(text: str) -> Dict[str, Any]:
     return json.loads(match.group(0))
 
 
-# ============================================================
-# Main XAI Generator
-# ============================================================
-
-def generate_xai_explanation(
+def build_payload(
     anomaly: Dict[str, Any],
     entities: Dict[str, Any],
     signals: List[Dict[str, Any]],
     logs: List[Dict[str, Any]],
     baseline: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
-
-    model = genai.GenerativeModel(
-        model_name=MODEL_NAME,
-        system_instruction=SYSTEM_PROMPT
-    )
-
-    payload = {
+    return {
         "anomaly": {
             "id": anomaly.get("id"),
             "type": anomaly.get("type"),
@@ -139,24 +141,70 @@ def generate_xai_explanation(
         "baseline": baseline or {}
     }
 
-    response = model.generate_content(
-        json.dumps(payload),
-        generation_config={
-            "temperature": 0.15,
-            "response_mime_type": "application/json"
-        }
+
+# ids and timestamps differ for every occurrence of the same finding
+VOLATILE_SIGNAL_KEYS = {
+    "id", "anomaly_id", "log_id", "upload_entry_id",
+    "timestamp", "detected_at", "created_at"
+}
+
+
+def _content_signals(signals: List[Any]) -> List[Any]:
+    # signals are {"name", "value"} pairs; drop the per-occurrence ones
+    # and keep rule, entity (ip, user) and message signals
+    content = []
+    for signal in signals:
+        if isinstance(signal, dict):
+            if signal.get("name") in VOLATILE_SIGNAL_KEYS:
+                continue
+            signal = {
+                k: v for k, v in signal.items()
+                if k not in VOLATILE_SIGNAL_KEYS
+            }
+        content.append(signal)
+    return content
+
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    """
+    Cache key over what the explanation depends on: anomaly type,
+    rule, risk, rule signals (entities included) and log content.
+    Repeats of one finding share an entry; anomalies about other
+    IPs or users do not.
+    """
+    anomaly = payload.get("anomaly", {})
+    signals = _content_signals(payload.get("signals", []))
+    rule = next(
+        (
+            s.get("value") for s in signals
+            if isinstance(s, dict) and s.get("name") == "rule_id"
+        ),
+        None
     )
 
-    # ✅ SAFE PARSE
-    result = _safe_json_load(response.text)
+    content = {
+        "type": anomaly.get("type"),
+        "rule": rule,
+        "risk_score": anomaly.get("risk_score"),
+        "signals": sorted(json.dumps(s, sort_keys=True, default=str) for s in signals),
+        "entities": payload.get("entities"),
+        "logs": [
+            (log.get("source"), log.get("message"))
+            for log in payload.get("logs", [])
+        ],
+        "baseline": payload.get("baseline"),
+        "coalesced": (payload.get("coalesced") or {}).get("count"),
+    }
+    canonical = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
 
+def _apply_minimum_safety(result: Dict[str, Any], risk_score) -> Dict[str, Any]:
     # ============================================================
     # 🔒 MINIMUM PROTOTYPE SAFETY (DO NOT REMOVE)
     # ============================================================
 
-    risk_score = anomaly.get("risk_score", 0)
-
-    if risk_score >= 70:
+    if (risk_score or 0) >= 70:
         if not result.get("remediation_steps"):
             result["remediation_steps"] = [
                 {
@@ -175,3 +223,246 @@ def generate_xai_explanation(
             ]
 
     return result
+
+
+# ============================================================
+# Providers
+# ============================================================
+
+class XAIProvider(abc.ABC):
+    name = "base"
+
+    @abc.abstractmethod
+    def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        ...
+
+
+class GeminiProvider(XAIProvider):
+    name = "gemini"
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        # ✅ build the client once and reuse it for every call
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+
+                self._model = genai.GenerativeModel(
+                    model_name=self.model_name,
+                    system_instruction=SYSTEM_PROMPT
+                )
+            return self._model
+
+    def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = self._get_model().generate_content(
+            json.dumps(payload),
+            generation_config={
+                "temperature": 0.15,
+                "response_mime_type": "application/json"
+            }
+        )
+
+        # ✅ SAFE PARSE
+        return _safe_json_load(response.text)
+
+
+class StubProvider(XAIProvider):
+    """
+    Deterministic offline provider: same payload, same report.
+    Used for tests and air-gapped deployments.
+    """
+    name = "stub"
+
+    def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        anomaly = payload.get("anomaly", {})
+        risk = anomaly.get("risk_score") or 0
+        severity = "high" if risk >= 70 else "medium" if risk >= 40 else "low"
+        anomaly_type = str(anomaly.get("type") or "anomaly").replace("_", " ")
+
+        signals = payload.get("signals") or []
+        if isinstance(signals, dict):
+            signals = [{"name": k, "value": v} for k, v in signals.items()]
+
+        return {
+            "summary": f"{anomaly_type.capitalize()} flagged by rule-based detection",
+            "risk_score": risk,
+            "confidence": 0.5,
+            "why_flagged": [
+                {
+                    "signal": str(s.get("name", s.get("signal", "signal"))),
+                    "explanation": str(s.get("value", s.get("explanation", ""))),
+                    "severity": severity
+                }
+                for s in signals if isinstance(s, dict)
+            ],
+            "remediation_steps": [],
+            "preventive_measures": [],
+            "evidence": [
+                {
+                    "type": "log",
+                    "source": str(log.get("source")),
+                    "description": log.get("message", "")
+                }
+                for log in payload.get("logs", [])
+            ]
+        }
+
+
+PROVIDERS = {
+    GeminiProvider.name: GeminiProvider,
+    StubProvider.name: StubProvider,
+}
+
+
+# ============================================================
+# Rate limiting
+# ============================================================
+
+class XAIUnavailable(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst or max(1.0, per_minute / 6.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def available(self) -> float:
+        with self._lock:
+            elapsed = time.monotonic() - self.updated
+            return min(self.capacity, self.tokens + elapsed * self.rate)
+
+    def acquire(self, cost: float = 1.0, timeout: float = 0.0) -> bool:
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return True
+
+                wait = (cost - self.tokens) / self.rate
+
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+# ============================================================
+# XAI Service
+# ============================================================
+
+class XAIService:
+    def __init__(
+        self,
+        provider: XAIProvider,
+        max_concurrency: int,
+        requests_per_minute: float,
+        timeout: float
+    ):
+        self.provider = provider
+        self.timeout = timeout
+        self.limiter = TokenBucket(requests_per_minute)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="xai"
+        )
+
+    # ---------------- persistent cache ----------------
+
+    def cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            entry = db.get(XAICacheEntry, key)
+            return json.loads(entry.result_json) if entry else None
+        finally:
+            db.close()
+
+    def cache_put(self, key: str, result: Dict[str, Any]):
+        db = SessionLocal()
+        try:
+            db.merge(XAICacheEntry(
+                key=key,
+                provider=self.provider.name,
+                result_json=json.dumps(result)
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ XAI cache write failed → {e}")
+        finally:
+            db.close()
+
+    # ---------------- generation ----------------
+
+    def _explain(self, payload: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        key = payload_hash(payload)
+
+        if use_cache:
+            cached = self.cache_get(key)
+            if cached is not None:
+                return cached
+
+        if not self.limiter.acquire(timeout=self.timeout):
+            raise XAIUnavailable("XAI rate limit reached")
+
+        result = _apply_minimum_safety(
+            self.provider.generate(payload),
+            payload["anomaly"].get("risk_score")
+        )
+        self.cache_put(key, result)
+        return result
+
+    def submit(self, payload: Dict[str, Any], use_cache: bool = True) -> Future:
+        return self.executor.submit(self._explain, payload, use_cache)
+
+    def explain(self, payload: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        return self.submit(payload, use_cache).result(timeout=self.timeout * 2)
+
+    async def explain_async(
+        self,
+        payload: Dict[str, Any],
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        return await asyncio.wait_for(
+            asyncio.wrap_future(self.submit(payload, use_cache)),
+            timeout=self.timeout * 2
+        )
+
+
+xai_service = XAIService(
+    provider=PROVIDERS.get(XAI_PROVIDER, GeminiProvider)(),
+    max_concurrency=XAI_MAX_CONCURRENCY,
+    requests_per_minute=XAI_REQUESTS_PER_MINUTE,
+    timeout=XAI_TIMEOUT_SECONDS
+)
+
+
+# ============================================================
+# Main XAI Generator
+# ============================================================
+
+def generate_xai_explanation(
+    anomaly: Dict[str, Any],
+    entities: Dict[str, Any],
+    signals: List[Dict[str, Any]],
+    logs: List[Dict[str, Any]],
+    baseline: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    return xai_service.explain(
+        build_payload(anomaly, entities, signals, logs, baseline)
+    )
@@ -0,0 +1,277 @@
+import heapq
+import itertools
+import json
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models.anomalies import Anomaly
+from app.models.xai_reports import XAIReport
+from app.services.checkpoints import lock_checkpoint, save_checkpoint
+from app.services.xai_engine import TokenBucket, xai_service
+from app.services.xai_reports import (
+    linked_log_ids_many,
+    linked_logs,
+    evidence_hash,
+    xai_payload,
+    assemble_report,
+    store_report
+)
+from config import (
+    XAI_TOKENS_PER_MINUTE,
+    XAI_EXPECTED_OUTPUT_TOKENS,
+    XAI_BACKFILL_LIMIT,
+    XAI_BACKFILL_CLAIM_SECONDS,
+    XAI_MAX_ATTEMPTS,
+    XAI_RETRY_BACKOFF_SECONDS
+)
+
+
+# =====================================================
+# XAI PRE-GENERATION QUEUE
+# =====================================================
+# New anomalies are queued here instead of waiting on the LLM.
+# A single worker thread pops the highest-risk group first;
+# anomalies of the same type from the same endpoint that are
+# still pending are coalesced into one provider call. Calls are
+# paced by an estimated tokens-per-minute budget. A failed
+# group is retried XAI_MAX_ATTEMPTS times with doubling backoff,
+# then recorded under "failures" in stats().
+# =====================================================
+
+BACKFILL_CHECKPOINT = "xai_backfill"
+
+GroupKey = Tuple[Optional[str], Optional[str]]   # (endpoint_id, anomaly type)
+
+PRIORITY_BOOST = 1000   # analyst is looking at it right now
+
+
+def estimate_tokens(payload: dict) -> int:
+    return len(json.dumps(payload, default=str)) // 4 + XAI_EXPECTED_OUTPUT_TOKENS
+
+
+class XAIPregenQueue:
+    def __init__(self, tokens_per_minute: int):
+        self.budget = TokenBucket(tokens_per_minute, burst=tokens_per_minute)
+        self.tokens_per_minute = tokens_per_minute
+
+        self._heap: List[tuple] = []
+        self._groups: Dict[GroupKey, dict] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+        self.in_flight = 0
+        self.processed = 0
+        self.provider_calls = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.failed = 0
+        self.failures = deque(maxlen=50)
+
+    # ---------------- producer side ----------------
+
+    def enqueue(self, anomaly_id: str, priority: int, key: GroupKey):
+        self._push(key, [anomaly_id], priority)
+
+    def _push(self, key: GroupKey, anomaly_ids: List[str], priority: int, attempts: int = 0):
+        self._ensure_started()
+
+        with self._cond:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = {
+                    "anomaly_ids": [], "priority": priority, "attempts": attempts
+                }
+            elif set(anomaly_ids) <= set(group["anomaly_ids"]) and priority <= group["priority"]:
+                return
+
+            for anomaly_id in anomaly_ids:
+                if anomaly_id not in group["anomaly_ids"]:
+                    group["anomaly_ids"].append(anomaly_id)
+            group["priority"] = max(group["priority"], priority)
+            group["attempts"] = max(group["attempts"], attempts)
+
+            # older heap entries for this key become stale and are skipped
+            heapq.heappush(self._heap, (-group["priority"], next(self._seq), key))
+            self._cond.notify()
+
+    def enqueue_missing(self, db, limit: int = XAI_BACKFILL_LIMIT) -> int:
+        # every API process calls this on startup: the first to claim
+        # the backfill checkpoint runs it, the rest skip. last_id holds
+        # the epoch second of the last claimed run.
+        now = int(time.time())
+        if now - lock_checkpoint(db, BACKFILL_CHECKPOINT) < XAI_BACKFILL_CLAIM_SECONDS:
+            db.commit()
+            return 0
+        save_checkpoint(db, BACKFILL_CHECKPOINT, now)
+        db.commit()
+
+        missing = (
+            db.query(Anomaly.id, Anomaly.risk_score, Anomaly.endpoint_id, Anomaly.type)
+            .outerjoin(XAIReport, XAIReport.anomaly_id == Anomaly.id)
+            .filter(XAIReport.id.is_(None), Anomaly.status != "resolved")
+            .order_by(Anomaly.risk_score.desc())
+            .limit(limit)
+            .all()
+        )
+        for anomaly_id, risk, endpoint_id, anomaly_type in missing:
+            self.enqueue(anomaly_id, risk or 0, (endpoint_id, anomaly_type))
+        return len(missing)
+
+    # ---------------- consumer side ----------------
+
+    def _ensure_started(self):
+        # started on the first enqueue; only the API process enqueues
+        if self._thread and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="xai-pregen", daemon=True
+            )
+            self._thread.start()
+
+    def _pop_group(self) -> Tuple[GroupKey, dict]:
+        with self._cond:
+            while True:
+                while not self._heap:
+                    self._cond.wait()
+
+                neg_priority, _, key = heapq.heappop(self._heap)
+                group = self._groups.get(key)
+                if group is None or -neg_priority != group["priority"]:
+                    continue
+
+                del self._groups[key]
+                self.in_flight += len(group["anomaly_ids"])
+                return key, group
+
+    def _run(self):
+        while True:
+            key, group = self._pop_group()
+            anomaly_ids = group["anomaly_ids"]
+            try:
+                self._generate(anomaly_ids)
+                self.processed += len(anomaly_ids)
+            except Exception as e:
+                self._retry_or_fail(key, group, e)
+            finally:
+                with self._cond:
+                    self.in_flight -= len(anomaly_ids)
+
+    def _retry_or_fail(self, key: GroupKey, group: dict, error: Exception):
+        attempts = group["attempts"] + 1
+        if attempts < XAI_MAX_ATTEMPTS:
+            delay = XAI_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+            self.retried += len(group["anomaly_ids"])
+            print(f"⚠️ XAI pre-generation failed for {key} → {error}, retry {attempts} in {delay}s")
+            timer = threading.Timer(
+                delay, self._push,
+                (key, group["anomaly_ids"], group["priority"], attempts)
+            )
+            timer.daemon = True
+            timer.start()
+            return
+
+        self.failed += len(group["anomaly_ids"])
+        self.failures.append({
+            "endpoint_id": key[0],
+            "type": key[1],
+            "anomaly_ids": list(group["anomaly_ids"]),
+            "attempts": attempts,
+            "error": str(error),
+        })
+        print(f"❌ XAI pre-generation gave up on {key} after {attempts} attempts → {error}")
+
+    def _generate(self, anomaly_ids: List[str]):
+        db = SessionLocal()
+        try:
+            anomalies = (
+                db.query(Anomaly)
+                .filter(Anomaly.id.in_(anomaly_ids))
+                .order_by(Anomaly.risk_score.desc())
+                .all()
+            )
+            if not anomalies:
+                return
+
+            evidence = linked_log_ids_many(db, [a.id for a in anomalies])
+            all_log_ids = sorted({i for ids in evidence.values() for i in ids})
+
+            # one prompt for the whole group, led by the riskiest anomaly
+            lead = anomalies[0]
+            payload = xai_payload(lead, linked_logs(db, all_log_ids))
+            if len(anomalies) > 1:
+                payload["coalesced"] = {
+                    "count": len(anomalies),
+                    "anomaly_ids": [a.id for a in anomalies],
+                }
+
+            # cost never exceeds the bucket, so this sleeps until it is due
+            cost = min(estimate_tokens(payload), self.tokens_per_minute)
+            self.budget.acquire(cost, timeout=math.inf)
+
+            result = xai_service.explain(payload)
+            self.provider_calls += 1
+            self.coalesced += len(anomalies) - 1
+
+            for anomaly in anomalies:
+                report = assemble_report(anomaly, result)
+                store_report(
+                    db, anomaly.id,
+                    evidence_hash(anomaly, evidence[anomaly.id]),
+                    report
+                )
+                db.execute(
+                    update(Anomaly)
+                    .where(Anomaly.id == anomaly.id)
+                    .values(
+                        explanation_json=json.dumps(report),
+                        summary=report["summary"]
+                    )
+                )
+            db.commit()
+        finally:
+            db.close()
+
+    # ---------------- introspection ----------------
+
+    def stats(self, top: int = 20) -> dict:
+        with self._cond:
+            pending = sorted(
+                self._groups.items(),
+                key=lambda kv: -kv[1]["priority"]
+            )
+            return {
+                "pending_groups": len(pending),
+                "pending_anomalies": sum(len(g["anomaly_ids"]) for _, g in pending),
+                "in_flight": self.in_flight,
+                "processed": self.processed,
+                "provider_calls": self.provider_calls,
+                "coalesced": self.coalesced,
+                "retried": self.retried,
+                "failed": self.failed,
+                "failures": list(self.failures),
+                "tokens_per_minute": self.tokens_per_minute,
+                "tokens_available": int(self.budget.available()),
+                "worker_alive": bool(self._thread and self._thread.is_alive()),
+                "queue": [
+                    {
+                        "endpoint_id": key[0],
+                        "type": key[1],
+                        "priority": group["priority"],
+                        "anomaly_ids": list(group["anomaly_ids"]),
+                    }
+                    for key, group in pending[:top]
+                ],
+            }
+
+
+xai_queue = XAIPregenQueue(XAI_TOKENS_PER_MINUTE)
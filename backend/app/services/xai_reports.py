@@ -0,0 +1,226 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.anomalies import Anomaly
+from app.models.anomaly_logs import AnomalyLog
+from app.models.logs import LogEvent
+from app.models.xai_reports import XAIReport
+from app.services.xai_engine import build_payload
+
+
+# =====================================================
+# EVIDENCE
+# =====================================================
+
+def linked_log_ids(db: Session, anomaly_id: str) -> List[int]:
+    return [
+        log_id for (log_id,) in
+        db.query(AnomalyLog.log_id)
+        .filter(AnomalyLog.anomaly_id == anomaly_id)
+        .order_by(AnomalyLog.log_id)
+        .all()
+    ]
+
+
+def linked_log_ids_many(db: Session, anomaly_ids: List[str]) -> Dict[str, List[int]]:
+    """linked_log_ids for a whole group in one IN query."""
+    evidence = {anomaly_id: [] for anomaly_id in anomaly_ids}
+    rows = (
+        db.query(AnomalyLog.anomaly_id, AnomalyLog.log_id)
+        .filter(AnomalyLog.anomaly_id.in_(anomaly_ids))
+        .order_by(AnomalyLog.log_id)
+        .all()
+    )
+    for anomaly_id, log_id in rows:
+        evidence[anomaly_id].append(log_id)
+    return evidence
+
+
+def linked_logs(db: Session, log_ids: List[int]) -> List[LogEvent]:
+    if not log_ids:
+        return []
+    return (
+        db.query(LogEvent)
+        .filter(LogEvent.id.in_(log_ids))
+        .order_by(LogEvent.timestamp)
+        .all()
+    )
+
+
+def evidence_hash(anomaly: Anomaly, log_ids: List[int]) -> str:
+    # a report is stale once the anomaly's scoring or its linked logs change
+    evidence = {
+        "type": anomaly.type,
+        "risk_score": anomaly.risk_score,
+        "logs": sorted(log_ids),
+    }
+    return hashlib.sha256(
+        json.dumps(evidence, sort_keys=True).encode()
+    ).hexdigest()
+
+
+# =====================================================
+# PAYLOAD + REPORT ASSEMBLY
+# =====================================================
+
+def anomaly_explanation(anomaly: Anomaly) -> dict:
+    try:
+        return json.loads(anomaly.explanation_json or "{}")
+    except Exception:
+        return {}
+
+
+def detector_reason(anomaly: Anomaly) -> str:
+    return (
+        anomaly_explanation(anomaly).get("summary")
+        or "Rule-based anomaly detection triggered"
+    )
+
+
+def xai_payload(anomaly: Anomaly, logs: List[LogEvent]) -> Dict[str, Any]:
+    explanation = anomaly_explanation(anomaly)
+
+    raw_signals = explanation.get("factors") or explanation.get("signals") or []
+    signals = []
+
+    if not raw_signals and isinstance(explanation.get("why_flagged"), list):
+        # rule_based_explanation keeps the rule signals as why_flagged
+        signals = [
+            {"name": s.get("signal"), "value": s.get("explanation")}
+            for s in explanation["why_flagged"]
+            if isinstance(s, dict) and s.get("signal")
+        ]
+    elif isinstance(raw_signals, dict):
+        for k, v in raw_signals.items():
+            signals.append({"name": k, "value": v})
+    elif isinstance(raw_signals, list):
+        signals = raw_signals
+
+    entities = {
+        "source": anomaly.source,
+        "anomaly_type": anomaly.type
+    }
+
+    return build_payload(
+        anomaly={
+            "id": anomaly.id,
+            "type": anomaly.type,
+            "risk_score": anomaly.risk_score,
+            "detected_at": anomaly.created_at.isoformat()
+        },
+        entities=entities,
+        signals=signals,
+        logs=[
+            {
+                "timestamp": log.timestamp.isoformat(),
+                "source": log.source,
+                "message": log.message
+            }
+            for log in logs
+        ],
+        baseline={"detector_reason": detector_reason(anomaly)}
+    )
+
+
+def assemble_report(anomaly: Anomaly, xai_result: dict) -> dict:
+    # 🔐 ENFORCE NON-EMPTY SECTIONS (THE FIX)
+    why_flagged = xai_result.get("why_flagged") or [
+        {
+            "signal": "rule_match",
+            "explanation": detector_reason(anomaly),
+            "severity": "high"
+        }
+    ]
+
+    remediation_steps = xai_result.get("remediation_steps")
+    if not remediation_steps:
+        remediation_steps = [
+            {
+                "step": 1,
+                "action": "Review the affected endpoint and associated logs",
+                "reason": "Confirm whether the detected activity is legitimate"
+            },
+            {
+                "step": 2,
+                "action": "Inspect related system or network activity",
+                "reason": "Identify potential spread or misuse"
+            }
+        ]
+
+    preventive_measures = xai_result.get("preventive_measures")
+    if not preventive_measures:
+        preventive_measures = [
+            {
+                "control": "Behavior monitoring",
+                "purpose": "Detect similar anomalies earlier"
+            },
+            {
+                "control": "Security hardening",
+                "purpose": "Reduce impact of future incidents"
+            }
+        ]
+
+    return {
+        "summary": xai_result.get(
+            "summary",
+            "Suspicious activity detected by rule-based engine"
+        ),
+        "risk_score": anomaly.risk_score,
+        "confidence": xai_result.get("confidence", 0.6),
+        "why_flagged": why_flagged,
+        "remediation_steps": remediation_steps,
+        "preventive_measures": preventive_measures,
+        "evidence": xai_result.get("evidence", [
+            {
+                "type": "log",
+                "source": anomaly.source,
+                "description": "Rule-based anomaly triggered"
+            }
+        ])
+    }
+
+
+# =====================================================
+# STORAGE
+# =====================================================
+
+def latest_report(db: Session, anomaly_id: str) -> Optional[XAIReport]:
+    return (
+        db.query(XAIReport)
+        .filter(XAIReport.anomaly_id == anomaly_id)
+        .order_by(XAIReport.version.desc())
+        .first()
+    )
+
+
+def store_report(
+    db: Session,
+    anomaly_id: str,
+    evidence: str,
+    report: dict
+) -> XAIReport:
+    current = latest_report(db, anomaly_id)
+    row = XAIReport(
+        anomaly_id=anomaly_id,
+        version=(current.version + 1) if current else 1,
+        evidence_hash=evidence,
+        report_json=json.dumps(report)
+    )
+
+    try:
+        db.add(row)
+        db.commit()
+    except IntegrityError:
+        # a concurrent request stored the same version first
+        db.rollback()
+        return latest_report(db, anomaly_id)
+
+    return row
+
+
+def report_etag(report: XAIReport) -> str:
+    return f'"{report.anomaly_id}-v{report.version}-{report.evidence_hash[:12]}"'
@@ -1,22 +1,279 @@
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, FrozenSet, List, Optional
+
 from fastapi import WebSocket
-from typing import Dict, List
+
+from app.services.pubsub import make_backend
+from config import (
+    WS_SEND_QUEUE_MAX,
+    WS_SEND_TIMEOUT_SECONDS,
+    WS_BATCH_INTERVAL_MS,
+    WS_BATCH_MAX_EVENTS,
+    WS_METRICS_INTERVAL_SECONDS
+)
+
+
+# =====================================================
+# WEBSOCKET BROADCAST HUB
+# =====================================================
+# broadcast() never awaits a socket: each event is serialized
+# once and appended to the bounded queue of every subscriber
+# whose filters match, and a writer task per connection drains
+# its own queue. A slow dashboard therefore only delays itself;
+# when its queue is full the oldest event is dropped. A send
+# that stalls past WS_SEND_TIMEOUT_SECONDS or fails closes that
+# connection.
+#
+# Subscribers receive batched frames
+#   {"kind": "batch", "count": n, "events": [...]}
+# flushed every batch_ms or batch_max events, whichever comes
+# first (batch_ms=0 sends one frame per event, as before).
+#
+# broadcast() goes through the PUBSUB_BACKEND, which delivers
+# to the hub of every API worker (see app/services/pubsub.py).
+# =====================================================
+
+ALL_ENDPOINTS = "*"
+
+# agents also send syslog-style levels; anything unknown ranks as low
+SEVERITY_RANK = {
+    "low": 0, "info": 0, "informational": 0, "debug": 0,
+    "medium": 1, "warning": 1, "warn": 1,
+    "high": 2, "error": 2,
+    "critical": 3, "fatal": 3,
+}
+
+
+def severity_rank(severity) -> int:
+    return SEVERITY_RANK.get(str(severity or "").strip().lower(), 0)
+
+
+@dataclass(frozen=True)
+class Subscription:
+    log_types: Optional[FrozenSet[str]] = None
+    min_severity: Optional[str] = None
+    anomalies_only: bool = False
+    batch_ms: int = WS_BATCH_INTERVAL_MS
+    batch_max: int = WS_BATCH_MAX_EVENTS
+
+    def matches(self, event: dict) -> bool:
+        kind = event.get("kind", "log")
+        if self.anomalies_only and kind != "anomaly":
+            return False
+        if self.log_types is not None:
+            log_type = event.get("source") if kind == "anomaly" else event.get("type")
+            if log_type not in self.log_types:
+                return False
+        if self.min_severity:
+            if severity_rank(event.get("severity")) < severity_rank(self.min_severity):
+                return False
+        return True
+
+    def public(self) -> dict:
+        return {
+            "log_types": sorted(self.log_types) if self.log_types is not None else None,
+            "min_severity": self.min_severity,
+            "anomalies_only": self.anomalies_only,
+            "batch_ms": self.batch_ms,
+            "batch_max": self.batch_max,
+        }
+
+
+class Connection:
+    def __init__(self, websocket: WebSocket, endpoint_id: str, subscription: Subscription, maxsize: int):
+        self.websocket = websocket
+        self.endpoint_id = endpoint_id
+        self.subscription = subscription
+        self.queue: Deque[str] = deque(maxlen=maxsize)
+        self.ready = asyncio.Event()
+        self.full = asyncio.Event()
+        self.sent = 0
+        self.frames = 0
+        self.dropped = 0
+        self.task: asyncio.Task | None = None
+
+    def push(self, event: str):
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1        # deque evicts the oldest event
+        self.queue.append(event)
+        self.ready.set()
+        if len(self.queue) >= self.subscription.batch_max:
+            self.full.set()
+
 
 class WebSocketManager:
-    def __init__(self):
-        self.connections: Dict[str, List[WebSocket]] = {}
+    def __init__(
+        self,
+        queue_max: int = WS_SEND_QUEUE_MAX,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+        metrics_interval: float = WS_METRICS_INTERVAL_SECONDS
+    ):
+        self.queue_max = queue_max
+        self.send_timeout = send_timeout
+        self.metrics_interval = metrics_interval
+        self.backend = make_backend(self._publish)
+        self.connections: Dict[str, Dict[WebSocket, Connection]] = {}
+        self._metrics_sent_at: Dict[str, float] = {}
+
+        self.published = 0
+        self.sent = 0
+        self.frames = 0
+        self.dropped = 0
+        self.filtered = 0
+        self.metrics_downsampled = 0
+        self.send_failures = 0
+
+    async def start(self):
+        await self.backend.start()
+
+    async def stop(self):
+        await self.backend.stop()
 
-    async def connect(self, websocket: WebSocket, endpoint_id: str):
+    async def connect(self, websocket: WebSocket, endpoint_id: str, subscription: Subscription | None = None):
         await websocket.accept()
-        self.connections.setdefault(endpoint_id, []).append(websocket)
+        conn = Connection(websocket, endpoint_id, subscription or Subscription(), self.queue_max)
+        conn.task = asyncio.create_task(self._writer(conn))
+        self.connections.setdefault(endpoint_id, {})[websocket] = conn
 
     def disconnect(self, websocket: WebSocket, endpoint_id: str):
-        if endpoint_id in self.connections:
-            self.connections[endpoint_id].remove(websocket)
-            if not self.connections[endpoint_id]:
-                del self.connections[endpoint_id]
+        conns = self.connections.get(endpoint_id)
+        conn = conns.pop(websocket, None) if conns else None
+        if conns is not None and not conns:
+            del self.connections[endpoint_id]
+        if conn is None:
+            return
+
+        self.dropped += len(conn.queue)
+        conn.queue.clear()
+        if conn.task and conn.task is not asyncio.current_task():
+            conn.task.cancel()
+
+    async def _writer(self, conn: Connection):
+        ws = conn.websocket
+        sub = conn.subscription
+        try:
+            while True:
+                await conn.ready.wait()
+                if sub.batch_ms and not conn.full.is_set():
+                    # let the batch fill up until the interval elapses
+                    try:
+                        await asyncio.wait_for(conn.full.wait(), sub.batch_ms / 1000)
+                    except asyncio.TimeoutError:
+                        pass
+                conn.ready.clear()
+                conn.full.clear()
+
+                while conn.queue:
+                    if sub.batch_ms:
+                        events = [
+                            conn.queue.popleft()
+                            for _ in range(min(sub.batch_max, len(conn.queue)))
+                        ]
+                        frame = (
+                            f'{{"kind": "batch", "count": {len(events)}, '
+                            f'"events": [{", ".join(events)}]}}'
+                        )
+                    else:
+                        events = [conn.queue.popleft()]
+                        frame = events[0]
+
+                    await asyncio.wait_for(ws.send_text(frame), self.send_timeout)
+                    conn.sent += len(events)
+                    conn.frames += 1
+                    self.sent += len(events)
+                    self.frames += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.send_failures += 1
+            print(f"⚠️ WebSocket send to {conn.endpoint_id} failed → {e!r}")
+            self.disconnect(ws, conn.endpoint_id)
+            try:
+                await ws.close()
+            except Exception:
+                pass
+
+    def _downsample(self, endpoint_id: str, items: List[dict]) -> List[dict]:
+        """Keep at most one system_metrics snapshot per endpoint per interval."""
+        if not self.metrics_interval:
+            return items
+
+        kept = []
+        now = time.monotonic()
+        for item in items:
+            if item.get("type") == "system_metrics":
+                last = self._metrics_sent_at.get(endpoint_id)
+                if last is not None and now - last < self.metrics_interval:
+                    self.metrics_downsampled += 1
+                    continue
+                self._metrics_sent_at[endpoint_id] = now
+            kept.append(item)
+        return kept
+
+    def _publish(self, endpoint_id: str, items: List[dict]):
+        self.published += len(items)
+        conns = [
+            *self.connections.get(endpoint_id, {}).values(),
+            *self.connections.get(ALL_ENDPOINTS, {}).values(),
+        ]
+        if not conns:
+            return
+
+        items = self._downsample(endpoint_id, items)
+        # serialized once, shared by every matching subscriber
+        events = [(data, json.dumps(data)) for data in items]
+        for conn in conns:
+            before = conn.dropped
+            for data, event in events:
+                if conn.subscription.matches(data):
+                    conn.push(event)
+                else:
+                    self.filtered += 1
+            self.dropped += conn.dropped - before
 
     async def broadcast(self, endpoint_id: str, data: dict):
-        for ws in self.connections.get(endpoint_id, []):
-            await ws.send_json(data)
+        await self.backend.publish(endpoint_id, [data])
+
+    async def broadcast_many(self, endpoint_id: str, items: List[dict]):
+        await self.backend.publish(endpoint_id, items)
+
+    def stats(self) -> dict:
+        conns = [c for group in self.connections.values() for c in group.values()]
+        depths = [len(c.queue) for c in conns]
+        return {
+            "connections": len(conns),
+            "endpoints": len(self.connections),
+            "queue_max": self.queue_max,
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "published": self.published,
+            "sent": self.sent,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "filtered": self.filtered,
+            "metrics_downsampled": self.metrics_downsampled,
+            "send_failures": self.send_failures,
+            "pubsub": self.backend.stats(),
+            "slowest": sorted(
+                (
+                    {
+                        "endpoint_id": c.endpoint_id,
+                        "queue_depth": len(c.queue),
+                        "sent": c.sent,
+                        "frames": c.frames,
+                        "dropped": c.dropped,
+                        "subscription": c.subscription.public(),
+                    }
+                    for c in conns
+                ),
+                key=lambda c: c["queue_depth"],
+                reverse=True
+            )[:10],
+        }
+
 
 manager = WebSocketManager()
@@ -0,0 +1,211 @@
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+# =====================================================
+# QUERY PLAN AUDIT / LATENCY BENCHMARK
+# =====================================================
+# Seeds N log rows (plus anomalies and links) into a scratch
+# database, then times the hot access paths with the audit
+# indexes dropped and again after creating them.
+#
+#   cd backend
+#   python -m benchmarks.bench_log_queries --rows 1000000
+#   python -m benchmarks.bench_log_queries \
+#       --database-url postgresql://user:pw@localhost/bench
+#
+# Point it at a throwaway database: tables are dropped first.
+# =====================================================
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--database-url", default="sqlite:///bench_logs.db")
+parser.add_argument("--rows", type=int, default=1_000_000)
+parser.add_argument("--anomalies", type=int, default=20_000)
+parser.add_argument("--days", type=int, default=7)
+parser.add_argument("--repeat", type=int, default=5)
+parser.add_argument("--explain", action="store_true")
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = args.database_url
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import Base, engine  # noqa: E402
+from app.models.logs import LogEvent  # noqa: E402
+from app.models.anomalies import Anomaly  # noqa: E402
+from app.models.anomaly_logs import AnomalyLog  # noqa: E402
+
+
+AUDIT_INDEXES = [
+    i for table in (LogEvent.__table__, Anomaly.__table__, AnomalyLog.__table__)
+    for i in table.indexes
+    if i.name in {
+        "ix_log_events_type_timestamp",
+        "ix_log_events_severity_timestamp",
+        "ix_log_events_endpoint_timestamp",
+        "ix_log_events_timestamp_id",
+        "ix_anomaly_logs_log_id",
+        "ix_anomaly_logs_anomaly_id",
+        "ix_anomalies_created_at",
+    }
+]
+
+LOG_TYPES = ["network", "auth", "file", "registry", "service", "usb", "system"]
+SEVERITIES = ["info", "low", "medium", "high", "critical"]
+CHUNK = 10_000
+
+
+# =====================================================
+# SEEDING
+# =====================================================
+
+def seed():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    now = datetime.now(timezone.utc)
+    span = args.days * 86400
+    rng = random.Random(42)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for offset in range(0, args.rows, CHUNK):
+            rows = []
+            for i in range(offset, min(offset + CHUNK, args.rows)):
+                ip = f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+                rows.append({
+                    "timestamp": now - timedelta(seconds=rng.randint(0, span)),
+                    "endpoint_id": f"ep-{rng.randint(1, 300)}",
+                    "log_type": rng.choice(LOG_TYPES),
+                    "source": "bench",
+                    "severity": rng.choice(SEVERITIES),
+                    "message": f"event {i}",
+                    "raw_data": f'{{"src_ip": "{ip}"}}',
+                    "src_ip": ip,
+                })
+            conn.execute(LogEvent.__table__.insert(), rows)
+
+        conn.execute(Anomaly.__table__.insert(), [
+            {
+                "id": f"anom_{i:012d}",
+                "type": "bench",
+                "status": rng.choice(["active", "investigating", "resolved"]),
+                "risk_score": rng.randint(20, 99),
+                "source": "network",
+                "created_at": now - timedelta(seconds=rng.randint(0, span)),
+                "explanation_json": "{}",
+            }
+            for i in range(args.anomalies)
+        ])
+        conn.execute(AnomalyLog.__table__.insert(), [
+            {"anomaly_id": f"anom_{i:012d}", "log_id": rng.randint(1, args.rows)}
+            for i in range(args.anomalies)
+        ])
+
+    print(f"🌱 Seeded {args.rows} logs in {time.perf_counter() - started:.1f}s")
+
+
+# =====================================================
+# QUERIES UNDER TEST
+# =====================================================
+
+def queries():
+    now = datetime.now(timezone.utc)
+    return {
+        "type window (auth, 5m)": (
+            "SELECT id FROM log_events "
+            "WHERE log_type = :t AND timestamp >= :since",
+            {"t": "auth", "since": now - timedelta(minutes=5)},
+        ),
+        "explorer (type, newest 500)": (
+            "SELECT id, timestamp FROM log_events WHERE log_type = :t "
+            "ORDER BY timestamp DESC LIMIT 500",
+            {"t": "network"},
+        ),
+        "explorer (severity, newest 500)": (
+            "SELECT id, timestamp FROM log_events WHERE severity = :s "
+            "ORDER BY timestamp DESC LIMIT 500",
+            {"s": "critical"},
+        ),
+        "explorer (endpoint, newest 500)": (
+            "SELECT id, timestamp FROM log_events WHERE endpoint_id = :e "
+            "ORDER BY timestamp DESC LIMIT 500",
+            {"e": "ep-7"},
+        ),
+        "explorer (all, newest 500)": (
+            "SELECT id, timestamp FROM log_events "
+            "ORDER BY timestamp DESC, id DESC LIMIT 500",
+            {},
+        ),
+        "retention (timestamp < cutoff)": (
+            "SELECT COUNT(*) FROM log_events WHERE timestamp < :cutoff",
+            {"cutoff": now - timedelta(days=max(args.days - 1, 1))},
+        ),
+        "anomaly_logs by log_id": (
+            "SELECT anomaly_id FROM anomaly_logs WHERE log_id = :l",
+            {"l": args.rows // 2},
+        ),
+        "anomaly_logs by anomaly_id": (
+            "SELECT log_id FROM anomaly_logs WHERE anomaly_id = :a",
+            {"a": f"anom_{args.anomalies // 2:012d}"},
+        ),
+        "anomalies newest 100": (
+            "SELECT id FROM anomalies ORDER BY created_at DESC LIMIT 100",
+            {},
+        ),
+    }
+
+
+def explain(conn, sql, params):
+    prefix = (
+        "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite"
+        else "EXPLAIN ANALYZE "
+    )
+    for row in conn.execute(text(prefix + sql), params):
+        print("      ", " | ".join(str(c) for c in row))
+
+
+def run(label):
+    results = {}
+    with engine.connect() as conn:
+        for name, (sql, params) in queries().items():
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                samples.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(samples)
+
+            if args.explain:
+                print(f"   [{label}] {name}")
+                explain(conn, sql, params)
+    return results
+
+
+def main():
+    seed()
+
+    with engine.begin() as conn:
+        for index in AUDIT_INDEXES:
+            index.drop(bind=conn, checkfirst=True)
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE"))
+    before = run("before")
+
+    with engine.begin() as conn:
+        for index in AUDIT_INDEXES:
+            index.create(bind=conn, checkfirst=True)
+        conn.execute(text("ANALYZE"))
+    after = run("after")
+
+    print(f"\n{'query':<36}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<36}{before[name]:>12.2f}{after[name]:>12.2f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+# =====================================================
+# UPLOADED ENTRY BULK INSERT BENCHMARK
+# =====================================================
+# Builds N uploaded-log entries shaped like the frontend's
+# payload and times storing them through:
+#   legacy   Pydantic per row + fromisoformat + bulk_save_objects
+#   records  JSON array   → fast path (executemany / COPY)
+#   ndjson   NDJSON lines → fast path
+#   columnar columnar JSON → fast path
+# Decoding the request body is included in every timing.
+#
+#   cd backend
+#   python -m benchmarks.bench_upload_entries --rows 1000000
+#   python -m benchmarks.bench_upload_entries \
+#       --database-url postgresql://user:pw@localhost/bench
+#
+# Point it at a throwaway database: tables are dropped first.
+# =====================================================
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--database-url", default="sqlite:///bench_upload.db")
+parser.add_argument("--rows", type=int, default=1_000_000)
+parser.add_argument("--legacy-rows", type=int, default=100_000,
+                    help="the legacy path is slow; time it on a smaller sample")
+parser.add_argument("--chunk-size", type=int, default=None)
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = args.database_url
+
+from typing import List  # noqa: E402
+
+from pydantic import BaseModel  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+import app.models.uploaded_logs  # noqa: E402, F401  (FK target for create_all)
+from app.models.uploaded_log_entries import UploadedLogEntry  # noqa: E402
+from app.services.upload_entries import (  # noqa: E402
+    bulk_insert_entries,
+    entry_row,
+    rows_from_columns,
+    rows_from_records,
+    parse_timestamp
+)
+from config import UPLOAD_ENTRIES_CHUNK  # noqa: E402
+
+CHUNK = args.chunk_size or UPLOAD_ENTRIES_CHUNK
+
+
+def make_entries(n):
+    rng = random.Random(7)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": f"{i:x}",
+            "timestamp": (start + timedelta(seconds=i // 20)).isoformat(),
+            "source": rng.choice(["firewall", "sshd", "nginx", "kernel"]),
+            "eventType": rng.choice(["login", "deny", "request", "log_entry"]),
+            "status": rng.choice(["info", "warning", "error"]),
+            "severity": rng.choice(["low", "medium", "high", "critical"]),
+            "message": f"event {i} from bench upload",
+            "fileName": f"bench_{i % 8}.log",
+        }
+        for i in range(n)
+    ]
+
+
+# ---------------- paths under test ----------------
+
+class UploadedLogEntryIn(BaseModel):
+    timestamp: str
+    source: str
+    eventType: str
+    status: str
+    severity: str
+    message: str
+    fileName: str
+
+
+def legacy(db, body: bytes) -> int:
+    logs = [UploadedLogEntryIn.model_validate(x) for x in json.loads(body)]
+    rows: List[UploadedLogEntry] = [
+        UploadedLogEntry(
+            filename=log.fileName,
+            timestamp=datetime.fromisoformat(log.timestamp.replace("Z", "+00:00")),
+            source=log.source,
+            event_type=log.eventType,
+            status=log.status,
+            severity=log.severity,
+            message=log.message
+        )
+        for log in logs
+    ]
+    db.bulk_save_objects(rows)
+    db.commit()
+    return len(rows)
+
+
+def records(db, body: bytes) -> int:
+    return bulk_insert_entries(db, rows_from_records(json.loads(body)), CHUNK)["stored_logs"]
+
+
+def ndjson(db, body: bytes) -> int:
+    rows = (
+        (i, entry_row(json.loads(line)))
+        for i, line in enumerate(body.splitlines()) if line
+    )
+    return bulk_insert_entries(db, rows, CHUNK)["stored_logs"]
+
+
+def columnar(db, body: bytes) -> int:
+    return bulk_insert_entries(db, rows_from_columns(json.loads(body)), CHUNK)["stored_logs"]
+
+
+def to_columns(entries):
+    return {k: [e[k] for e in entries] for k in entries[0]}
+
+
+# =====================================================
+# RUN
+# =====================================================
+
+def timed(name, fn, body, expected):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    parse_timestamp.cache_clear()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        stored = fn(db, body)
+        seconds = time.perf_counter() - started
+    finally:
+        db.close()
+
+    assert stored == expected, f"{name}: stored {stored}, expected {expected}"
+    rate = stored / seconds
+    print(f"{name:<10}{stored:>12,}{seconds:>10.2f}s{rate:>14,.0f} rows/s")
+    return rate
+
+
+def main():
+    entries = make_entries(args.rows)
+    sample = entries[:args.legacy_rows]
+
+    bodies = {
+        "legacy": json.dumps(sample).encode(),
+        "records": json.dumps(entries).encode(),
+        "ndjson": "\n".join(json.dumps(e) for e in entries).encode(),
+        "columnar": json.dumps(to_columns(entries)).encode(),
+    }
+    print(f"📦 {args.rows:,} entries, {len(bodies['records']) / 1e6:.0f} MB as JSON, "
+          f"chunk size {CHUNK:,} on {engine.dialect.name}/{engine.dialect.driver}\n")
+
+    print(f"{'path':<10}{'rows':>12}{'time':>11}{'throughput':>14}")
+    rates = {
+        "legacy": timed("legacy", legacy, bodies["legacy"], len(sample)),
+        "records": timed("records", records, bodies["records"], len(entries)),
+        "ndjson": timed("ndjson", ndjson, bodies["ndjson"], len(entries)),
+        "columnar": timed("columnar", columnar, bodies["columnar"], len(entries)),
+    }
+
+    print()
+    for name in ("records", "ndjson", "columnar"):
+        print(f"{name:<10} {rates[name] / rates['legacy']:.1f}x legacy throughput")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,103 @@
+import os
+
 # ===============================
 # RETENTION POLICY
 # ===============================
 DB_RETENTION_DAYS = 7          # delete from DB
-ARCHIVE_RETENTION_DAYS = 30    # keep zip files
+ARCHIVE_RETENTION_DAYS = 30    # keep archive files
+RETENTION_CHUNK_SIZE = 5000    # logs archived + deleted per transaction
 
 # ===============================
 # ARCHIVE STORAGE
 # ===============================
 ARCHIVE_DIR = "archives"
 MIN_FREE_DISK_GB = 2
+
+# ===============================
+# INGEST
+# ===============================
+INGEST_BATCH_MAX = 5000        # events per /api/logs/ingest/batch call
+
+# ===============================
+# DETECTION PIPELINE
+# ===============================
+DETECTION_QUEUE_MAX = 10000       # queued ingest batches before dropping
+DETECTION_WORKER_THREADS = 4      # used when no worker processes
+DETECTION_WORKER_PROCESSES = 0    # >0 runs rules in a process pool
+SLIDING_WINDOW_WARMUP = True      # rebuild rule counters from DB on start
+
+# ===============================
+# WEBSOCKET FAN-OUT
+# ===============================
+WS_SEND_QUEUE_MAX = 1000          # frames buffered per connection (oldest dropped)
+WS_SEND_TIMEOUT_SECONDS = 10      # a send stalled this long closes the socket
+WS_BATCH_INTERVAL_MS = 250        # default flush interval for batched frames (0 = per event)
+WS_BATCH_MAX_EVENTS = 200         # flush early once a batch holds this many events
+WS_METRICS_INTERVAL_SECONDS = 15  # system_metrics snapshots forwarded per endpoint
+
+# ===============================
+# LIVE-FEED PUB/SUB (multi-worker fan-out)
+# ===============================
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "memory")   # memory | socket | redis
+PUBSUB_SOCKET_HOST = "127.0.0.1"  # local broker shared by all workers
+PUBSUB_SOCKET_PORT = int(os.getenv("PUBSUB_SOCKET_PORT", "8765"))
+PUBSUB_SOCKET_AUTOSTART = True    # first worker hosts the broker if none is running
+PUBSUB_REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+PUBSUB_CHANNEL = "cyber_sentinel:live"
+PUBSUB_QUEUE_MAX = 10000          # messages queued per publisher / broker client
+PUBSUB_SEND_TIMEOUT_SECONDS = 5   # a peer stalled this long is disconnected
+
+# ===============================
+# ANOMALY DEDUP
+# ===============================
+ANOMALY_DEDUP_CACHE_SIZE = 50000  # recent dedup keys kept in memory
+ANOMALY_STATS_TTL_SECONDS = 5     # resync /api/anomalies/stats rollup from DB
+
+# ===============================
+# XAI (LLM EXPLANATIONS)
+# ===============================
+XAI_PROVIDER = os.getenv("XAI_PROVIDER", "gemini")   # gemini | stub
+XAI_MAX_CONCURRENCY = 4           # provider calls in flight
+XAI_REQUESTS_PER_MINUTE = 30      # provider call budget
+XAI_TIMEOUT_SECONDS = 30          # wait for a slot / the provider
+XAI_TOKENS_PER_MINUTE = 60000     # pre-generation token budget
+XAI_EXPECTED_OUTPUT_TOKENS = 800  # added to each prompt's estimate
+XAI_BACKFILL_LIMIT = 500          # anomalies without a report queued on start
+XAI_BACKFILL_CLAIM_SECONDS = 600  # one API process runs the backfill per window
+XAI_MAX_ATTEMPTS = 3              # pre-generation tries per group before giving up
+XAI_RETRY_BACKOFF_SECONDS = 30    # first retry delay, doubled per attempt
+
+# ===============================
+# REPORT JOBS
+# ===============================
+REPORT_WORKER_PROCESSES = 2       # PDF rendering processes
+REPORT_JOB_TTL_HOURS = 24         # jobs and their PDFs are deleted after this
+REPORT_JOB_TIMEOUT_SECONDS = 600  # a job still running after this is failed
+
+# ===============================
+# LOG ROLLUPS
+# ===============================
+ROLLUP_INTERVAL_SECONDS = 10      # compactor wake-up interval
+ROLLUP_LAG_SECONDS = 5            # leave the newest logs for the next pass
+ROLLUP_CHUNK_SIZE = 50000         # logs folded into rollups per transaction
+ROLLUP_MINUTE_RETENTION_HOURS = 48  # 1m rows kept; older ranges use 1h rows
+
+# ===============================
+# SYSTEM METRICS (time series, not log_events)
+# ===============================
+METRICS_COMPACT_INTERVAL_SECONDS = 30   # 5s snapshots → 1m / 1h rollups
+METRICS_CHUNK_SIZE = 20000              # snapshots folded per transaction
+METRICS_RAW_RETENTION_HOURS = 24        # keep raw 5s snapshots this long
+METRICS_MINUTE_RETENTION_DAYS = 14      # keep 1m rollups this long
+METRICS_HOUR_RETENTION_DAYS = 365       # keep 1h rollups this long
+METRICS_MAX_POINTS = 1000               # /api/metrics picks a resolution under this
+
+# ===============================
+# FILE UPLOADS
+# ===============================
+UPLOAD_DIR = "uploads"            # content-addressed evidence store
+UPLOAD_CHUNK_BYTES = 1024 * 1024  # read/write/hash granularity
+UPLOAD_PARSE_BATCH = 5000         # parsed entries per INSERT
+UPLOAD_JSON_MAX_ELEMENT_CHARS = 8 * 1024 * 1024  # largest element of an uploaded JSON array
+UPLOAD_ENTRIES_CHUNK = 10000      # rows per executemany/COPY on /api/upload/entries
+DETECTION_UPLOAD_CHUNK = 5000     # uploaded entries per progress commit in batch detection
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# tests import the backend the way uvicorn does: from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+)
+os.environ.setdefault("XAI_PROVIDER", "stub")
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import Base, SessionLocal, engine
+from app.models.anomalies import Anomaly
+from app.models.anomaly_logs import AnomalyLog
+from app.models.logs import LogEvent
+from app.routes import anomalies
+
+
+@pytest.fixture(scope="module")
+def client():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(30):
+        db.add(LogEvent(id=i + 1, timestamp=start, endpoint_id="e", log_type="auth"))
+        db.add(Anomaly(
+            id=f"anom_{i:03d}", type="brute_force", status="active", risk_score=50,
+            source="auth", dedup_key=f"k{i}", created_at=start + timedelta(minutes=i),
+            explanation_json='{"summary": "x"}'
+        ))
+        # uneven fan-out: the statement count must not depend on it
+        for _ in range(i % 4):
+            db.add(AnomalyLog(anomaly_id=f"anom_{i:03d}", log_id=i + 1))
+    db.commit()
+    db.close()
+
+    app = FastAPI()
+    app.include_router(anomalies.router)
+    yield TestClient(app)
+
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def statements():
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def test_page_runs_a_constant_number_of_statements(client, statements):
+    counts = []
+    cursor = None
+    pages = 0
+    while True:
+        statements.clear()
+        params = {"limit": 7, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/anomalies", params=params)
+        assert response.status_code == 200
+        counts.append(len(statements))
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert pages == 5
+    # anomalies page + one grouped relatedLogs lookup, whatever the page holds
+    assert set(counts) == {2}
+
+
+def test_statement_count_does_not_grow_with_page_size(client, statements):
+    per_limit = {}
+    for limit in (1, 10, 30):
+        statements.clear()
+        response = client.get("/api/anomalies", params={"limit": limit})
+        assert len(response.json()) == limit
+        per_limit[limit] = len(statements)
+
+    assert len(set(per_limit.values())) == 1
+
+
+def test_related_logs_are_grouped_per_anomaly(client):
+    items = client.get("/api/anomalies", params={"limit": 30}).json()
+    by_id = {item["id"]: item for item in items}
+    assert by_id["anom_003"]["relatedLogs"] == ["4", "4", "4"]
+    assert by_id["anom_004"]["relatedLogs"] == []
@@ -0,0 +1,43 @@
+from app.services.anomaly_stats import AnomalyStatsRollup
+
+
+class GroupByDuring:
+    """Stands in for the session: runs `during` while the GROUP BY is in flight."""
+
+    def __init__(self, rows, during=lambda: None):
+        self.rows = rows
+        self.during = during
+
+    def query(self, *columns):
+        return self
+
+    def group_by(self, *columns):
+        return self
+
+    def all(self):
+        self.during()
+        return self.rows
+
+
+def test_updates_during_a_reload_are_kept():
+    stats = AnomalyStatsRollup(ttl_seconds=60)
+
+    def concurrent_writes():
+        stats.on_created("active", 90)
+        stats.on_status_changed("active", "resolved")
+        stats.on_created("active", 30)
+
+    snapshot = stats.snapshot(GroupByDuring([("active", 2, 40)], concurrent_writes))
+
+    assert snapshot["active"] == 3
+    assert snapshot["resolved"] == 1
+    assert snapshot["avgRisk"] == round(160 / 4)
+
+
+def test_invalidate_during_a_reload_forces_another():
+    stats = AnomalyStatsRollup(ttl_seconds=60)
+
+    stats.snapshot(GroupByDuring([("active", 1, 10)], stats.invalidate))
+    snapshot = stats.snapshot(GroupByDuring([("active", 5, 50)]))
+
+    assert snapshot["active"] == 5
@@ -0,0 +1,28 @@
+import threading
+
+from app.database import Base, SessionLocal, engine
+from app.models.job_checkpoints import JobCheckpoint
+from app.services.checkpoints import lock_checkpoint, save_checkpoint
+
+
+def test_second_worker_waits_for_the_first_to_commit():
+    Base.metadata.create_all(bind=engine, tables=[JobCheckpoint.__table__])
+    first, second = SessionLocal(), SessionLocal()
+    seen = []
+
+    try:
+        assert lock_checkpoint(first, "test_job") == 0
+
+        waiter = threading.Thread(target=lambda: seen.append(lock_checkpoint(second, "test_job")))
+        waiter.start()
+        waiter.join(timeout=0.5)
+        assert waiter.is_alive() and not seen   # blocked on the held row
+
+        save_checkpoint(first, "test_job", 42)
+        first.commit()
+        waiter.join(timeout=5)
+        assert seen == [42]                     # resumes after the first chunk
+    finally:
+        second.rollback()
+        first.close()
+        second.close()
@@ -0,0 +1,70 @@
+import asyncio
+import socket
+
+import pytest
+
+from app.services.pubsub import SocketBackend, _RemoteBackend
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_for(condition, timeout=5):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.02)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_remote_backend_must_implement_send():
+    with pytest.raises(TypeError):
+        _RemoteBackend(lambda endpoint_id, items: None)
+
+
+def test_backends_relay_through_the_broker_and_fail_over():
+    async def scenario():
+        port = free_port()
+        received = {"a": [], "b": [], "c": []}
+        backends = {
+            name: SocketBackend(
+                lambda endpoint_id, items, name=name: received[name].extend(items),
+                host="127.0.0.1",
+                port=port,
+                autostart=True
+            )
+            for name in received
+        }
+        a, b, c = backends.values()
+        try:
+            # the first backend to start hosts the broker, the others join it
+            for backend in (a, b, c):
+                await backend.start()
+            assert a.broker and not b.broker and not c.broker
+            await wait_for(lambda: len(a.broker.clients) == 3)
+
+            await b.publish("ep-1", [{"id": 1}])
+            await wait_for(lambda: all(received.values()))
+            assert received == {name: [{"id": 1}] for name in received}
+            assert b.publish_failures == 0
+
+            # the hosting worker goes away: one survivor takes over the
+            # broker and the other reconnects to it
+            await a.stop()
+            await wait_for(lambda: b.reconnects and c.reconnects)
+            await wait_for(lambda: b.connected and c.connected)
+            assert bool(b.broker) != bool(c.broker)
+            host = b.broker or c.broker
+            await wait_for(lambda: len(host.clients) == 2)
+
+            await c.publish("ep-1", [{"id": 2}])
+            await wait_for(lambda: {"id": 2} in received["b"] and {"id": 2} in received["c"])
+            assert c.publish_failures == 0
+            assert {"id": 2} not in received["a"]
+        finally:
+            for backend in backends.values():
+                await backend.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,20 @@
+from datetime import datetime, timedelta, timezone
+
+from app.services.sliding_window import count_window, record_log
+
+
+def test_window_is_measured_on_the_log_clock():
+    # a backlog: the logs are evaluated well after they were stamped
+    start = datetime.now(timezone.utc) - timedelta(minutes=30)
+    for second in range(5):
+        record_log("auth", "203.0.113.9", start + timedelta(seconds=second))
+
+    at = start + timedelta(seconds=4)
+    assert count_window("auth", "203.0.113.9", 2, at) == 5
+    assert count_window("auth", "203.0.113.9", 2, at + timedelta(minutes=3)) == 0
+
+
+def test_naive_timestamps_are_utc():
+    ts = datetime(2026, 3, 1, 12, 0, 0)
+    record_log("network", "198.51.100.4", ts)
+    assert count_window("network", "198.51.100.4", 1, ts.replace(tzinfo=timezone.utc)) == 1
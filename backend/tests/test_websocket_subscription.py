@@ -0,0 +1,29 @@
+import pytest
+
+from app.websocket_manager import Subscription, severity_rank
+
+
+def log(severity, log_type="registry"):
+    return {"kind": "log", "type": log_type, "severity": severity}
+
+
+@pytest.mark.parametrize("severity, rank", [
+    ("info", 0), ("low", 0), ("warning", 1), ("Warning", 1), ("medium", 1),
+    ("error", 2), ("HIGH", 2), ("critical", 3), (None, 0), ("bogus", 0),
+])
+def test_agent_severities_are_ranked(severity, rank):
+    assert severity_rank(severity) == rank
+
+
+def test_min_severity_keeps_agent_warnings():
+    sub = Subscription(min_severity="medium")
+    assert sub.matches(log("warning"))
+    assert sub.matches(log("WARNING", "usb"))
+    assert sub.matches(log("error", "defender"))
+    assert not sub.matches(log("info", "service"))
+
+
+def test_min_severity_is_case_insensitive():
+    sub = Subscription(min_severity="High")
+    assert sub.matches(log("critical"))
+    assert not sub.matches(log("warning"))
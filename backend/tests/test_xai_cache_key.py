@@ -0,0 +1,60 @@
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.anomalies import Anomaly
+from app.services.anomaly_detector import rule_based_explanation
+from app.services.xai_engine import XAIProvider, build_payload, payload_hash
+from app.services.xai_reports import xai_payload
+
+
+def payload(anomaly_id, detected_at, log_time, message="4 failed logins for admin", rule="R-AUTH-1"):
+    return build_payload(
+        anomaly={"id": anomaly_id, "type": "brute_force", "risk_score": 80, "detected_at": detected_at},
+        entities={"source": "auth", "anomaly_type": "brute_force"},
+        signals=[
+            {"name": "rule_id", "value": rule},
+            {"name": "failures", "value": 4},
+            {"name": "timestamp", "value": log_time},
+        ],
+        logs=[{"timestamp": log_time, "source": "auth", "message": message}],
+    )
+
+
+def anomaly(anomaly_id, ip, ts):
+    signals = {"message": "Failed password", "ip": ip, "user": "root",
+               "log_type": "auth", "timestamp": ts, "rule_id": "AUTH-001"}
+    return Anomaly(
+        id=anomaly_id, type="auth_failure", risk_score=40, source="auth",
+        created_at=datetime.now(timezone.utc),
+        explanation_json=json.dumps(rule_based_explanation(SimpleNamespace(log_type="auth"), signals)),
+    )
+
+
+def test_repeats_of_one_finding_share_a_key():
+    first = payload("anom_a", "2026-01-01T00:00:00", "2026-01-01T00:00:00")
+    repeat = payload("anom_b", "2026-01-02T09:30:00", "2026-01-02T09:29:58")
+    assert payload_hash(first) == payload_hash(repeat)
+
+
+def test_content_changes_the_key():
+    base = payload_hash(payload("anom_a", "t", "t"))
+    assert payload_hash(payload("anom_a", "t", "t", rule="R-AUTH-2")) != base
+    assert payload_hash(payload("anom_a", "t", "t", message="9 failed logins for root")) != base
+
+
+def test_provider_must_implement_generate():
+    with pytest.raises(TypeError):
+        XAIProvider()
+
+
+def test_rule_signals_reach_the_payload_and_the_key():
+    first = xai_payload(anomaly("anom_a", "10.0.0.1", "2026-01-01T00:00:00"), [])
+    repeat = xai_payload(anomaly("anom_b", "10.0.0.1", "2026-01-02T00:00:00"), [])
+    other_ip = xai_payload(anomaly("anom_c", "10.0.0.2", "2026-01-01T00:00:00"), [])
+
+    assert {"name": "ip", "value": "10.0.0.1"} in first["signals"]
+    assert payload_hash(first) == payload_hash(repeat)
+    assert payload_hash(first) != payload_hash(other_ip)
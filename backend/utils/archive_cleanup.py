@@ -1,5 +1,9 @@
 import os, time
 from config import ARCHIVE_DIR, ARCHIVE_RETENTION_DAYS
+from utils.log_archiver import ARCHIVE_EXT
+
+# .zip: CSV + JSON archives written before the gzipped NDJSON ones
+ARCHIVE_EXTENSIONS = (ARCHIVE_EXT, ".zip")
 
 
 def cleanup_old_archives():
@@ -8,5 +12,5 @@ def cleanup_old_archives():
     for file in os.listdir(ARCHIVE_DIR):
         path = os.path.join(ARCHIVE_DIR, file)
 
-        if file.endswith(".zip") and os.path.getmtime(path) < cutoff:
+        if file.endswith(ARCHIVE_EXTENSIONS) and os.path.getmtime(path) < cutoff:
             os.remove(path)
@@ -0,0 +1,68 @@
+import argparse
+import json
+
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models.anomalies import Anomaly
+
+
+# =====================================================
+# BACKFILL anomalies.summary FROM explanation_json
+# =====================================================
+# Anomalies created before the summary column existed only
+# carry it inside explanation_json. Walks them in id order and
+# copies it out in chunks, committing after each chunk.
+# =====================================================
+
+def backfill_anomaly_summaries(db, chunk_size=2000):
+    last_id = ""
+    updated = 0
+
+    while True:
+        rows = (
+            db.query(Anomaly.id, Anomaly.explanation_json)
+            .filter(
+                Anomaly.id > last_id,
+                Anomaly.summary.is_(None),
+                Anomaly.explanation_json.isnot(None)
+            )
+            .order_by(Anomaly.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        params = []
+        for anomaly_id, explanation_json in rows:
+            try:
+                summary = json.loads(explanation_json).get("summary")
+            except (TypeError, ValueError, AttributeError):
+                summary = None
+            params.append({"id": anomaly_id, "summary": summary or ""})
+
+        db.execute(update(Anomaly), params)
+        db.commit()
+
+        updated += len(params)
+        last_id = rows[-1].id
+        print(f"🔁 Backfilled summaries up to {last_id} ({updated} rows updated)")
+
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    from app.models import logs, anomaly_logs  # noqa: F401
+    from utils.schema_migrations import run_migrations
+    run_migrations()
+
+    db = SessionLocal()
+    try:
+        backfill_anomaly_summaries(db, args.chunk_size)
+    finally:
+        db.close()
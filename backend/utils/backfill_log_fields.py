@@ -0,0 +1,68 @@
+import argparse
+
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models.logs import LogEvent
+from app.services.log_ingest import extract_fields
+
+
+# =====================================================
+# BACKFILL PROMOTED COLUMNS FOR EXISTING LOG ROWS
+# =====================================================
+# Walks log_events in id order, re-parses raw_data once per
+# row and writes src_ip / dst_ip / username / event_id /
+# raw_json in chunks, committing after each chunk so a crash
+# can resume with --start-id.
+# =====================================================
+
+def backfill_log_fields(db, chunk_size=5000, start_id=0):
+    last_id = start_id
+    updated = 0
+
+    while True:
+        rows = (
+            db.query(LogEvent.id, LogEvent.raw_data)
+            .filter(
+                LogEvent.id > last_id,
+                LogEvent.raw_data.isnot(None),
+                LogEvent.raw_json.is_(None)
+            )
+            .order_by(LogEvent.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        params = []
+        for log_id, raw_data in rows:
+            fields = extract_fields(raw_data)
+            if fields["raw_json"] is not None:
+                params.append({"id": log_id, **fields})
+
+        if params:
+            db.execute(update(LogEvent), params)
+        db.commit()
+
+        updated += len(params)
+        last_id = rows[-1].id
+        print(f"🔁 Backfilled up to id {last_id} ({updated} rows updated)")
+
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--start-id", type=int, default=0)
+    args = parser.parse_args()
+
+    from utils.schema_migrations import run_migrations
+    run_migrations()
+
+    db = SessionLocal()
+    try:
+        backfill_log_fields(db, args.chunk_size, args.start_id)
+    finally:
+        db.close()
@@ -0,0 +1,63 @@
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models.uploaded_logs import UploadedLog
+from app.models.uploaded_log_entries import UploadedLogEntry
+from app.services.upload_detection import register_entries_upload
+
+
+# =====================================================
+# BACKFILL uploaded_logs entry stats
+# =====================================================
+# GET /api/upload/files reads entry_count and the first/last
+# entry timestamps from uploaded_logs. Uploads stored before
+# those were kept get them from one pass over their entries;
+# files posted as parsed entries without an upload record get
+# one (register_entries_upload adopts their entries).
+# =====================================================
+
+def backfill_upload_file_stats(db):
+    stats = (
+        db.query(
+            UploadedLogEntry.upload_id,
+            func.count(UploadedLogEntry.id),
+            func.min(UploadedLogEntry.timestamp),
+            func.max(UploadedLogEntry.timestamp)
+        )
+        .filter(UploadedLogEntry.upload_id.isnot(None))
+        .group_by(UploadedLogEntry.upload_id)
+        .all()
+    )
+    for upload_id, count, first, last in stats:
+        upload = db.get(UploadedLog, upload_id)
+        if upload is not None:
+            upload.entry_count = count
+            upload.first_timestamp = first
+            upload.last_timestamp = last
+    db.commit()
+    print(f"🔁 Backfilled entry stats for {len(stats)} uploads")
+
+    orphans = [
+        filename for filename, in
+        db.query(UploadedLogEntry.filename)
+        .filter(UploadedLogEntry.upload_id.is_(None))
+        .distinct()
+        .all()
+    ]
+    for filename in orphans:
+        register_entries_upload(db, filename)
+    print(f"🔁 Registered {len(orphans)} files posted as parsed entries")
+
+    return len(stats) + len(orphans)
+
+
+if __name__ == "__main__":
+    from app.models import anomalies, anomaly_logs, logs  # noqa: F401
+    from utils.schema_migrations import run_migrations
+    run_migrations()
+
+    db = SessionLocal()
+    try:
+        backfill_upload_file_stats(db)
+    finally:
+        db.close()
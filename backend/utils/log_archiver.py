@@ -1,9 +1,22 @@
-import os, csv, json, zipfile, shutil
+import os, json, gzip, shutil
 from datetime import datetime
 from config import ARCHIVE_DIR, MIN_FREE_DISK_GB
 
 os.makedirs(ARCHIVE_DIR, exist_ok=True)
 
+ARCHIVE_EXT = ".jsonl.gz"
+
+ARCHIVE_FIELDS = (
+    "id",
+    "timestamp",
+    "endpoint_id",
+    "log_type",
+    "source",
+    "severity",
+    "message",
+    "raw_data"
+)
+
 
 def enough_disk_space():
     free = shutil.disk_usage(ARCHIVE_DIR).free / (1024**3)
@@ -14,71 +27,74 @@ def archive_date_name():
     return datetime.utcnow().date().isoformat()  # YYYY-MM-DD
 
 
-def archive_to_csv(logs):
-    date = archive_date_name()
-    csv_name = f"logs_{date}.csv"
-    csv_path = os.path.join(ARCHIVE_DIR, csv_name)
-
-    with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "id",
-            "timestamp",
-            "endpoint_id",
-            "log_type",
-            "source",
-            "severity",
-            "message",
-            "raw_data"
-        ])
-
-        for l in logs:
-            writer.writerow([
-                l.id,
-                l.timestamp.isoformat(),
-                l.endpoint_id,
-                l.log_type,
-                l.source,
-                l.severity,
-                l.message,
-                l.raw_data
-            ])
-
-    return csv_path
-
-
-def archive_to_json(logs):
-    date = archive_date_name()
-    json_name = f"logs_{date}.json"
-    json_path = os.path.join(ARCHIVE_DIR, json_name)
-
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(
-            [{
-                "id": l.id,
-                "timestamp": l.timestamp.isoformat(),
-                "endpoint_id": l.endpoint_id,
-                "log_type": l.log_type,
-                "source": l.source,
-                "severity": l.severity,
-                "message": l.message,
-                "raw_data": l.raw_data
-            } for l in logs],
-            f,
-            indent=2
-        )
-
-    return json_path
-
-
-def zip_and_cleanup(csv_path, json_path):
-    zip_path = csv_path.replace(".csv", ".zip")
-
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
-        z.write(csv_path, arcname=os.path.basename(csv_path))
-        z.write(json_path, arcname=os.path.basename(json_path))
-
-    os.remove(csv_path)
-    os.remove(json_path)
-
-    return zip_path
+def archive_path():
+    return os.path.join(ARCHIVE_DIR, f"logs_{archive_date_name()}{ARCHIVE_EXT}")
+
+
+# =====================================================
+# GZIPPED NDJSON ARCHIVES
+# =====================================================
+# One JSON object per log line. Every chunk is appended as its
+# own gzip member (gzip / zcat read them back as one stream)
+# and fsynced before the caller deletes it from the DB.
+# A torn member would make every later member of the file
+# unreadable, so the size before each append is recorded in a
+# ".pending" marker: a failed append is truncated back right
+# away, and one cut short by a crash is truncated back by
+# repair_partial_chunks before the next run appends.
+# =====================================================
+
+PENDING_EXT = ".pending"
+
+
+def _fsync_write(path, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _truncate(path, size):
+    with open(path, "r+b") as f:
+        f.truncate(size)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def repair_partial_chunks():
+    repaired = 0
+    for name in os.listdir(ARCHIVE_DIR):
+        if not name.endswith(PENDING_EXT):
+            continue
+        marker = os.path.join(ARCHIVE_DIR, name)
+        path = marker[:-len(PENDING_EXT)]
+        with open(marker, "rb") as f:
+            size = int(f.read() or 0)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            _truncate(path, size)
+            repaired += 1
+        os.remove(marker)
+    return repaired
+
+
+def append_chunk(path, rows):
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    marker = path + PENDING_EXT
+    _fsync_write(marker, str(size).encode())
+
+    try:
+        with open(path, "ab") as f:
+            with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                for row in rows:
+                    record = dict(zip(ARCHIVE_FIELDS, row))
+                    record["timestamp"] = record["timestamp"].isoformat()
+                    gz.write(json.dumps(record).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        _truncate(path, size)
+        os.remove(marker)
+        raise
+
+    os.remove(marker)
+    return path
@@ -1,39 +1,91 @@
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
 from app.models.logs import LogEvent
-from config import DB_RETENTION_DAYS
+from app.services.checkpoints import load_checkpoint, lock_checkpoint, save_checkpoint
+from app.services.log_rollups import CHECKPOINT as ROLLUP_CHECKPOINT
+from config import DB_RETENTION_DAYS, RETENTION_CHUNK_SIZE
 from utils.log_archiver import (
-    archive_to_csv,
-    archive_to_json,
-    zip_and_cleanup,
-    enough_disk_space
+    ARCHIVE_FIELDS,
+    archive_path,
+    append_chunk,
+    enough_disk_space,
+    repair_partial_chunks
 )
 
+CHECKPOINT = "log_retention"
 
-def archive_and_delete_logs(db):
-    if not enough_disk_space():
-        print("⚠️ Low disk space, skipping archive")
-        return 0
 
+# =====================================================
+# INCREMENTAL RETENTION
+# =====================================================
+# Walks expired logs in id order, RETENTION_CHUNK_SIZE at a
+# time: each chunk is appended to the day's archive, then
+# deleted together with the checkpoint in one transaction.
+# A crash resumes from the checkpoint; at worst the chunk that
+# was in flight is archived twice, never lost. The checkpoint
+# row stays locked per chunk, so archivers in other API
+# processes wait their turn. Logs not yet folded into
+# log_rollups are left for the next run.
+# =====================================================
+
+def archive_and_delete_logs(db, chunk_size=RETENTION_CHUNK_SIZE):
     cutoff = datetime.now(timezone.utc) - timedelta(days=DB_RETENTION_DAYS)
 
-    logs = (
-        db.query(LogEvent)
+    # newest expired log, bounded so the last chunk never scans live rows
+    upper = (
+        db.query(func.max(LogEvent.id))
         .filter(LogEvent.timestamp < cutoff)
-        .all()
+        .scalar()
     )
-
-    if not logs:
+    if upper is None:
         return 0
+    upper = min(upper, load_checkpoint(db, ROLLUP_CHECKPOINT))
 
-    csv_path = archive_to_csv(logs)
-    json_path = archive_to_json(logs)
-    zip_and_cleanup(csv_path, json_path)
+    # a chunk cut short by a crash is still in the DB: drop its torn
+    # gzip member so the rest of that day's archive stays readable
+    if repair_partial_chunks():
+        print("⚠️ Truncated a partially written archive chunk")
 
-    deleted = (
-        db.query(LogEvent)
-        .filter(LogEvent.timestamp < cutoff)
-        .delete(synchronize_session=False)
-    )
+    columns = [getattr(LogEvent, field) for field in ARCHIVE_FIELDS]
+    deleted = 0
+
+    while True:
+        if not enough_disk_space():
+            print("⚠️ Low disk space, pausing archive")
+            break
+
+        last_id = lock_checkpoint(db, CHECKPOINT)
+        rows = (
+            db.query(*columns)
+            .filter(
+                LogEvent.id > last_id,
+                LogEvent.id <= upper,
+                LogEvent.timestamp < cutoff
+            )
+            .order_by(LogEvent.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            # sweep finished: the next one starts over, picking up logs
+            # with older ids whose timestamps expired since
+            save_checkpoint(db, CHECKPOINT, 0)
+            db.commit()
+            break
+
+        append_chunk(archive_path(), rows)
+
+        first_id, last_id = rows[0].id, rows[-1].id
+        deleted += (
+            db.query(LogEvent)
+            .filter(
+                LogEvent.id >= first_id,
+                LogEvent.id <= last_id,
+                LogEvent.timestamp < cutoff
+            )
+            .delete(synchronize_session=False)
+        )
+        save_checkpoint(db, CHECKPOINT, last_id)
+        db.commit()
 
-    db.commit()
     return deleted
@@ -0,0 +1,61 @@
+import argparse
+
+from app.database import SessionLocal
+from app.models.logs import LogEvent
+from app.services.system_metrics import LOG_TYPE, metric_row, store_samples
+
+
+# =====================================================
+# MOVE system_metrics OUT OF log_events
+# =====================================================
+# Snapshots ingested before the metrics table existed sit in
+# log_events as JSON text. Walks them in id order, writes each
+# chunk to system_metrics as "5s" rows and deletes it from
+# log_events in the same transaction. The compactor then folds
+# them into the 1m / 1h rollups.
+# =====================================================
+
+def move_system_metrics(db, chunk_size=5000):
+    last_id = 0
+    moved = 0
+
+    while True:
+        rows = (
+            db.query(LogEvent.id, LogEvent.endpoint_id, LogEvent.timestamp, LogEvent.raw_data)
+            .filter(LogEvent.log_type == LOG_TYPE, LogEvent.id > last_id)
+            .order_by(LogEvent.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        store_samples(db, [
+            metric_row(r.endpoint_id, r.raw_data, r.timestamp) for r in rows
+        ])
+        db.query(LogEvent).filter(
+            LogEvent.id.in_([r.id for r in rows])
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        moved += len(rows)
+        last_id = rows[-1].id
+        print(f"📈 Moved metrics up to log {last_id} ({moved} snapshots)")
+
+    return moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    from app.models import anomalies, anomaly_logs, job_checkpoints, system_metrics  # noqa: F401
+    from utils.schema_migrations import run_migrations
+    run_migrations()
+
+    db = SessionLocal()
+    try:
+        move_system_metrics(db, args.chunk_size)
+    finally:
+        db.close()
@@ -0,0 +1,24 @@
+import asyncio
+
+from app.services.pubsub import SocketBroker
+from config import PUBSUB_SOCKET_HOST, PUBSUB_SOCKET_PORT
+
+
+# =====================================================
+# STANDALONE LIVE-FEED BROKER (PUBSUB_BACKEND=socket)
+# =====================================================
+# API workers host the broker themselves when none is running;
+# run it on its own so worker restarts never drop the relay:
+#   cd backend
+#   python -m utils.pubsub_broker
+# =====================================================
+
+async def main():
+    broker = SocketBroker()
+    await broker.start(PUBSUB_SOCKET_HOST, PUBSUB_SOCKET_PORT)
+    print(f"📡 Pub/sub broker listening on {PUBSUB_SOCKET_HOST}:{PUBSUB_SOCKET_PORT}")
+    await broker.server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+from sqlalchemy import inspect, text
+
+from app.database import Base, engine
+
+
+# =====================================================
+# ADDITIVE SCHEMA MIGRATIONS
+# =====================================================
+# create_all() only creates missing tables. This brings an
+# existing database up to the models by adding any missing
+# columns and indexes. It never drops or rewrites anything,
+# so it is safe to run on every startup.
+# =====================================================
+
+def _add_missing_columns(conn, table):
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    preparer = conn.dialect.identifier_preparer
+    added = []
+
+    for column in table.columns:
+        if column.name in existing:
+            continue
+
+        conn.execute(text(
+            f"ALTER TABLE {preparer.format_table(table)} "
+            f"ADD COLUMN {preparer.format_column(column)} "
+            f"{column.type.compile(dialect=conn.dialect)}"
+        ))
+        added.append(f"{table.name}.{column.name}")
+
+    return added
+
+
+def _add_missing_indexes(conn, table):
+    existing = {i["name"] for i in inspect(conn).get_indexes(table.name)}
+    added = []
+
+    for index in table.indexes:
+        if index.name in existing:
+            continue
+        index.create(bind=conn, checkfirst=True)
+        added.append(index.name)
+
+    return added
+
+
+def run_migrations(bind=engine):
+    changes = []
+
+    with bind.begin() as conn:
+        tables = set(inspect(conn).get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            changes += _add_missing_columns(conn, table)
+            changes += _add_missing_indexes(conn, table)
+
+    for change in changes:
+        print(f"🛠️ Schema migration applied: {change}")
+
+    return changes
+
+
+if __name__ == "__main__":
+    # register every model on Base
+    from app.models import (  # noqa: F401
+        logs, anomalies, anomaly_logs, uploaded_logs, uploaded_log_entries,
+        xai_cache, xai_reports, log_rollups, job_checkpoints, system_metrics,
+        report_jobs
+    )
+
+    run_migrations()
@@ -7,6 +7,8 @@ interface SystemChartProps {
   maxValue?: number;
   color?: 'primary' | 'success' | 'warning' | 'destructive';
   showHistory?: boolean;
+  /** server-side series (GET /api/metrics); replaces the local history */
+  history?: number[];
 }
 
 export const SystemChart = ({ 
@@ -14,9 +16,11 @@ export const SystemChart = ({
   value, 
   maxValue = 100,
   color = 'primary',
-  showHistory = true 
+  showHistory = true,
+  history: seriesHistory
 }: SystemChartProps) => {
-  const [history, setHistory] = useState<number[]>([]);
+  const [localHistory, setLocalHistory] = useState<number[]>([]);
+  const history = seriesHistory?.length ? seriesHistory : localHistory;
   const percentage = Math.min((value / maxValue) * 100, 100);
 
   const colorClasses = {
@@ -34,7 +38,7 @@ export const SystemChart = ({
   };
 
   useEffect(() => {
-    setHistory(prev => [...prev.slice(-19), value]);
+    setLocalHistory(prev => [...prev.slice(-19), value]);
   }, [value]);
 
   const getBarColor = (val: number) => {
@@ -1,6 +1,6 @@
 import { useState, useEffect, useCallback, useMemo } from 'react';
 import { LogEntry, Anomaly, TimelineEvent, SystemMetrics } from '@/types/cyber';
-import { apiFetch } from '@/lib/api';
+import { apiFetch, apiFetchPage } from '@/lib/api';
 
 /* ================= SAFE JSON PARSER ================= */
 function safeParseRawData(raw: any): any | null {
@@ -13,6 +13,12 @@ function safeParseRawData(raw: any): any | null {
   }
 }
 
+export interface MetricsHistory {
+  cpu: number[];
+  memory: number[];
+  disk: number[];
+}
+
 export const useCyberData = () => {
   /* -------------------- STATE -------------------- */
   const [logs, setLogs] = useState<LogEntry[]>([]);
@@ -27,6 +33,11 @@ export const useCyberData = () => {
     uptime: 0,
   });
   const [liveMetrics, setLiveMetrics] = useState<SystemMetrics | null>(null);
+  const [metricsHistory, setMetricsHistory] = useState<MetricsHistory>({
+    cpu: [],
+    memory: [],
+    disk: [],
+  });
   const [activeHosts, setActiveHosts] = useState<Set<string>>(new Set());
 
   const [isLive, setIsLive] = useState(true);
@@ -37,7 +48,9 @@ export const useCyberData = () => {
 
     const fetchLogs = async () => {
       try {
-        const data = await apiFetch<any[]>('/api/logs/explorer');
+        const data = await apiFetch<any[]>(
+          '/api/logs/explorer?limit=500&fields=id,timestamp,log_type,source,severity,message,raw_data'
+        );
         if (!isMounted || !Array.isArray(data)) return;
 
         const normalizedLogs: LogEntry[] = data.map((log) => {
@@ -114,29 +127,48 @@ export const useCyberData = () => {
   }, []);
 
   /* -------------------- ANOMALIES -------------------- */
+  // newest page on load, older pages on scroll (loadMoreAnomalies),
+  // new anomalies arrive over the websocket as `kind: "anomaly"` events
+  const [anomaliesCursor, setAnomaliesCursor] = useState<string | null>(null);
+  const [loadingAnomalies, setLoadingAnomalies] = useState(false);
+
   useEffect(() => {
     let isMounted = true;
 
-    const fetchAnomalies = async () => {
-      try {
-        const data = await apiFetch<any[]>('/api/anomalies');
-        if (Array.isArray(data)) {
-          setAnomalies(data.map(normalizeAnomaly));
-        }
-      } catch (err) {
-        console.error('❌ Failed to fetch anomalies', err);
-      }
-    };
-
-    fetchAnomalies();
-    const interval = setInterval(fetchAnomalies, 3000);
+    apiFetchPage<any>('/api/anomalies')
+      .then((page) => {
+        if (!isMounted || !Array.isArray(page.items)) return;
+        setAnomalies((prev) =>
+          mergeAnomalies(prev, page.items.map(normalizeAnomaly))
+        );
+        setAnomaliesCursor(page.nextCursor);
+      })
+      .catch((err) => console.error('❌ Failed to fetch anomalies', err));
 
     return () => {
       isMounted = false;
-      clearInterval(interval);
     };
   }, []);
 
+  const loadMoreAnomalies = useCallback(async () => {
+    if (!anomaliesCursor || loadingAnomalies) return;
+
+    setLoadingAnomalies(true);
+    try {
+      const page = await apiFetchPage<any>('/api/anomalies', anomaliesCursor);
+      if (Array.isArray(page.items)) {
+        setAnomalies((prev) =>
+          mergeAnomalies(prev, page.items.map(normalizeAnomaly))
+        );
+      }
+      setAnomaliesCursor(page.nextCursor);
+    } catch (err) {
+      console.error('❌ Failed to fetch more anomalies', err);
+    } finally {
+      setLoadingAnomalies(false);
+    }
+  }, [anomaliesCursor, loadingAnomalies]);
+
   /* -------------------- NORMALIZED LOGS -------------------- */
   const normalizedLogs = useMemo(() => {
     return logs.filter(
@@ -149,46 +181,56 @@ export const useCyberData = () => {
   }, [logs]);
 
   /* -------------------- METRICS -------------------- */
-
+  // system metrics live in their own time-series store (/api/metrics),
+  // not in the log feed; cards poll the newest sample, charts the series
 useEffect(() => {
-  if (!normalizedLogs.length) return;
-
-  // ⚠️ ALWAYS recompute from the newest timestamp
-  let latest: LogEntry | null = null;
+  let isMounted = true;
 
-  for (const l of normalizedLogs) {
-    if (l.eventType !== 'system_metrics' || !l.raw_data) continue;
-    if (!latest || l.timestamp > latest.timestamp) {
-      latest = l;
+  const fetchLatest = async () => {
+    try {
+      const data = await apiFetch<any[]>('/api/metrics/latest');
+      if (!isMounted || !Array.isArray(data) || !data.length) return;
+
+      // newest endpoint first
+      const latest = data[0];
+      setMetrics((prev) => ({
+        ...prev,
+        cpu: Math.round(latest.cpu ?? prev.cpu),
+        memory: Math.round(latest.memory ?? prev.memory),
+        disk: Math.round(latest.disk ?? prev.disk),
+        uptime: latest.uptime_seconds ?? prev.uptime,
+      }));
+    } catch (err) {
+      console.error('❌ Failed to fetch metrics', err);
     }
-  }
-
-  if (!latest) return;
+  };
 
-  const data = safeParseRawData(latest.raw_data);
-  if (!data) return;
+  const fetchHistory = async () => {
+    try {
+      const data = await apiFetch<any>('/api/metrics?minutes=60');
+      if (!isMounted || !Array.isArray(data?.points)) return;
 
-  let disk = 0;
-  if (data.disks) {
-    const values = Object.values(data.disks) as Array<{
-      used_percent?: number;
-    }>;
-    if (values.length) {
-      disk = Math.round(
-        values.reduce((s, d) => s + (d.used_percent ?? 0), 0) /
-          values.length
-      );
+      setMetricsHistory({
+        cpu: data.points.map((p: any) => p.cpu ?? 0),
+        memory: data.points.map((p: any) => p.memory ?? 0),
+        disk: data.points.map((p: any) => p.disk ?? 0),
+      });
+    } catch (err) {
+      console.error('❌ Failed to fetch metrics history', err);
     }
-  }
+  };
 
-  setMetrics((prev) => ({
-    ...prev,
-    cpu: data.cpu_percent ?? prev.cpu,
-    memory: data.memory_percent ?? prev.memory,
-    disk,
-    uptime: data.uptime_seconds ?? prev.uptime,
-  }));
-}, [normalizedLogs]);
+  fetchLatest();
+  fetchHistory();
+  const latestTimer = setInterval(fetchLatest, 5000);
+  const historyTimer = setInterval(fetchHistory, 60000);
+
+  return () => {
+    isMounted = false;
+    clearInterval(latestTimer);
+    clearInterval(historyTimer);
+  };
+}, []);
 
 useEffect(() => {
   setLiveMetrics(prev => ({
@@ -223,13 +265,34 @@ useEffect(() => {
   useEffect(() => {
   if (!isLive) return;
 
+  // every endpoint, batched server-side (one frame per 250ms / 200 events)
   const ws = new WebSocket(
-    'ws://localhost:8000/ws/alerts?endpoint_id=default'
+    'ws://localhost:8000/ws/alerts?endpoint_id=*&batch_ms=250'
   );
 
-  ws.onmessage = async (event) => {
-    try {
-      const payload = JSON.parse(event.data);
+  const handleEvent = (event: any) => {
+      /* ---------------- 🔑 LIVE ANOMALIES ---------------- */
+      if (event.kind === 'anomaly') {
+        const anomaly = normalizeAnomaly(event);
+        setAnomalies((prev) =>
+          prev.some((a) => a.id === anomaly.id) ? prev : [anomaly, ...prev]
+        );
+        return;
+      }
+
+      /* ---------------- 🔑 LIVE SYSTEM METRICS ---------------- */
+      if (event.kind === 'metrics') {
+        setMetrics((prev) => ({
+          ...prev,
+          cpu: Math.round(event.cpu ?? prev.cpu),
+          memory: Math.round(event.memory ?? prev.memory),
+          disk: Math.round(event.disk ?? prev.disk),
+          uptime: event.uptime_seconds ?? prev.uptime,
+        }));
+        return;
+      }
+
+      const payload = { ...event, log_type: event.log_type ?? event.type };
 
       /* ---------------- LOGS (UNCHANGED) ---------------- */
       if (payload.log_type) {
@@ -257,59 +320,25 @@ useEffect(() => {
         setLogs((prev) => [normalized, ...prev].slice(0, 200));
       }
 
-      /* ---------------- 🔑 LIVE SYSTEM METRICS (NEW) ---------------- */
-      if (payload.log_type === 'system_metrics' && payload.raw_data) {
-        const data =
-          typeof payload.raw_data === 'string'
-            ? JSON.parse(payload.raw_data)
-            : payload.raw_data;
-
-        let disk = 0;
-        if (data?.disks) {
-          const values = Object.values(data.disks) as Array<{
-            used_percent?: number;
-          }>;
-
-          if (values.length) {
-            disk = Math.round(
-              values.reduce(
-                (sum, d) => sum + (d.used_percent ?? 0),
-                0
-              ) / values.length
-            );
-          }
-        }
-         // 🔑 TRACK ACTIVE HOSTS (NETWORK STATE)
-        if (payload.log_type === 'network' && payload.raw_data) {
-          const data =
-            typeof payload.raw_data === 'string'
-              ? JSON.parse(payload.raw_data)
-              : payload.raw_data;
-
-          if (data?.src_ip) {
-            setActiveHosts(prev => {
-              const next = new Set(prev);
-              next.add(data.src_ip);
-              return next;
-            });
-          }
-        }
+      /* ---------------- 🔑 TRACK ACTIVE HOSTS (NETWORK STATE) ---------------- */
+      if (payload.log_type === 'network' && payload.raw_data) {
+        const data = safeParseRawData(payload.raw_data);
 
-        setLiveMetrics((prev) => ({
-          cpu: data.cpu_percent ?? prev?.cpu ?? 0,
-          memory: data.memory_percent ?? prev?.memory ?? 0,
-          disk,
-          networkConnections: activeHosts.size,
-          activeProcesses: prev?.activeProcesses ?? 0,
-          uptime: data.uptime_seconds ?? prev?.uptime ?? 0,
-        }));
+        if (data?.src_ip) {
+          setActiveHosts(prev => {
+            const next = new Set(prev);
+            next.add(data.src_ip);
+            return next;
+          });
+        }
       }
+  };
 
-      /* ---------------- ANOMALIES (UNCHANGED) ---------------- */
-      const anomaliesData = await apiFetch<any[]>('/api/anomalies');
-      if (Array.isArray(anomaliesData)) {
-        setAnomalies(anomaliesData.map(normalizeAnomaly));
-      }
+  ws.onmessage = async (message) => {
+    try {
+      const frame = JSON.parse(message.data);
+      const events = frame.kind === 'batch' ? frame.events : [frame];
+      events.forEach(handleEvent);
 
       /* ---------------- TIMELINE (UNCHANGED) ---------------- */
       const timelineData = await apiFetch<any[]>('/api/timeline');
@@ -366,8 +395,11 @@ useEffect(() => {
   return {
     logs,
     anomalies,
+    hasMoreAnomalies: anomaliesCursor !== null,
+    loadMoreAnomalies,
     timeline,
     metrics,
+    metricsHistory,
     isLive,
     updateAnomalyStatus,
     clearLogs,
@@ -378,6 +410,12 @@ useEffect(() => {
 
 /* ================= NORMALIZERS ================= */
 
+// keeps what is already loaded (live events, status edits), adds the rest
+function mergeAnomalies(existing: Anomaly[], incoming: Anomaly[]): Anomaly[] {
+  const seen = new Set(existing.map((a) => a.id));
+  return [...existing, ...incoming.filter((a) => !seen.has(a.id))];
+}
+
 function normalizeAnomaly(raw: any): Anomaly {
   return {
     id: String(raw.id ?? crypto.randomUUID()),
@@ -36,22 +36,19 @@ export const useUploadedLogs = (
 
   // 🔹 Fetch uploaded logs from DB
   useEffect(() => {
-    fetch('http://127.0.0.1:8000/api/upload/entries')
-      .then(res => res.json())
-      .then((data: UploadedLog[]) => {
+    Promise.all([
+      fetch('http://127.0.0.1:8000/api/upload/entries?limit=5000').then(res => res.json()),
+      fetch('http://127.0.0.1:8000/api/upload/files').then(res => res.json()),
+    ])
+      .then(([data, files]: [UploadedLog[], { name: string; logCount: number; lastTimestamp: string | null }[]]) => {
         setUploadedLogs(data);
 
-        // Build dropdown files
-        const filesMap: Record<string, number> = {};
-        data.forEach(log => {
-          filesMap[log.fileName] = (filesMap[log.fileName] || 0) + 1;
-        });
-
+        // Dropdown files with server-side counts
         setUploadedFiles(
-          Object.entries(filesMap).map(([name, count]) => ({
-            name,
-            logCount: count,
-            uploadedAt: new Date().toISOString(),
+          files.map(f => ({
+            name: f.name,
+            logCount: f.logCount,
+            uploadedAt: f.lastTimestamp ?? new Date().toISOString(),
           }))
         );
 
@@ -18,3 +18,40 @@ export async function apiFetch<T>(
 
   return res.json();
 }
+
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+/**
+ * Fetch one page of a keyset-paginated list endpoint.
+ * Pass the returned nextCursor to get the following page;
+ * it is null on the last one.
+ */
+export async function apiFetchPage<T>(
+  path: string,
+  cursor: string | null = null,
+  pageSize = 200
+): Promise<Page<T>> {
+  const sep = path.includes('?') ? '&' : '?';
+  const url =
+    `${API_BASE_URL}${path}${sep}limit=${pageSize}` +
+    (cursor ? `&cursor=${encodeURIComponent(cursor)}` : '');
+
+  const res = await fetch(url, {
+    headers: {
+      'Content-Type': 'application/json',
+    },
+  });
+
+  if (!res.ok) {
+    const text = await res.text();
+    throw new Error(`API error ${res.status}: ${text}`);
+  }
+
+  return {
+    items: await res.json(),
+    nextCursor: res.headers.get('X-Next-Cursor'),
+  };
+}
@@ -6,8 +6,11 @@ export function connectAlertsSocket(
     `ws://localhost:8000/ws/alerts?endpoint_id=${endpointId}`
   );
 
+  // frames arrive batched: { kind: 'batch', count, events: [...] }
   ws.onmessage = (event) => {
-    onMessage(JSON.parse(event.data));
+    const frame = JSON.parse(event.data);
+    const events = frame.kind === 'batch' ? frame.events : [frame];
+    events.forEach(onMessage);
   };
 
   return ws;
@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { Anomaly } from '@/types/cyber';
 import { StatusBadge } from '@/components/common/StatusBadge';
 import { cn } from '@/lib/utils';
@@ -22,6 +22,8 @@ import {
 interface AnomaliesProps {
   anomalies: Anomaly[];
   onUpdateStatus: (id: string, status: Anomaly['status']) => void;
+  hasMore?: boolean;
+  onLoadMore?: () => void;
 }
 
 interface XAIResponse {
@@ -66,7 +68,12 @@ const typeColors = {
   suspicious_activity: 'bg-accent/10 text-accent border-accent/30',
 };
 
-export const Anomalies = ({ anomalies, onUpdateStatus }: AnomaliesProps) => {
+export const Anomalies = ({
+  anomalies,
+  onUpdateStatus,
+  hasMore = false,
+  onLoadMore,
+}: AnomaliesProps) => {
   const [selectedAnomaly, setSelectedAnomaly] = useState<Anomaly | null>(null);
   const [filter, setFilter] = useState<'all' | 'active' | 'investigating' | 'resolved'>('all');
   const [showRemediation, setShowRemediation] = useState(false);
@@ -76,6 +83,19 @@ export const Anomalies = ({ anomalies, onUpdateStatus }: AnomaliesProps) => {
   const [xaiLoading, setXaiLoading] = useState(false);
   const [xaiError, setXaiError] = useState<string | null>(null);
 
+  // 🔄 older pages load when the end of the list scrolls into view
+  const listEndRef = useRef<HTMLDivElement | null>(null);
+  useEffect(() => {
+    const node = listEndRef.current;
+    if (!node || !hasMore || !onLoadMore) return;
+
+    const observer = new IntersectionObserver((entries) => {
+      if (entries.some((e) => e.isIntersecting)) onLoadMore();
+    });
+    observer.observe(node);
+    return () => observer.disconnect();
+  }, [hasMore, onLoadMore]);
+
   const filteredAnomalies =
     filter === 'all' ? anomalies : anomalies.filter(a => a.status === filter);
 
@@ -236,6 +256,7 @@ export const Anomalies = ({ anomalies, onUpdateStatus }: AnomaliesProps) => {
             </div>
           );
         })}
+        {hasMore && <div ref={listEndRef} className="h-1" />}
       </div>
 
       {/* XAI Modal */}
@@ -3,12 +3,14 @@ import { MetricCard } from '@/components/dashboard/MetricCard';
 import { LiveLogFeed } from '@/components/dashboard/LiveLogFeed';
 import { SystemChart } from '@/components/dashboard/SystemChart';
 import { LogEntry, SystemMetrics, Anomaly } from '@/types/cyber';
+import type { MetricsHistory } from '@/hooks/useCyberData';
 
 
 interface DashboardProps {
   logs: LogEntry[];
   metrics: SystemMetrics;
   anomalies: Anomaly[];
+  metricsHistory?: MetricsHistory;
 }
 import { useEffect, useState } from 'react';
 
@@ -40,7 +42,7 @@ function useTrend(current: number, threshold = 0.1) {
 }
 
 
-export const Dashboard = ({ logs, metrics, anomalies }: DashboardProps) => {
+export const Dashboard = ({ logs, metrics, anomalies, metricsHistory }: DashboardProps) => {
   const activeAnomalies = anomalies.filter(a => a.status === 'active').length;
   const recentLogs = logs.slice(0, 50);
   const criticalLogs = logs.filter(l => l.severity === 'critical' || l.severity === 'high').length;
@@ -118,16 +120,19 @@ export const Dashboard = ({ logs, metrics, anomalies }: DashboardProps) => {
           <SystemChart
             title="CPU"
             value={metrics.cpu}
+            history={metricsHistory?.cpu}
             color={metrics.cpu > 80 ? 'destructive' : metrics.cpu > 60 ? 'warning' : 'primary'}
           />
           <SystemChart
             title="Memory"
             value={metrics.memory}
+            history={metricsHistory?.memory}
             color={metrics.memory > 80 ? 'destructive' : 'success'}
           />
           <SystemChart
             title="Disk"
             value={metrics.disk}
+            history={metricsHistory?.disk}
             color="primary"
           />
         </div>
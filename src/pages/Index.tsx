@@ -24,8 +24,11 @@ export default function Index() {
   const {
     logs,
     anomalies,
+    hasMoreAnomalies,
+    loadMoreAnomalies,
     timeline,
     metrics,
+    metricsHistory,
     isLive,
     updateAnomalyStatus,
     clearLogs,
@@ -52,6 +55,7 @@ export default function Index() {
           <Dashboard
             logs={logs}
             metrics={metrics}
+            metricsHistory={metricsHistory}
             anomalies={anomalies}
           />
         );
@@ -64,6 +68,8 @@ export default function Index() {
           <Anomalies
             anomalies={anomalies}
             onUpdateStatus={updateAnomalyStatus}
+            hasMore={hasMoreAnomalies}
+            onLoadMore={loadMoreAnomalies}
           />
         );
       case "timeline":
@@ -77,6 +83,7 @@ export default function Index() {
           <Dashboard
             logs={logs}
             metrics={metrics}
+            metricsHistory={metricsHistory}
             anomalies={anomalies}
           />
         );
@@ -49,28 +49,26 @@ export const UploadData = () => {
   useEffect(() => {
     const loadUploadedLogs = async () => {
       try {
-        const res = await fetch('http://127.0.0.1:8000/api/upload/entries');
-        const data: UploadedLog[] = await res.json();
-
-        // 🔹 restore logs
+        const [entriesRes, filesRes] = await Promise.all([
+          fetch('http://127.0.0.1:8000/api/upload/entries?limit=5000'),
+          fetch('http://127.0.0.1:8000/api/upload/files'),
+        ]);
+        const data: UploadedLog[] = await entriesRes.json();
+        const files: { name: string; logCount: number; lastTimestamp: string | null }[] =
+          await filesRes.json();
+
+        // 🔹 restore logs (newest page)
         setUploadedLogs(data);
 
-        // 🔹 rebuild dropdown
-        const filesMap: Record<string, number> = {};
-        data.forEach(log => {
-          filesMap[log.fileName] = (filesMap[log.fileName] || 0) + 1;
-        });
-
+        // 🔹 dropdown comes from the server-side per-file counts
         setUploadedFiles(
-          Object.entries(filesMap).map(([name, count]) => ({
-            name,
-            logCount: count,
-            uploadedAt: new Date().toISOString(),
+          files.map(f => ({
+            name: f.name,
+            logCount: f.logCount,
+            uploadedAt: f.lastTimestamp ?? new Date().toISOString(),
           }))
         );
 
-        // 🔹 run anomaly detection
-        setDetectedAnomalies(detectAnomalies(data));
       } catch (err) {
         console.error('Failed to load uploaded logs', err);
       }
@@ -79,138 +77,46 @@ export const UploadData = () => {
     loadUploadedLogs();
   }, []);
 
-  const generateId = () => Math.random().toString(36).substring(2, 11);
-
-  // Anomaly detection patterns
-  const anomalyPatterns = [
-    { pattern: /failed|failure|denied|unauthorized/i, type: 'Authentication Failure', risk: 75 },
-    { pattern: /error|exception|critical/i, type: 'System Error', risk: 60 },
-    { pattern: /attack|malicious|intrusion|breach/i, type: 'Security Threat', risk: 95 },
-    { pattern: /suspicious|unusual|anomaly/i, type: 'Suspicious Activity', risk: 70 },
-    { pattern: /timeout|unreachable|connection refused/i, type: 'Network Issue', risk: 50 },
-    { pattern: /sql injection|xss|csrf/i, type: 'Web Attack', risk: 90 },
-    { pattern: /brute.?force|multiple.?attempts/i, type: 'Brute Force Attack', risk: 85 },
-  ];
-
-  const detectAnomalies = (logs: UploadedLog[]): DetectedAnomaly[] => {
-    const anomalies: DetectedAnomaly[] = [];
-    
-    logs.forEach(log => {
-      for (const { pattern, type, risk } of anomalyPatterns) {
-        if (pattern.test(log.message) || pattern.test(log.eventType)) {
-          anomalies.push({
-            id: generateId(),
-            logId: log.id,
-            type,
-            description: `Detected ${type.toLowerCase()} in log entry`,
-            riskScore: risk + Math.floor(Math.random() * 10) - 5,
-            xaiReason: generateXaiReason(type, log),
-            timestamp: log.timestamp,
-          });
-          break;
-        }
+  const API = 'http://127.0.0.1:8000';
+
+  // 🔹 stream the file to the backend; parsing happens server-side
+  const uploadLogFile = async (
+    file: File
+  ): Promise<{ logs: UploadedLog[]; anomalyCount: number }> => {
+    const form = new FormData();
+    form.append('file', file);
+
+    const res = await fetch(`${API}/api/upload/`, { method: 'POST', body: form });
+    if (!res.ok) throw new Error(`Failed to upload ${file.name}`);
+    const { uploaded_log_id } = await res.json();
+
+    // 🔹 poll parsing, then server-side anomaly detection
+    let status;
+    for (;;) {
+      status = await (await fetch(`${API}/api/upload/${uploaded_log_id}`)).json();
+      if (status.status === 'failed') {
+        throw new Error(`Failed to parse ${file.name}: ${status.error}`);
       }
-    });
-
-    // Also flag high severity logs
-    logs.filter(log => log.severity === 'high' || log.severity === 'critical').forEach(log => {
-      if (!anomalies.find(a => a.logId === log.id)) {
-        anomalies.push({
-          id: generateId(),
-          logId: log.id,
-          type: 'High Severity Event',
-          description: `Log entry marked as ${log.severity} severity`,
-          riskScore: log.severity === 'critical' ? 90 : 70,
-          xaiReason: `This event was flagged because it has a ${log.severity} severity level, indicating potential security concerns that require immediate attention.`,
-          timestamp: log.timestamp,
-        });
-      }
-    });
+      if (status.status === 'parsed' && ['done', 'failed'].includes(status.detection_status)) break;
+      await new Promise(resolve => setTimeout(resolve, 500));
+    }
 
-    return anomalies;
+    const params = new URLSearchParams({ filename: file.name, limit: '5000' });
+    const logs: UploadedLog[] = await (await fetch(`${API}/api/upload/entries?${params}`)).json();
+    return { logs, anomalyCount: status.anomaly_count ?? 0 };
   };
 
-  const generateXaiReason = (type: string, log: UploadedLog): string => {
-    const reasons: Record<string, string> = {
-      'Authentication Failure': `Pattern analysis detected authentication-related keywords in the log message. The event occurred at ${new Date(log.timestamp).toLocaleString()} from source "${log.source}". Multiple failed authentications may indicate credential stuffing or brute force attacks.`,
-      'System Error': `Critical system error patterns were identified. Error events from "${log.source}" at this severity level often precede system failures or indicate ongoing issues that could be exploited.`,
-      'Security Threat': `High-confidence threat indicators detected. The log contains signatures commonly associated with active attacks. Immediate investigation recommended.`,
-      'Suspicious Activity': `Behavioral analysis flagged unusual patterns. The combination of timing, source, and event characteristics deviates from baseline activity.`,
-      'Network Issue': `Network connectivity problems detected. While not directly a security threat, network issues can mask or enable malicious activity.`,
-      'Web Attack': `Web application attack signatures identified. Common injection or cross-site attack patterns detected in the request data.`,
-      'Brute Force Attack': `Multiple rapid authentication attempts detected. Pattern consistent with automated credential testing or dictionary attacks.`,
-    };
-    return reasons[type] || `Anomaly detected based on pattern matching and severity analysis of the log entry.`;
-  };
-
-  const parseLogFile = async (file: File): Promise<UploadedLog[]> => {
-    const text = await file.text();
-    const extension = file.name.split('.').pop()?.toLowerCase();
-    const fileName = file.name;
-
-    try {
-      if (extension === 'json') {
-        const data = JSON.parse(text);
-        const logs = Array.isArray(data) ? data : [data];
-        return logs.map((log: any) => ({
-          id: generateId(),
-          timestamp: log.timestamp || new Date().toISOString(),
-          source: log.source || 'uploaded',
-          eventType: log.eventType || log.event_type || log.type || 'unknown',
-          status: log.status || 'info',
-          message: log.message || JSON.stringify(log),
-          severity: log.severity || 'low',
-          fileName,
-        }));
-      } else if (extension === 'csv') {
-        const lines = text.split('\n').filter(line => line.trim());
-        if (lines.length < 2) return [];
-        
-        const headers = lines[0].split(',').map(h => h.trim().toLowerCase());
-        return lines.slice(1).map(line => {
-          const values = line.split(',').map(v => v.trim());
-          const obj: any = {};
-          headers.forEach((header, i) => {
-            obj[header] = values[i] || '';
-          });
-          return {
-            id: generateId(),
-            timestamp: obj.timestamp || new Date().toISOString(),
-            source: obj.source || 'uploaded',
-            eventType: obj.eventtype || obj.event_type || obj.type || 'unknown',
-            status: obj.status || 'info',
-            message: obj.message || line,
-            severity: obj.severity || 'low',
-            fileName,
-          };
-        });
-      } else if (extension === 'log') {
-        const lines = text.split('\n').filter(line => line.trim());
-        return lines.map(line => ({
-          id: generateId(),
-          timestamp: new Date().toISOString(),
-          source: 'uploaded',
-          eventType: 'log_entry',
-          status: line.toLowerCase().includes('error') ? 'error' : 
-                  line.toLowerCase().includes('warn') ? 'warning' : 'info',
-          message: line,
-          severity: line.toLowerCase().includes('error') ? 'high' : 
-                   line.toLowerCase().includes('warn') ? 'medium' : 'low',
-          fileName,
-        }));
-      }
-    } catch (error) {
-      console.error('Error parsing file:', error);
-      throw new Error(`Failed to parse ${file.name}`);
-    }
-
-    return [];
+  // 🔹 anomalies found by the backend rule engine for one file
+  const fetchUploadAnomalies = async (fileName: string): Promise<DetectedAnomaly[]> => {
+    const params = new URLSearchParams({ filename: fileName });
+    const res = await fetch(`${API}/api/upload/anomalies?${params}`);
+    return res.ok ? res.json() : [];
   };
 
   const handleFiles = async (files: FileList | null) => {
     if (!files || files.length === 0) return;
 
-    const validExtensions = ['json', 'log', 'csv'];
+    const validExtensions = ['json', 'jsonl', 'ndjson', 'log', 'syslog', 'txt', 'csv', 'xml'];
     const validFiles: File[] = [];
 
     for (let i = 0; i < files.length; i++) {
@@ -223,7 +129,7 @@ export const UploadData = () => {
 
     if (validFiles.length === 0) {
       setUploadStatus('error');
-      setStatusMessage('No valid files found. Please upload .json, .log, or .csv files.');
+      setStatusMessage('No valid files found. Please upload .json, .jsonl, .log, .csv or .xml files.');
       setTimeout(() => setUploadStatus('idle'), 3000);
       return;
     }
@@ -231,10 +137,12 @@ export const UploadData = () => {
     try {
       const allLogs: UploadedLog[] = [];
       const newFiles: UploadedFile[] = [];
-      
+      let anomalyCount = 0;
+
       for (const file of validFiles) {
-        const logs = await parseLogFile(file);
+        const { logs, anomalyCount: found } = await uploadLogFile(file);
         allLogs.push(...logs);
+        anomalyCount += found;
         newFiles.push({
           name: file.name,
           logCount: logs.length,
@@ -261,21 +169,8 @@ export const UploadData = () => {
         return merged;
       });
 
-      
-      // Detect anomalies in uploaded logs
-      const newAnomalies = detectAnomalies(allLogs);
-      // setDetectedAnomalies(prev => [...newAnomalies, ...prev]);
-      // 🔥 store parsed log entries in backend DB
-      await fetch('http://127.0.0.1:8000/api/upload/entries', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(allLogs),
-      });
-
       setUploadStatus('success');
-      setStatusMessage(`Successfully uploaded ${allLogs.length} log entries from ${validFiles.length} file(s). ${newAnomalies.length} anomalies detected.`);
+      setStatusMessage(`Successfully uploaded ${allLogs.length} log entries from ${validFiles.length} file(s). ${anomalyCount} anomalies detected.`);
       setTimeout(() => setUploadStatus('idle'), 3000);
     } catch (error) {
       setUploadStatus('error');
@@ -318,6 +213,22 @@ export const UploadData = () => {
     setSelectedFile(null);
   };
 
+  // 🔹 load the selected file's entries (filtered server-side)
+  useEffect(() => {
+    if (!selectedFile) return;
+
+    const params = new URLSearchParams({ filename: selectedFile, limit: '5000' });
+    fetch(`${API}/api/upload/entries?${params}`)
+      .then(res => res.json())
+      .then((entries: UploadedLog[]) =>
+        setUploadedLogs(prev => [
+          ...prev.filter(log => log.fileName !== selectedFile),
+          ...entries,
+        ])
+      )
+      .catch(err => console.error('Failed to load file entries', err));
+  }, [selectedFile]);
+
   // Filter logs by selected file
   const filteredLogs = useMemo(() => {
     if (!selectedFile) return uploadedLogs;
@@ -329,9 +240,18 @@ export const UploadData = () => {
       return;
     }
 
-    // 🔥 anomalies strictly follow selected file
-    setDetectedAnomalies(detectAnomalies(filteredLogs));
-  }, [selectedFile, filteredLogs]);
+    // 🔥 anomalies strictly follow selected file (detected server-side)
+    let cancelled = false;
+    fetchUploadAnomalies(selectedFile)
+      .then(anomalies => {
+        if (!cancelled) setDetectedAnomalies(anomalies);
+      })
+      .catch(err => console.error('Failed to load file anomalies', err));
+
+    return () => {
+      cancelled = true;
+    };
+  }, [selectedFile]);
 
   const getRiskColor = (score: number) => {
     if (score >= 80) return 'text-destructive';
@@ -371,7 +291,7 @@ export const UploadData = () => {
         <div>
           <h1 className="text-2xl font-bold text-foreground">Upload Data</h1>
           <p className="text-muted-foreground mt-1">
-            Upload log files for analysis (.json, .log, .csv)
+            Upload log files for analysis (.json, .jsonl, .log, .csv, .xml)
           </p>
         </div>
         <div className="flex items-center gap-3">
@@ -458,7 +378,7 @@ export const UploadData = () => {
           ref={fileInputRef}
           type="file"
           multiple
-          accept=".json,.log,.csv"
+          accept=".json,.jsonl,.ndjson,.log,.syslog,.txt,.csv,.xml"
           onChange={handleFileChange}
           className="hidden"
         />
@@ -484,7 +404,7 @@ export const UploadData = () => {
             {isDragging ? "Drop files here" : "Drag & drop files or click to browse"}
           </p>
           <p className="text-sm text-muted-foreground mt-1">
-            Supports .json, .log, .csv files
+            Supports .json, .jsonl, .log (syslog), .csv, EVTX .xml files
           </p>
         </div>
 